@@ -0,0 +1,547 @@
+# бенчмарки горячих путей лаунчера
+# работают без интернета и на linux: локальный HTTP сервер (с Range, как у github) раздаёт синтетические
+# архивы джавы и модлоадеров, манифест версий, библиотеки и ассеты, а лаунчер ставится во временную
+# папку через COBALT_ROOT вместо C:\cobalt_launcher_nano_reliz.
+#
+# python benchmarks/launcher_benchmarks.py --output results.json
+# python benchmarks/launcher_benchmarks.py --compare results.json --max-regression 20
+# python benchmarks/launcher_benchmarks.py --only kernel --compare benchmarks/kernel_baseline.json --max-regression kernel_startup=30
+# (последнее - проверка, что запуск ядра не замедлился. эталон зависит от машины и в git не хранится: если файла
+# из --compare ещё нет, первый прогон записывает в него свой результат. после ускорения запуска файл просто удаляют)
+#
+# результат - json с коммитом, версией питона и временем каждого замера (мс), его удобно сравнивать между коммитами
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+REPO_FOLDER = Path(__file__).resolve().parent.parent
+KERNEL_FOLDER = REPO_FOLDER / "kernel_exe_code"
+MODULES_FOLDER = REPO_FOLDER / "launcher_modules"
+sys.path.insert(0, str(KERNEL_FOLDER))
+
+from launcher_downloads import download_file, download_files
+from launcher_versions import build_version_index, get_version_index, find_versions, page_versions
+from launcher_install import install_version
+from launcher_installed import get_installed_versions, installed_indexes
+from launcher_launch import get_launch_command, launch_plans
+from launcher_store import deduplicate_trees
+from launcher_extract import extract_archive
+import launcher_install
+import launcher_versions
+
+# размеры синтетических данных: подобраны так, чтобы полный прогон шёл меньше минуты
+JAVA_ARCHIVE_FILES = 300
+JAVA_FILE_SIZE = 8 * 1024
+MANIFEST_VERSIONS = 800
+VANILLA_LIBRARIES = 40
+VANILLA_ASSETS = 1500
+ASSET_SIZE = 2 * 1024
+MODLOADER_BUNDLES = 30
+DISPATCH_COMMANDS = ["помощь", "реестр", "инфо", "неизвестная команда"]
+DISPATCH_ROUNDS = 50
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+ # github отдаёт релизы с поддержкой Range, докачка в download_file на это рассчитана
+ def send_head(self):
+  path = self.translate_path(self.path)
+  if not os.path.isfile(path):
+   self.send_error(404)
+   return None
+  size = os.path.getsize(path)
+  file = open(path, "rb")
+  match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+  if match and int(match.group(1)) < size:
+   start = int(match.group(1))
+   file.seek(start)
+   self.send_response(206)
+   self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+   self.send_header("Content-Length", str(size - start))
+  elif match:
+   file.close()
+   self.send_error(416)
+   return None
+  else:
+   self.send_response(200)
+   self.send_header("Content-Length", str(size))
+  self.send_header("Accept-Ranges", "bytes")
+  self.end_headers()
+  return file
+
+ def log_message(self, format, *args):
+  pass
+
+
+def start_server(serve_folder):
+ http.server.ThreadingHTTPServer.daemon_threads = True
+ server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(RangeRequestHandler, directory=str(serve_folder)))
+ threading.Thread(target=server.serve_forever, daemon=True).start()
+ return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def sha1_bytes(data):
+ return hashlib.sha1(data).hexdigest()
+
+
+def write_file(path, data):
+ path.parent.mkdir(parents=True, exist_ok=True)
+ path.write_bytes(data)
+ return data
+
+
+def make_zip(path, files):
+ path.parent.mkdir(parents=True, exist_ok=True)
+ with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+  for name, data in files.items():
+   zip_file.writestr(name, data)
+
+
+def build_fixtures(serve_folder, base_url):
+ # одинаковый seed - одинаковые данные на каждом прогоне и каждой машине
+ generator = random.Random(2024)
+ fixtures = {"base_url": base_url}
+
+ # архивы джавы: половина файлов случайные (как .so и .jar), половина текстовые (сжимаются)
+ java_jobs = []
+ for java_name in ("java_8", "java_17", "java_21"):
+  files = {}
+  for number in range(JAVA_ARCHIVE_FILES):
+   data = generator.randbytes(JAVA_FILE_SIZE) if number % 2 else (f"{java_name} {number}\n" * (JAVA_FILE_SIZE // 16)).encode()
+   files[f"{java_name}/lib/file_{number}.bin"] = data
+  files[f"{java_name}/bin/java"] = b"#!/bin/sh\nexit 0\n"
+  archive = serve_folder / "java" / f"{java_name}.zip"
+  make_zip(archive, files)
+  sha256 = hashlib.sha256(archive.read_bytes()).hexdigest()
+  (archive.parent / f"{java_name}.zip.sha256").write_text(f"{sha256}  {java_name}.zip\n")
+  java_jobs.append({"name": java_name, "url": f"{base_url}/java/{java_name}.zip", "sha256": sha256, "archive": archive})
+ fixtures["java_jobs"] = java_jobs
+
+ # ванильная версия: клиент, библиотеки, индекс ассетов
+ libraries = []
+ for number in range(VANILLA_LIBRARIES):
+  library_path = f"org/bench/lib{number}/1.0/lib{number}-1.0.jar"
+  data = write_file(serve_folder / "libraries" / library_path, generator.randbytes(16 * 1024))
+  libraries.append({"name": f"org.bench:lib{number}:1.0", "downloads": {"artifact": {"path": library_path, "url": f"{base_url}/libraries/{library_path}", "sha1": sha1_bytes(data), "size": len(data)}}})
+
+ assets = {}
+ for number in range(VANILLA_ASSETS):
+  data = generator.randbytes(ASSET_SIZE)
+  asset_hash = sha1_bytes(data)
+  write_file(serve_folder / "assets" / asset_hash[:2] / asset_hash, data)
+  assets[f"minecraft/bench/{number}.ogg"] = {"hash": asset_hash, "size": len(data)}
+ asset_index = write_file(serve_folder / "indexes" / "bench.json", json.dumps({"objects": assets}).encode())
+
+ client = write_file(serve_folder / "client" / "1.20.1.jar", generator.randbytes(256 * 1024))
+ version_json = {
+  "id": "1.20.1",
+  "type": "release",
+  "mainClass": "net.minecraft.client.main.Main",
+  "minecraftArguments": "--username ${auth_player_name} --version ${version_name} --gameDir ${game_directory} --assetsDir ${assets_root} --assetIndex ${assets_index_name}",
+  "downloads": {"client": {"url": f"{base_url}/client/1.20.1.jar", "sha1": sha1_bytes(client), "size": len(client)}},
+  "libraries": libraries,
+  "assetIndex": {"id": "bench", "url": f"{base_url}/indexes/bench.json", "sha1": sha1_bytes(asset_index), "size": len(asset_index)},
+  "assets": "bench",
+  "javaVersion": {"majorVersion": 17},
+ }
+ version_data = write_file(serve_folder / "versions" / "1.20.1.json", json.dumps(version_json).encode())
+
+ # манифест: релизы, снапшоты, альфы и беты вперемешку, как у mojang
+ manifest_versions = []
+ for number in range(MANIFEST_VERSIONS):
+  version_type = ("release", "snapshot", "old_alpha", "old_beta")[number % 4]
+  version_id = f"1.{number // 40}.{number % 40}" if version_type == "release" else f"{version_type[:4]}{number}"
+  manifest_versions.append({"id": version_id, "type": version_type, "url": "", "releaseTime": f"{2010 + number // 60}-{number % 12 + 1:02d}-01T00:00:00+00:00"})
+ manifest_versions.append({"id": "1.20.1", "type": "release", "url": f"{base_url}/versions/1.20.1.json", "sha1": sha1_bytes(version_data), "releaseTime": "2030-01-01T00:00:00+00:00"})
+ write_file(serve_folder / "version_manifest_v2.json", json.dumps({"latest": {"release": "1.20.1"}, "versions": manifest_versions}).encode())
+ fixtures["manifest_url"] = f"{base_url}/version_manifest_v2.json"
+
+ # модлоадер: версия с inheritsFrom и её библиотеки, как в архивах из modloader_minecraft.json
+ modloader_files = {".minecraft/versions/fabric-bench/fabric-bench.json": json.dumps({"id": "fabric-bench", "inheritsFrom": "1.20.1", "mainClass": "net.fabricmc.loader.impl.launch.knot.KnotClient", "libraries": [{"name": "net.fabricmc:fabric-loader:0.15.0"}]}).encode()}
+ for number in range(200):
+  modloader_files[f".minecraft/libraries/net/fabricmc/part{number}/1.0/part{number}-1.0.jar"] = generator.randbytes(8 * 1024)
+ make_zip(serve_folder / "modloader" / "fabric_bench.zip", modloader_files)
+ fixtures["modloader_url"] = f"{base_url}/modloader/fabric_bench.zip"
+ fixtures["modloader_files"] = modloader_files
+ return fixtures
+
+
+def build_modloader_tree(root_folder, modloader_files):
+ # много распакованных сборок модлоадеров, в каждой библиотеки, которые обход должен пропускать
+ for number in range(MODLOADER_BUNDLES):
+  bundle_folder = Path(root_folder) / "modloader_minecraft" / f"bundle_{number}"
+  for name, data in modloader_files.items():
+   name = name.replace("fabric-bench", f"fabric-bench-{number}")
+   write_file(bundle_folder / name, data)
+
+
+def reset_folder(folder):
+ shutil.rmtree(folder, ignore_errors=True)
+ Path(folder).mkdir(parents=True, exist_ok=True)
+
+
+def measure(repeat, function, setup=None):
+ # setup не входит в замер, extra - данные последнего прогона (байты, количество файлов)
+ times = []
+ extra = {}
+ for _ in range(repeat):
+  if setup:
+   setup()
+  started = time.perf_counter()
+  extra = function() or {}
+  times.append((time.perf_counter() - started) * 1000)
+ return summarize(times, extra)
+
+
+def summarize(times, extra=None):
+ times = sorted(times)
+ result = {
+  "runs": len(times),
+  "min_ms": round(times[0], 3),
+  "median_ms": round(statistics.median(times), 3),
+  "mean_ms": round(statistics.fmean(times), 3),
+  "max_ms": round(times[-1], 3),
+ }
+ result.update(extra or {})
+ if result.get("bytes"):
+  result["mb_per_s"] = round(result["bytes"] / 1048576 / (result["median_ms"] / 1000), 2)
+ return result
+
+
+def bench_java_download(work_folder, fixtures, repeat):
+ target_folder = work_folder / "java_download"
+ jobs = [{"name": job["name"], "url": job["url"], "sha256": job["sha256"], "target": target_folder / f"{job['name']}.zip"} for job in fixtures["java_jobs"]]
+
+ def run():
+  results = download_files(jobs, workers=len(jobs))
+  failed = [result for result in results.values() if isinstance(result, Exception)]
+  if failed:
+   raise failed[0]
+  return {"bytes": sum(job["archive"].stat().st_size for job in fixtures["java_jobs"]), "files": len(jobs)}
+
+ return measure(repeat, run, lambda: reset_folder(target_folder))
+
+
+def bench_java_resume(work_folder, fixtures, repeat):
+ # оборванная загрузка: половина архива уже в .part, докачивается через Range
+ job = fixtures["java_jobs"][-1]
+ target = work_folder / "java_resume" / "java_21.zip"
+ archive_data = job["archive"].read_bytes()
+
+ def setup():
+  reset_folder(target.parent)
+  target.with_name(target.name + ".part").write_bytes(archive_data[:len(archive_data) // 2])
+
+ def run():
+  download_file(job["url"], target, job["sha256"])
+  return {"bytes": len(archive_data) - len(archive_data) // 2}
+
+ return measure(repeat, run, setup)
+
+
+def bench_java_extract(work_folder, fixtures, repeat):
+ # распаковка с нуля и переустановка поверх уже распакованной джавы (файлы сверяются по CRC)
+ target_folder = work_folder / "java_extract"
+
+ def run():
+  files = reused = 0
+  for job in fixtures["java_jobs"]:
+   extract_stats = extract_archive(job["archive"], target_folder / job["name"])
+   files += extract_stats["files"]
+   reused += extract_stats["reused"]
+  return {"files": files, "reused": reused}
+
+ def reinstall_setup():
+  reset_folder(target_folder)
+  run()
+
+ return {
+  "java_extract": measure(repeat, run, lambda: reset_folder(target_folder)),
+  "java_extract_reinstall": measure(repeat, run, reinstall_setup),
+ }
+
+
+def bench_modloader_install(work_folder, fixtures, repeat):
+ # то же, что делает задача "установить мод версию": скачать, распаковать, объединить с хранилищем
+ modloader_folder = work_folder / "modloader_install"
+ store_folder = work_folder / "modloader_store"
+
+ def setup():
+  reset_folder(modloader_folder)
+  reset_folder(store_folder)
+
+ def run():
+  archive = modloader_folder / "temp_modloader.zip"
+  download_file(fixtures["modloader_url"], archive)
+  archive_size = archive.stat().st_size
+  extract_archive(archive, modloader_folder / "fabric_bench", keep_extra=True)
+  archive.unlink()
+  deduplicate_trees([modloader_folder / "fabric_bench"], store_folder)
+  return {"bytes": archive_size, "files": len(fixtures["modloader_files"])}
+
+ return measure(repeat, run, setup)
+
+
+def bench_version_filter(work_folder, fixtures, repeat):
+ # как в "скачать ваниль": индекс из кеша манифеста, потом фильтры по категории и поиску и листание
+ cache_folder = work_folder / "version_filter_cache"
+ get_version_index(cache_folder, url=fixtures["manifest_url"])
+ manifest = json.loads((cache_folder / "version_manifest_v2.json").read_text(encoding="utf-8"))
+ queries = [(None, ""), ("release", ""), ("release", "1.1"), ("snapshot", "snap"), (None, "1.20"), ("old_alpha", "alph")]
+
+ def filter_versions():
+  index, _ = get_version_index(cache_folder, url=fixtures["manifest_url"])
+  for version_type, query in queries:
+   found = find_versions(index, version_type, query)
+   page = 1
+   while True:
+    _, current_page, pages = page_versions(found, page)
+    if current_page >= pages:
+     break
+    page += 1
+  return {"versions": len(index["versions"]), "queries": len(queries)}
+
+ results = {}
+ results["version_index_build"] = measure(repeat, lambda: {"versions": len(build_version_index(manifest)["versions"])})
+ results["version_filter"] = measure(repeat, filter_versions, launcher_versions.loaded_indexes.clear)
+ return results
+
+
+def bench_version_discovery(work_folder, fixtures, repeat):
+ # список установленных версий для "запуск мод": первый запуск без индекса и повторный с индексом на диске
+ root_folder = work_folder / "discovery_root"
+ cache_folder = root_folder / "cache"
+ reset_folder(root_folder)
+ build_modloader_tree(root_folder, fixtures["modloader_files"])
+ (root_folder / "minecraft_vanilla" / "versions").mkdir(parents=True)
+
+ def cold_setup():
+  installed_indexes.clear()
+  index_file = cache_folder / "installed_versions.json"
+  if index_file.exists():
+   index_file.unlink()
+
+ def run():
+  return {"versions": len(get_installed_versions(root_folder, cache_folder))}
+
+ return {
+  "version_discovery_cold": measure(repeat, run, cold_setup),
+  "version_discovery_warm": measure(repeat, run, installed_indexes.clear),
+ }
+
+
+def bench_vanilla_install(work_folder, fixtures, repeat):
+ # ассеты по адресу из install_version, а не из json версии - подменяем его на локальный сервер
+ launcher_install.ASSETS_URL = f"{fixtures['base_url']}/assets"
+ minecraft_folder = work_folder / "vanilla_install"
+ store_folder = work_folder / "vanilla_store"
+ index, _ = get_version_index(work_folder / "vanilla_cache", url=fixtures["manifest_url"])
+
+ def run():
+  stats = install_version("1.20.1", minecraft_folder, index, store_folder=store_folder)
+  return {"bytes": stats["bytes"], "files": stats["files"], "from_store": stats["from_store"]}
+
+ def setup_network():
+  reset_folder(minecraft_folder)
+  reset_folder(store_folder)
+
+ return {
+  "vanilla_install_network": measure(repeat, run, setup_network),
+  "vanilla_install_from_store": measure(repeat, run, lambda: reset_folder(minecraft_folder)),
+ }
+
+
+def bench_launch_command(work_folder, fixtures, repeat):
+ # сборка команды запуска через minecraft_launcher_lib и повторная из кеша планов.
+ # версия ставится в свою папку, чтобы замер не зависел от vanilla_install
+ launcher_install.ASSETS_URL = f"{fixtures['base_url']}/assets"
+ minecraft_folder = work_folder / "launch_install"
+ cache_folder = work_folder / "launch_cache"
+ index, _ = get_version_index(work_folder / "launch_versions_cache", url=fixtures["manifest_url"])
+ install_version("1.20.1", minecraft_folder, index)
+ options = {"username": "bench", "uuid": "", "token": "", "executablePath": "java", "jvmArguments": ["-Xmx2G", "-Xms2G"], "enableLoggingConfig": False, "gameDirectory": str(work_folder / "instance")}
+
+ def cold_setup():
+  launch_plans.clear()
+  reset_folder(cache_folder)
+
+ def run():
+  command, cached = get_launch_command("1.20.1", minecraft_folder, options, cache_folder)
+  return {"arguments": len(command), "cached": cached}
+
+ return {
+  "launch_command_cold": measure(repeat, run, cold_setup),
+  "launch_command_cached": measure(repeat, run),
+ }
+
+
+def prepare_kernel_root(root_folder):
+ # лаунчер во временной папке: модули, пустые папки джавы (чтобы не качать) и свежие каталоги
+ reset_folder(root_folder)
+ shutil.copytree(MODULES_FOLDER, root_folder / "launcher_models", ignore=shutil.ignore_patterns("__pycache__"))
+ for java_name in ("java_8", "java_17", "java_21"):
+  (root_folder / "java" / java_name).mkdir(parents=True)
+ (root_folder / "instances" / "bench").mkdir(parents=True)
+ catalogs_folder = root_folder / "cache" / "catalogs"
+ catalogs_folder.mkdir(parents=True)
+ for catalog_name, data in (("plugins.json", "[]"), ("modloader_minecraft.json", "[]"), ("news.txt", "bench")):
+  (catalogs_folder / catalog_name).write_text(data, encoding="utf-8")
+  (catalogs_folder / f"{catalog_name}.meta.json").write_text(json.dumps({"checked_at": time.time() + 86400}), encoding="utf-8")
+
+
+def bench_kernel(work_folder, fixtures, repeat):
+ # настоящий KERNEL: время до строки ввода и время команд по его же метрикам (cache/metrics.jsonl)
+ root_folder = work_folder / "kernel_root"
+ prepare_kernel_root(root_folder)
+ environment = dict(os.environ, COBALT_ROOT=str(root_folder), COBALT_METRICS="1", PYTHONPATH=str(KERNEL_FOLDER))
+ # exe запускается из скомпилированных модулей, без .pyc каждый запуск компилировал бы launcher_* заново
+ environment.pop("PYTHONDONTWRITEBYTECODE", None)
+ commands = "bench\n" + "".join(f"{command}\n" for command in DISPATCH_COMMANDS * DISPATCH_ROUNDS)
+
+ startup_times = []
+ command_times = {}
+ for run in range(repeat + 1):
+  metrics_file = root_folder / "cache" / "metrics.jsonl"
+  if metrics_file.exists():
+   metrics_file.unlink()
+  subprocess.run([sys.executable, str(KERNEL_FOLDER / "COBALT_LAUNCHER_NANO_KERNEL.py")], input=commands.encode("utf-8"), env=environment, cwd=root_folder, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=120)
+  # первый прогон компилирует модули и пишет кеш реестра, он не считается
+  if run == 0:
+   continue
+  for line in metrics_file.read_text(encoding="utf-8").splitlines():
+   record = json.loads(line)
+   if record["kind"] == "startup":
+    startup_times.append(record["ms"])
+   elif record["kind"] == "command":
+    command_times.setdefault(record["name"], []).append(record["ms"])
+
+ results = {"kernel_startup": summarize(startup_times)}
+ all_command_times = [ms for times in command_times.values() for ms in times]
+ results["kernel_dispatch"] = summarize(all_command_times, {"commands": len(all_command_times)})
+ return results
+
+
+benchmarks = {
+ "java_download": bench_java_download,
+ "java_resume": bench_java_resume,
+ "java_extract": bench_java_extract,
+ "modloader_install": bench_modloader_install,
+ "version_filter": bench_version_filter,
+ "version_discovery": bench_version_discovery,
+ "vanilla_install": bench_vanilla_install,
+ "launch_command": bench_launch_command,
+ "kernel": bench_kernel,
+}
+
+
+def git_commit():
+ try:
+  return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_FOLDER, capture_output=True, text=True, timeout=10).stdout.strip() or None
+ except (OSError, subprocess.SubprocessError):
+  return None
+
+
+def parse_max_regression(values):
+ # ["20", "kernel_startup=50"] -> {None: 20.0, "kernel_startup": 50.0}, None - порог для всех остальных замеров
+ limits = {}
+ for value in values or []:
+  name, _, percent = value.rpartition("=")
+  try:
+   limits[name or None] = float(percent)
+  except ValueError:
+   raise SystemExit(f"--max-regression: ожидается ПРОЦЕНТ или ЗАМЕР=ПРОЦЕНТ, получено {value}")
+ return limits
+
+
+def compare_results(old_report, new_report, max_regression):
+ # таблица идёт в stderr, чтобы stdout оставался чистым json
+ # max_regression - {замер или None: процент}, возвращает список замеров, которые стали медленнее порога
+ regressions = []
+ print(f"{'замер':32} {'было, мс':>12} {'стало, мс':>12} {'изменение':>10}", file=sys.stderr)
+ for name, result in new_report["results"].items():
+  old_result = old_report.get("results", {}).get(name)
+  if not old_result:
+   print(f"{name:32} {'-':>12} {result['median_ms']:>12.3f} {'новый':>10}", file=sys.stderr)
+   continue
+  change = (result["median_ms"] - old_result["median_ms"]) / old_result["median_ms"] * 100 if old_result["median_ms"] else 0.0
+  mark = ""
+  limit = max_regression.get(name, max_regression.get(None))
+  if limit is not None and change > limit:
+   regressions.append(name)
+   mark = " !"
+  print(f"{name:32} {old_result['median_ms']:>12.3f} {result['median_ms']:>12.3f} {change:>+9.1f}%{mark}", file=sys.stderr)
+ return regressions
+
+
+def main():
+ parser = argparse.ArgumentParser(description="Бенчмарки Cobalt Launcher Nano без интернета")
+ parser.add_argument("--output", help="куда записать json с результатами (по умолчанию stdout)")
+ parser.add_argument("--repeat", type=int, default=5, help="прогонов каждого замера")
+ parser.add_argument("--only", action="append", choices=sorted(benchmarks), help="запустить только эти группы")
+ parser.add_argument("--compare", help="json прошлого прогона для сравнения, если его нет - туда записывается этот прогон")
+ parser.add_argument("--max-regression", action="append", metavar="[ЗАМЕР=]ПРОЦЕНТ", help="с --compare: код выхода 1, если медиана выросла больше чем на столько процентов (у всех замеров или у одного, можно повторять)")
+ parser.add_argument("--keep", action="store_true", help="не удалять временную папку")
+ args = parser.parse_args()
+ max_regression = parse_max_regression(args.max_regression)
+
+ work_folder = Path(tempfile.mkdtemp(prefix="cobalt_bench_"))
+ server = None
+ try:
+  server, base_url = start_server(work_folder / "serve")
+  fixtures = build_fixtures(work_folder / "serve", base_url)
+
+  results = {}
+  for name in args.only or benchmarks:
+   print(f"[{name}]", file=sys.stderr, flush=True)
+   group_results = benchmarks[name](work_folder, fixtures, args.repeat)
+   results.update(group_results if "runs" not in group_results else {name: group_results})
+ finally:
+  if server:
+   server.shutdown()
+  if not args.keep:
+   shutil.rmtree(work_folder, ignore_errors=True)
+
+ report = {
+  "commit": git_commit(),
+  "created": datetime.now().isoformat(timespec="seconds"),
+  "python": platform.python_version(),
+  "platform": platform.platform(),
+  "cpu_count": os.cpu_count(),
+  "repeat": args.repeat,
+  "results": results,
+ }
+ report_text = json.dumps(report, ensure_ascii=False, indent=1)
+ if args.output:
+  Path(args.output).write_text(report_text + "\n", encoding="utf-8")
+ else:
+  print(report_text)
+
+ if args.compare and not Path(args.compare).exists():
+  Path(args.compare).write_text(report_text + "\n", encoding="utf-8")
+  print(f"Сравнивать не с чем, результат записан в {args.compare} как эталон", file=sys.stderr)
+ elif args.compare:
+  old_report = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+  regressions = compare_results(old_report, report, max_regression)
+  if regressions:
+   print(f"Медленнее допустимого: {', '.join(regressions)}", file=sys.stderr)
+   return 1
+ return 0
+
+
+if __name__ == "__main__":
+ sys.exit(main())
@@ -1,173 +1,456 @@
-# библиотеки для плагинов
-import math
-import random
-
-# pip install minecraft_launcher_lib colored 
-import minecraft_launcher_lib
-from colored import fg, attr
-
-import os
-import sys
-import webbrowser
-import subprocess
-import shutil
-from datetime import datetime
-import urllib.request
-import urllib.error
-import urllib.parse
-from pathlib import Path
-import zipfile
-import json
-
-RED = fg('red')
-GREEN = fg('green')
-YELLOW = fg('yellow')
-BLUE = fg('blue')
-PURPLE = fg('magenta')
-SKY_BLUE = fg('cyan')
-COLOR_END = attr('reset')
-
-root_folder = r"C:\cobalt_launcher_nano_reliz" 
-folders = ['java', 'minecraft_vanilla', 'plugins', 'config_files', 'instances', 'launcher_models']
-
-for folder in folders:                                                                                                                                                                                        
- create_folders = os.path.join(root_folder, folder)
- os.makedirs(create_folders, exist_ok=True)
- 
-try:
- with open(r"C:\cobalt_launcher_nano_reliz\config_files\accounts.txt", "x", encoding="utf-8") as file:
-  pass
- with open(r"C:\cobalt_launcher_nano_reliz\config_files\notes.txt", "x", encoding="utf-8") as file:
-  pass
-except FileExistsError:
- pass
-
-root_folder_java = Path(r"C:\cobalt_launcher_nano_reliz\java\temp_java_zip")
-root_folder_java.mkdir(parents=True, exist_ok=True)
-
-java8_github = r"https://github.com/m1r0tv0rets/Cobalt_Launcher_Nano/releases/download/java/java_8.zip"
-java17_github = r"https://github.com/m1r0tv0rets/Cobalt_Launcher_Nano/releases/download/java/java_17.zip"
-java21_github = r"https://github.com/m1r0tv0rets/Cobalt_Launcher_Nano/releases/download/java/java_21.zip"
-
-java8_folder = Path(r"C:\cobalt_launcher_nano_reliz\java\java_8")
-java17_folder = Path(r"C:\cobalt_launcher_nano_reliz\java\java_17")
-java21_folder = Path(r"C:\cobalt_launcher_nano_reliz\java\java_21")
-
-java8_temp_folder = root_folder_java / "java_8.zip"
-java17_temp_folder = root_folder_java / "java_17.zip"
-java21_temp_folder = root_folder_java / "java_21.zip"
-
-if java8_folder.is_dir():
- pass
-else:
-    print(f"{RED}ВНИМАНИЕ: ЛАУНЧЕР СКАЧИВАЕТ РЕСУРСЫ!!!{COLOR_END}")
-    print(f"{YELLOW}Скачивание Java 8...{COLOR_END}")
-    req = urllib.request.Request(
-        java8_github, 
-        headers={'User-Agent': 'Mozilla'}  
-    )
-    with urllib.request.urlopen(req) as response, open(java8_temp_folder, 'wb') as out_file:
-        out_file.write(response.read())
-
-    print(f"{YELLOW}Распаковка Java 8...{COLOR_END}")
-    with zipfile.ZipFile(java8_temp_folder, 'r') as zip_ref:
-        zip_ref.extractall(java8_folder)  
-    
-    java8_temp_folder.unlink() 
-    print(f"{GREEN}Java 8 успешно установлена!{COLOR_END}")
-    
-if java17_folder.is_dir():
- pass
-else:
-    print(f"{YELLOW}Скачивание Java 17...{COLOR_END}")
-    req = urllib.request.Request(
-        java17_github, 
-        headers={'User-Agent': 'Mozilla'}  
-    )
-    with urllib.request.urlopen(req) as response, open(java17_temp_folder, 'wb') as out_file:
-        out_file.write(response.read())
-
-    print(f"{YELLOW}Распаковка Java 17...{COLOR_END}")
-    with zipfile.ZipFile(java17_temp_folder, 'r') as zip_ref:
-        zip_ref.extractall(java17_folder)  
-    
-    java17_temp_folder.unlink() 
-    print(f"{GREEN}Java 17 успешно установлена!{COLOR_END}")
-    
-if java21_folder.is_dir():
- pass
-else:
-    print(f"{YELLOW}Скачивание Java 21...{COLOR_END}")
-    req = urllib.request.Request(
-        java21_github, 
-        headers={'User-Agent': 'Mozilla'}  
-    )
-    with urllib.request.urlopen(req) as response, open(java21_temp_folder, 'wb') as out_file:
-        out_file.write(response.read())
-
-    print(f"{YELLOW}Распаковка Java 21...{COLOR_END}")
-    with zipfile.ZipFile(java21_temp_folder, 'r') as zip_ref:
-        zip_ref.extractall(java21_folder)  
-    
-    java21_temp_folder.unlink() 
-    print(f"{GREEN}Java 21 успешно установлена!{COLOR_END}")
-    print(f"{RED}ВНИМАНИЕ: ЛАУНЧЕР ГОТОВ К РАБОТЕ!{COLOR_END}")
-    
-print(f"""
-{SKY_BLUE}Cobalt Launcher Nano:{COLOR_END}
-{RED}Версия: 1.1 СТАБИЛЬНАЯ{COLOR_END}
-{GREEN}Автор: M1rotvorets{COLOR_END}
-{YELLOW}Не знаете команды? Введите "помощь" чтобы вывести список {COLOR_END}
-{BLUE}ДЛЯ ПЛАГИНОВ КОМАНДА ПОМОЩИ СОСТОИТ ИЗ НАЗВАНИЯ ПЛАГИНА И СЛОВА ПОМОЩЬ {COLOR_END}
-""")
-
-instances_folder = Path(r"C:\cobalt_launcher_nano_reliz\instances")
-os.makedirs(instances_folder, exist_ok=True)
-
-for number, folder_instances_list in enumerate(instances_folder.iterdir(), start=1):
- if folder_instances_list.is_dir():
-  print(f"{GREEN}{number}) {folder_instances_list.name}{COLOR_END}")
-
-choice_instances = str(input(f"{RED}Напиши название инстанса или создайте новый (введя слово 'новый'): {COLOR_END}")).strip()
-
-if choice_instances == "новый":
- instance_name = str(input(f"{YELLOW}Введите название нового инстанса: {COLOR_END}")).strip()
- if instance_name:
-  instance_path = Path(rf"C:\cobalt_launcher_nano_reliz\instances\{instance_name}")
-  os.makedirs(instance_path / "mods", exist_ok=True)
-  os.makedirs(instance_path / "resourcepacks", exist_ok=True)
-  os.makedirs(instance_path / "saves", exist_ok=True)
-  os.makedirs(instance_path / "config", exist_ok=True)
-  os.makedirs(instance_path / "schematics", exist_ok=True)
-  os.makedirs(instance_path / "screenshots", exist_ok=True)
-  os.makedirs(instance_path / "shaderpacks", exist_ok=True)
-  print(f"{GREEN}Создан и выбран инстанс: {instance_name}{COLOR_END}")
-else:
- instance_name = choice_instances
- print(f"{GREEN}Выбран инстанс: {instance_name}{COLOR_END}")
-
-while True:
- # глобальный слушитель
- command = (input(f"{PURPLE}Введите команду: {COLOR_END}"))
- 
- # загрузчик плагинов
- root_folder_pluguns = Path(r"C:\cobalt_launcher_nano_reliz\plugins")
-
- for plugin_file in root_folder_pluguns.glob("*.py"):
-  try:
-   command_text = plugin_file.read_text(encoding="utf-8")
-   exec(command_text, globals(), locals())
-  
-  except Exception as e:
-   print(f"[Ошибка выполнения команды из {plugin_file.name}]: {e}")
-   
- # загрузчик модулей лаунчера
- root_folder_launcher_models = Path(r"C:\cobalt_launcher_nano_reliz\launcher_models")
-
- for launcher_models_file in root_folder_launcher_models.glob("*.py"):
-  try:
-   command_text = launcher_models_file.read_text(encoding="utf-8")
-   exec(command_text, globals(), locals())
-  
-  except Exception as e:
-   print(f"[Ошибка выполнения команды из {launcher_models_file.name}]: {e}")
+import sys
+import time
+
+# --profile-startup выводит время каждого этапа запуска до строки ввода
+startup_profile = "--profile-startup" in sys.argv
+# любые другие аргументы - пакетный режим без вопросов (launcher_batch.py, KERNEL.exe --help)
+batch_mode = any(argument != "--profile-startup" for argument in sys.argv[1:])
+startup_phases = []
+startup_mark = [time.perf_counter()]
+
+def startup_phase(phase_name):
+ now = time.perf_counter()
+ startup_phases.append((phase_name, (now - startup_mark[0]) * 1000))
+ startup_mark[0] = now
+
+def skip_startup_wait():
+ # ожидание ввода пользователя не входит во время запуска
+ startup_mark[0] = time.perf_counter()
+
+import importlib
+import marshal
+
+class LazyModule:
+ # модуль загружается при первом обращении к атрибуту, подмодули (urllib.request) тоже.
+ # полученный атрибут запоминается, дальше он берётся без вызова __getattr__
+ def __init__(self, module_name):
+  self.module_name = module_name
+
+ def __getattr__(self, attribute):
+  if attribute.startswith("__"):
+   raise AttributeError(attribute)
+  module = importlib.import_module(self.module_name)
+  try:
+   value = getattr(module, attribute)
+  except AttributeError:
+   value = importlib.import_module(f"{self.module_name}.{attribute}")
+  setattr(self, attribute, value)
+  return value
+
+def bundled_lazy_modules():
+ # не вызывается: по этим import сборщик exe видит библиотеки, которые грузятся через LazyModule
+ import ast
+ import random
+ import subprocess
+ import webbrowser
+ import zipfile
+ import urllib.request
+ import urllib.error
+ import minecraft_launcher_lib
+
+# библиотеки для плагинов
+import math
+random = LazyModule("random")
+
+# pip install minecraft_launcher_lib colored 
+minecraft_launcher_lib = LazyModule("minecraft_launcher_lib")
+from colored import fg, attr
+
+import os
+webbrowser = LazyModule("webbrowser")
+subprocess = LazyModule("subprocess")
+import shutil
+from datetime import datetime
+urllib = LazyModule("urllib")
+from pathlib import Path
+zipfile = LazyModule("zipfile")
+import json
+# ast нужен только для компиляции изменённых модулей
+ast = LazyModule("ast")
+
+from launcher_downloads import download_file, download_files, fetch_cached, read_catalog, refresh_in_background, format_download_progress, configure_peer_cache, peer_cache, DownloadError
+from launcher_jobs import submit_job, set_job_limit, set_job_progress, check_job_cancelled, cancel_job, active_jobs, list_jobs, pop_finished_jobs, job_elapsed, JobCancelled
+from launcher_metrics import configure_metrics, record_metric, read_metrics, summarize_metrics, clear_metrics, metrics_enabled
+from launcher_processes import configure_processes, set_process_limits, list_sessions, running_sessions, stop_game, pop_finished_sessions, session_usage, session_uptime, session_log_tail, format_uptime, process_settings, ClientLimitReached
+from launcher_peer import load_peer_settings
+from launcher_update import recover_update
+# установка, запуск, миры, бэкапы и остальные подсистемы импортируют модули команд, которым они нужны,
+# при старте грузится только то, что нужно самому ядру
+startup_phase("импорт библиотек")
+
+RED = fg('red')
+GREEN = fg('green')
+YELLOW = fg('yellow')
+BLUE = fg('blue')
+PURPLE = fg('magenta')
+SKY_BLUE = fg('cyan')
+COLOR_END = attr('reset')
+
+# COBALT_ROOT переносит лаунчер в другую папку (бенчмарки и проверки на linux)
+root_folder = os.environ.get("COBALT_ROOT", r"C:\cobalt_launcher_nano_reliz")
+folders = ['java', 'minecraft_vanilla', 'plugins', 'config_files', 'instances', 'launcher_models', 'cache']
+cache_folder = Path(root_folder) / "cache"
+store_folder = Path(root_folder) / "store"
+backup_folder = Path(root_folder) / "backups"
+
+# метрики пишутся в cache/metrics.jsonl, COBALT_METRICS=0 их выключает
+configure_metrics(cache_folder / "metrics.jsonl", os.environ.get("COBALT_METRICS", "1") != "0")
+
+# логи игровых сессий и лимиты на число клиентов и их память
+configure_processes(Path(root_folder) / "logs", Path(root_folder) / "config_files" / "processes.json")
+# кеш соседа в локальной сети: загрузки сначала идут к нему, COBALT_PEER_CACHE задаёт адрес без настроек
+peer_settings_file = Path(root_folder) / "config_files" / "peer_cache.json"
+configure_peer_cache(os.environ.get("COBALT_PEER_CACHE") or load_peer_settings(peer_settings_file)["url"])
+# профили JVM инстансов: авто подбор или свои аргументы
+jvm_profiles_file = Path(root_folder) / "config_files" / "jvm_profiles.json"
+
+# папки и файлы создаются при первом запуске или если какую-то из папок удалили
+existing_folders = set(os.listdir(root_folder)) if os.path.isdir(root_folder) else set()
+if not existing_folders.issuperset(folders):
+ for folder in folders:
+  create_folders = os.path.join(root_folder, folder)
+  os.makedirs(create_folders, exist_ok=True)
+
+ try:
+  with open(Path(root_folder) / "config_files" / "accounts.txt", "x", encoding="utf-8") as file:
+   pass
+  with open(Path(root_folder) / "config_files" / "notes.txt", "x", encoding="utf-8") as file:
+   pass
+ except FileExistsError:
+  pass
+startup_phase("папки лаунчера")
+
+# temp_java_zip создаётся загрузчиком, когда джаву действительно нужно качать
+root_folder_java = Path(root_folder) / "java" / "temp_java_zip"
+
+# COBALT_JAVA_MIRROR позволяет брать архивы с зеркала или локального тестового сервера
+java_download_base = os.environ.get("COBALT_JAVA_MIRROR", r"https://github.com/m1r0tv0rets/Cobalt_Launcher_Nano/releases/download/java").rstrip("/")
+java8_github = f"{java_download_base}/java_8.zip"
+java17_github = f"{java_download_base}/java_17.zip"
+java21_github = f"{java_download_base}/java_21.zip"
+
+java8_folder = Path(root_folder) / "java" / "java_8"
+java17_folder = Path(root_folder) / "java" / "java_17"
+java21_folder = Path(root_folder) / "java" / "java_21"
+
+java8_temp_folder = root_folder_java / "java_8.zip"
+java17_temp_folder = root_folder_java / "java_17.zip"
+java21_temp_folder = root_folder_java / "java_21.zip"
+
+java_runtimes = [
+ {"name": "Java 8", "url": java8_github, "sha256_url": java8_github + ".sha256", "target": java8_temp_folder, "folder": java8_folder},
+ {"name": "Java 17", "url": java17_github, "sha256_url": java17_github + ".sha256", "target": java17_temp_folder, "folder": java17_folder},
+ {"name": "Java 21", "url": java21_github, "sha256_url": java21_github + ".sha256", "target": java21_temp_folder, "folder": java21_folder},
+]
+
+# все недостающие джавы качаются одновременно в фоновой задаче, недокачанные .part из temp_java_zip докачиваются.
+# папка джавы появляется только после полной распаковки, поэтому проверка is_dir при старте ей верит
+def unpack_java_runtime(runtime):
+ from launcher_extract import extract_archive
+ from launcher_verify import remember_extracted
+ extract_started = time.perf_counter()
+ extract_stats = extract_archive(runtime["target"], runtime["folder"])
+ runtime["target"].unlink()
+ remember_extracted(runtime["folder"], cache_folder)
+ record_metric("extract", runtime["name"], ms=round((time.perf_counter() - extract_started) * 1000, 1), bytes=extract_stats["bytes"], files=extract_stats["files"])
+
+def install_java_job(job, runtimes):
+ java_results = download_files(runtimes, workers=len(runtimes), progress=lambda states: set_job_progress(job, format_download_progress(states)), on_complete=unpack_java_runtime)
+ check_job_cancelled(job)
+ failed = [f"{runtime['name']}: {java_results[runtime['name']]}" for runtime in runtimes if isinstance(java_results[runtime["name"]], Exception)]
+ if failed:
+  raise DownloadError("не установлены " + "; ".join(failed))
+ unverified = [runtime["name"] for runtime in runtimes if not runtime.get("verified")]
+ if unverified:
+  return f"{', '.join(runtime['name'] for runtime in runtimes)} установлены, но {', '.join(unverified)} без проверки sha256: хеш архива не найден"
+ return f"{', '.join(runtime['name'] for runtime in runtimes)} успешно установлены!"
+
+instances_folder = Path(root_folder) / "instances"
+os.makedirs(instances_folder, exist_ok=True)
+
+# в пакетном режиме баннера и выбора инстанса нет, инстанс задаётся аргументом --instance
+if batch_mode:
+ from launcher_batch import parse_batch_arguments, run_batch
+ batch_options, batch_operations = parse_batch_arguments(sys.argv[1:])
+ instance_name = "default"
+else:
+ print(f"""
+{SKY_BLUE}Cobalt Launcher Nano:{COLOR_END}
+{RED}Версия: 1.1 СТАБИЛЬНАЯ{COLOR_END}
+{GREEN}Автор: M1rotvorets{COLOR_END}
+{YELLOW}Не знаете команды? Введите "помощь" чтобы вывести список {COLOR_END}
+{BLUE}ДЛЯ ПЛАГИНОВ КОМАНДА ПОМОЩИ СОСТОИТ ИЗ НАЗВАНИЯ ПЛАГИНА И СЛОВА ПОМОЩЬ {COLOR_END}
+""")
+ startup_phase("баннер")
+
+ for number, folder_instances_list in enumerate(instances_folder.iterdir(), start=1):
+  if folder_instances_list.is_dir():
+   print(f"{GREEN}{number}) {folder_instances_list.name}{COLOR_END}")
+
+ startup_phase("список инстансов")
+ choice_instances = str(input(f"{RED}Напиши название инстанса или создайте новый (введя слово 'новый'): {COLOR_END}")).strip()
+
+ if choice_instances == "новый":
+  instance_name = str(input(f"{YELLOW}Введите название нового инстанса: {COLOR_END}")).strip()
+  if instance_name:
+   from launcher_clone import clone_instance, list_templates
+   from launcher_batch import create_instance_folders
+   instance_path = instances_folder / instance_name
+   instance_templates = list_templates(Path(root_folder) / "templates") if not instance_path.exists() else []
+   for number, instance_template in enumerate(instance_templates, start=1):
+    print(f"{SKY_BLUE}{number}) {instance_template.name}{COLOR_END}")
+   choice_template = str(input(f"{YELLOW}Номер шаблона для нового инстанса (Enter - пустой инстанс): {COLOR_END}")).strip() if instance_templates else ""
+   if choice_template.isdigit() and 0 < int(choice_template) <= len(instance_templates):
+    clone_instance(instance_templates[int(choice_template) - 1], instance_path)
+   create_instance_folders(instance_path)
+   print(f"{GREEN}Создан и выбран инстанс: {instance_name}{COLOR_END}")
+ else:
+  instance_name = choice_instances
+  print(f"{GREEN}Выбран инстанс: {instance_name}{COLOR_END}")
+ skip_startup_wait()
+
+# каталоги с гитхаба (плагины, модлоадеры, новости) берутся из cache/catalogs,
+# при старте устаревшие копии обновляются в фоне по ETag/Last-Modified
+github_raw_folder = "https://raw.githubusercontent.com/m1r0tv0rets/Cobalt_Launcher_Nano/main"
+catalogs_folder = cache_folder / "catalogs"
+catalog_urls = {
+ "plugins.json": f"{github_raw_folder}/plugins.json",
+ "modloader_minecraft.json": f"{github_raw_folder}/modloader_minecraft.json",
+ "news.txt": f"{github_raw_folder}/news.txt",
+ # COBALT_UPDATE_MANIFEST - свой манифест обновлений (зеркало для парка машин или тестовый сервер)
+ "update_manifest.json": os.environ.get("COBALT_UPDATE_MANIFEST", f"{github_raw_folder}/update_manifest.json"),
+}
+
+# обновление модулей, прерванное закрытием лаунчера, откатывается до загрузки команд
+if recover_update(root_folder):
+ print(f"{YELLOW}Прерванное обновление модулей откачено{COLOR_END}")
+
+def read_launcher_catalog(catalog_name):
+ return read_catalog(catalog_urls[catalog_name], catalogs_folder / catalog_name)[0]
+
+def fetch_update_manifest():
+ # манифест обновлений всегда перепроверяется на сервере, без сети - последняя сохранённая копия
+ return json.loads(fetch_cached(catalog_urls["update_manifest.json"], catalogs_folder / "update_manifest.json", ttl=0)[0])
+
+def start_launcher_peer_server(port):
+ # сервер качает для сети и с зеркал джавы и обновлений, если они заданы, возвращает адрес для других лаунчеров
+ mirror_hosts = {urllib.parse.urlsplit(url).hostname for url in (java_download_base, catalog_urls["update_manifest.json"])}
+ from launcher_peer import start_peer_server, lan_address
+ start_peer_server(cache_folder, store_folder, port, upstream_hosts=mirror_hosts)
+ return f"http://{lan_address()}:{port}"
+
+if batch_mode:
+ sys.exit(run_batch(batch_options, batch_operations, {
+  "root_folder": root_folder,
+  "cache_folder": cache_folder,
+  "store_folder": store_folder,
+  "instances_folder": instances_folder,
+  "accounts_file": Path(root_folder) / "config_files" / "accounts.txt",
+  "jvm_profiles_file": jvm_profiles_file,
+  "java_folders": {"8": java8_folder, "17": java17_folder, "21": java21_folder},
+  "java_runtimes": java_runtimes,
+  "install_java_job": install_java_job,
+  "read_catalog": read_launcher_catalog,
+  "fetch_update_manifest": fetch_update_manifest,
+  "start_peer_server": start_launcher_peer_server,
+ }))
+
+# реестр команд
+# код плагинов и модулей компилируется один раз и кешируется по mtime и размеру файла.
+# команды модуля берутся из сравнений вида command == "..." или command in (...),
+# модули без таких сравнений выполняются на каждую команду, как раньше
+root_folder_pluguns = Path(root_folder) / "plugins"
+root_folder_launcher_models = Path(root_folder) / "launcher_models"
+
+modules_cache = {}
+command_dispatch = {}
+fallback_modules = []
+registry_stats = {"modules": 0, "commands": 0, "compiled": 0, "load_ms": 0.0, "dispatch_ms": 0.0, "command_ms": 0.0, "last_command": ""}
+
+# скомпилированный код модулей сохраняется между запусками в cache/modules_registry.bin (как .pyc),
+# поэтому при старте заново компилируются только изменённые модули
+registry_cache_file = cache_folder / "modules_registry.bin"
+
+def load_registry_cache():
+ try:
+  registry_cache = marshal.loads(registry_cache_file.read_bytes())
+ except (OSError, ValueError, EOFError, TypeError):
+  return {}
+ if not isinstance(registry_cache, dict) or registry_cache.get("python") != sys.version:
+  return {}
+ return registry_cache["modules"]
+
+def save_registry_cache():
+ stored_modules = {path: (list(module["stamp"]), module["code"], sorted(module["commands"]) if module["commands"] is not None else None) for path, module in modules_cache.items() if module["code"] is not None}
+ temp_file = registry_cache_file.with_name("modules_registry.bin.tmp")
+ try:
+  registry_cache_file.parent.mkdir(parents=True, exist_ok=True)
+  temp_file.write_bytes(marshal.dumps({"python": sys.version, "modules": stored_modules}))
+  os.replace(temp_file, registry_cache_file)
+ except OSError:
+  pass
+
+stored_registry = load_registry_cache()
+
+def find_module_commands(module_tree):
+ module_commands = set()
+ command_names = 0
+ matched_names = 0
+ for node in ast.walk(module_tree):
+  if isinstance(node, ast.Name) and node.id == "command":
+   command_names += 1
+  elif isinstance(node, ast.Compare) and isinstance(node.left, ast.Name) and node.left.id == "command" and len(node.ops) == 1:
+   operator = node.ops[0]
+   comparator = node.comparators[0]
+   if isinstance(operator, ast.Eq) and isinstance(comparator, ast.Constant) and isinstance(comparator.value, str):
+    module_commands.add(comparator.value)
+    matched_names += 1
+   elif isinstance(operator, ast.In) and isinstance(comparator, (ast.Tuple, ast.List, ast.Set)) and all(isinstance(element, ast.Constant) and isinstance(element.value, str) for element in comparator.elts):
+    module_commands.update(element.value for element in comparator.elts)
+    matched_names += 1
+ # command используется как-то иначе (startswith, присваивание и т.д.) - команды модуля неизвестны
+ if not module_commands or command_names != matched_names:
+  return None
+ return module_commands
+
+def refresh_command_registry():
+ started = time.perf_counter()
+ changed = False
+ registry_changed = False
+ seen_modules = []
+ for modules_folder in (root_folder_pluguns, root_folder_launcher_models):
+  try:
+   entries = sorted(os.scandir(modules_folder), key=lambda entry: entry.name)
+  except FileNotFoundError:
+   continue
+  for entry in entries:
+   if not entry.name.lower().endswith(".py") or not entry.is_file():
+    continue
+   seen_modules.append(entry.path)
+   stat = entry.stat()
+   stamp = (stat.st_mtime_ns, stat.st_size)
+   cached = modules_cache.get(entry.path)
+   if cached and cached["stamp"] == stamp:
+    continue
+   changed = True
+   module = {"name": entry.name, "stamp": stamp, "code": None, "commands": None}
+   stored = stored_registry.pop(entry.path, None)
+   if stored and tuple(stored[0]) == stamp:
+    module["code"] = stored[1]
+    module["commands"] = set(stored[2]) if stored[2] is not None else None
+    modules_cache[entry.path] = module
+    continue
+   registry_changed = True
+   try:
+    source = Path(entry.path).read_text(encoding="utf-8")
+    module_tree = ast.parse(source, filename=entry.path)
+    module["code"] = compile(module_tree, entry.path, "exec")
+    module["commands"] = find_module_commands(module_tree)
+    registry_stats["compiled"] += 1
+   except Exception as e:
+    print(f"[Ошибка загрузки модуля {entry.name}]: {e}")
+   modules_cache[entry.path] = module
+
+ # в сохранённом реестре остались модули, которых больше нет
+ if stored_registry:
+  stored_registry.clear()
+  registry_changed = True
+
+ for removed_path in set(modules_cache) - set(seen_modules):
+  del modules_cache[removed_path]
+  changed = True
+  registry_changed = True
+
+ if registry_changed:
+  save_registry_cache()
+
+ if changed:
+  loaded_modules = [modules_cache[path] for path in seen_modules if modules_cache[path]["code"] is not None]
+  fallback_modules[:] = [module for module in loaded_modules if module["commands"] is None]
+  all_commands = set()
+  for module in loaded_modules:
+   all_commands.update(module["commands"] or ())
+  command_dispatch.clear()
+  for module_command in all_commands:
+   command_dispatch[module_command] = [module for module in loaded_modules if module["commands"] is None or module_command in module["commands"]]
+  registry_stats["modules"] = len(loaded_modules)
+  registry_stats["commands"] = len(all_commands)
+
+ registry_stats["load_ms"] = (time.perf_counter() - started) * 1000
+ return changed
+
+refresh_command_registry()
+print(f"{SKY_BLUE}Загружено модулей: {registry_stats['modules']}, команд: {registry_stats['commands']} за {registry_stats['load_ms']:.1f} мс{COLOR_END}")
+startup_phase("реестр команд")
+
+# отложенные проверки: недостающая джава и устаревшие каталоги качаются в фоне, пока пользователь вводит команду
+missing_java_runtimes = [runtime for runtime in java_runtimes if not runtime["folder"].is_dir()]
+if missing_java_runtimes:
+ print(f"{RED}ВНИМАНИЕ: ЛАУНЧЕР СКАЧИВАЕТ РЕСУРСЫ!!!{COLOR_END}")
+ print(f"{YELLOW}Скачивание и распаковка в фоне: {', '.join(runtime['name'] for runtime in missing_java_runtimes)}. Ход загрузки - команда \"задачи\"{COLOR_END}")
+ submit_job("Установка джавы", "java", install_java_job, missing_java_runtimes)
+
+for catalog_name, catalog_url in catalog_urls.items():
+ refresh_in_background(catalog_url, catalogs_folder / catalog_name)
+startup_phase("фоновые задачи")
+record_metric("startup", "запуск", ms=round(sum(phase_ms for phase_name, phase_ms in startup_phases), 1))
+
+if startup_profile:
+ print(f"{SKY_BLUE}Время запуска (без ожидания ввода):{COLOR_END}")
+ for phase_name, phase_ms in startup_phases:
+  print(f"{SKY_BLUE} {phase_name}: {phase_ms:.1f} мс{COLOR_END}")
+ print(f"{SKY_BLUE} всего: {sum(phase_ms for phase_name, phase_ms in startup_phases):.1f} мс{COLOR_END}")
+
+# время, которое команда ждёт ввода пользователя, не входит в её замер
+builtin_input = input
+input_wait = [0.0]
+
+def input(prompt=""):
+ wait_started = time.perf_counter()
+ try:
+  return builtin_input(prompt)
+ finally:
+  input_wait[0] += time.perf_counter() - wait_started
+
+while True:
+ # о завершённых фоновых задачах сообщается перед следующей командой
+ for finished_job in pop_finished_jobs():
+  if finished_job["status"] == "готово":
+   print(f"{GREEN}[{finished_job['name']}] {finished_job['result'] or 'готово'}{COLOR_END}")
+  elif finished_job["status"] == "отменено":
+   print(f"{YELLOW}[{finished_job['name']}] отменено{COLOR_END}")
+  else:
+   print(f"{RED}[{finished_job['name']}] ошибка: {finished_job['error']}{COLOR_END}")
+
+ # и о закрытых клиентах игры
+ for finished_session in pop_finished_sessions():
+  if finished_session["crashed"]:
+   print(f"{RED}[Minecraft {finished_session['label']}] упал (код {finished_session['exit_code']}) через {format_uptime(session_uptime(finished_session))}{COLOR_END}")
+   if finished_session["crash_line"]:
+    print(f"{RED}{finished_session['crash_line']}{COLOR_END}")
+   print(f"{YELLOW}Лог: {finished_session['log_file']}{COLOR_END}")
+  else:
+   print(f"{GREEN}[Minecraft {finished_session['label']}] закрыт через {format_uptime(session_uptime(finished_session))}{COLOR_END}")
+
+ # глобальный слушитель
+ command = (input(f"{PURPLE}Введите команду: {COLOR_END}"))
+ 
+ # изменённые, новые и удалённые файлы перечитываются, остальные берутся из кеша
+ refresh_command_registry()
+
+ dispatch_started = time.perf_counter()
+ input_wait[0] = 0.0
+ command_modules = command_dispatch.get(command, fallback_modules)
+ registry_stats["dispatch_ms"] = (time.perf_counter() - dispatch_started) * 1000
+
+ for command_module in command_modules:
+  try:
+   exec(command_module["code"], globals(), locals())
+  
+  except Exception as e:
+   print(f"[Ошибка выполнения команды из {command_module['name']}]: {e}")
+
+ # имя и время записываются вместе после выполнения: "реестр" показывает предыдущую команду, а не себя
+ registry_stats["command_ms"] = (time.perf_counter() - dispatch_started - input_wait[0]) * 1000
+ registry_stats["last_command"] = command
+ record_metric("command", command if command in command_dispatch else "(неизвестная команда)", ms=round(registry_stats["command_ms"], 2))
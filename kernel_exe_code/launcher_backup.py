@@ -0,0 +1,190 @@
+# инкрементальные снимки инстансов и config_files
+# каждый уникальный файл хранится один раз в backups/objects (sha256, сжат zlib),
+# снимок - это json со списком файлов. файлы с теми же размером и mtime, что в прошлом снимке,
+# не перечитываются, а сжатие идёт в несколько потоков (zlib отпускает GIL)
+import hashlib
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+BACKUP_CHUNK_SIZE = 1024 * 1024
+BACKUP_WORKERS = os.cpu_count() or 4
+BACKUP_COMPRESS_LEVEL = 6
+
+instance_backup_folders = ["saves", "mods", "config", "resourcepacks"]
+
+
+def backup_object_path(backup_folder, sha256):
+ return Path(backup_folder) / "objects" / sha256[:2] / sha256
+
+
+def file_sha256(path):
+ hasher = hashlib.sha256()
+ with open(path, "rb") as file:
+  while True:
+   chunk = file.read(BACKUP_CHUNK_SIZE)
+   if not chunk:
+    break
+   hasher.update(chunk)
+ return hasher.hexdigest()
+
+
+def compress_to_object(path, object_file):
+ object_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = object_file.with_name(f"{object_file.name}.{threading.get_ident()}.tmp")
+ compressor = zlib.compressobj(BACKUP_COMPRESS_LEVEL)
+ with open(path, "rb") as source_file, open(temp_file, "wb") as out_file:
+  while True:
+   chunk = source_file.read(BACKUP_CHUNK_SIZE)
+   if not chunk:
+    break
+   out_file.write(compressor.compress(chunk))
+  out_file.write(compressor.flush())
+ os.replace(temp_file, object_file)
+ return object_file.stat().st_size
+
+
+def decompress_object(object_file, target):
+ target.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = target.with_name(f"{target.name}.{threading.get_ident()}.restore")
+ decompressor = zlib.decompressobj()
+ with open(object_file, "rb") as source_file, open(temp_file, "wb") as out_file:
+  while True:
+   chunk = source_file.read(BACKUP_CHUNK_SIZE)
+   if not chunk:
+    break
+   out_file.write(decompressor.decompress(chunk))
+  out_file.write(decompressor.flush())
+ os.replace(temp_file, target)
+
+
+def source_files(source_folder, include=None):
+ source_folder = Path(source_folder)
+ roots = [source_folder / folder for folder in include] if include else [source_folder]
+ for root in roots:
+  for folder, _, file_names in os.walk(root):
+   for file_name in file_names:
+    path = Path(folder) / file_name
+    yield path.relative_to(source_folder).as_posix(), path
+
+
+def snapshot_files(backup_folder, source_name):
+ snapshots_folder = Path(backup_folder) / "snapshots" / source_name
+ return sorted(snapshots_folder.glob("*.json")) if snapshots_folder.is_dir() else []
+
+
+def list_snapshots(backup_folder):
+ snapshots_root = Path(backup_folder) / "snapshots"
+ if not snapshots_root.is_dir():
+  return []
+ return [manifest_file for source_folder in sorted(snapshots_root.iterdir()) for manifest_file in snapshot_files(backup_folder, source_folder.name)]
+
+
+def load_snapshot(manifest_file):
+ return json.loads(Path(manifest_file).read_text(encoding="utf-8"))
+
+
+def create_snapshot(backup_folder, source_name, source_folder, include=None, workers=BACKUP_WORKERS):
+ previous_manifests = snapshot_files(backup_folder, source_name)
+ previous_files = load_snapshot(previous_manifests[-1])["files"] if previous_manifests else {}
+ stats = {"files": 0, "hashed": 0, "new_objects": 0, "total_bytes": 0, "stored_bytes": 0, "skipped": []}
+ files = {}
+
+ def process(relative_path, path):
+  # файл, открытый игрой, пропускается и попадает в список skipped
+  try:
+   stat = path.stat()
+   previous = previous_files.get(relative_path)
+   hashed = False
+   if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+    sha256 = previous[2]
+   else:
+    sha256 = file_sha256(path)
+    hashed = True
+   object_file = backup_object_path(backup_folder, sha256)
+   stored_bytes = 0 if object_file.exists() else compress_to_object(path, object_file)
+  except OSError as e:
+   return relative_path, None, False, 0, str(e)
+  return relative_path, [stat.st_size, stat.st_mtime_ns, sha256], hashed, stored_bytes, None
+
+ from concurrent.futures import ThreadPoolExecutor
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  for relative_path, entry, hashed, stored_bytes, error in executor.map(lambda item: process(*item), list(source_files(source_folder, include))):
+   if error:
+    stats["skipped"].append(f"{relative_path}: {error}")
+    continue
+   files[relative_path] = entry
+   stats["files"] += 1
+   stats["hashed"] += hashed
+   stats["new_objects"] += stored_bytes > 0
+   stats["total_bytes"] += entry[0]
+   stats["stored_bytes"] += stored_bytes
+
+ manifest = {"source": source_name, "path": str(source_folder), "include": include, "created": datetime.now().isoformat(timespec="seconds"), "files": files}
+ # микросекунды в имени: снимок перед восстановлением и восстанавливаемый могут появиться в одну секунду
+ manifest_file = Path(backup_folder) / "snapshots" / source_name / f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}.json"
+ manifest_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+ temp_file.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+ os.replace(temp_file, manifest_file)
+ stats["manifest"] = manifest_file
+ return stats
+
+
+def restore_snapshot(backup_folder, manifest_file, target_folder=None, workers=BACKUP_WORKERS):
+ # файлы с совпадающими размером и mtime не трогаются, лишние файлы из папок снимка удаляются
+ manifest = load_snapshot(manifest_file)
+ target_folder = Path(target_folder or manifest["path"])
+ stats = {"restored": 0, "unchanged": 0, "removed": 0}
+
+ def restore(item):
+  relative_path, (size, mtime_ns, sha256) = item
+  target = target_folder / relative_path
+  try:
+   stat = target.stat()
+   if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+    return False
+  except OSError:
+   pass
+  decompress_object(backup_object_path(backup_folder, sha256), target)
+  os.utime(target, ns=(mtime_ns, mtime_ns))
+  return True
+
+ from concurrent.futures import ThreadPoolExecutor
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  for restored in executor.map(restore, manifest["files"].items()):
+   stats["restored" if restored else "unchanged"] += 1
+
+ for relative_path, path in list(source_files(target_folder, manifest.get("include"))):
+  if relative_path not in manifest["files"]:
+   path.unlink()
+   stats["removed"] += 1
+ return stats
+
+
+def prune_snapshots(backup_folder, keep):
+ # у каждого источника остаются keep последних снимков, объекты без ссылок удаляются
+ stats = {"snapshots": 0, "objects": 0, "freed_bytes": 0}
+ snapshots_root = Path(backup_folder) / "snapshots"
+ if snapshots_root.is_dir():
+  for source_folder in snapshots_root.iterdir():
+   manifests = snapshot_files(backup_folder, source_folder.name)
+   for manifest_file in manifests[:max(len(manifests) - keep, 0)]:
+    manifest_file.unlink()
+    stats["snapshots"] += 1
+
+ referenced = set()
+ for manifest_file in list_snapshots(backup_folder):
+  referenced.update(entry[2] for entry in load_snapshot(manifest_file)["files"].values())
+
+ objects_folder = Path(backup_folder) / "objects"
+ if objects_folder.is_dir():
+  for object_file in objects_folder.glob("*/*"):
+   if object_file.name not in referenced:
+    stats["freed_bytes"] += object_file.stat().st_size
+    object_file.unlink()
+    stats["objects"] += 1
+ return stats
@@ -0,0 +1,374 @@
+# пакетный режим без вопросов: установка версий, модлоадеров и джавы и запуск игры из командной строки
+#
+# KERNEL.exe --install-version 1.20.1 --install-modloader "Fabric 1.20.1"
+# KERNEL.exe --install-modloader "Forge 1.20.1 47.3.0" --install-modloader "Quilt 1.20.1"
+# KERNEL.exe --launch --instance pvp --version 1.20.1 --java 21 --account 2 --ram auto
+# KERNEL.exe --batch machines.txt --parallel 4
+# KERNEL.exe --create-instance test-1 --create-instance test-2 --template pack
+# KERNEL.exe --update
+# KERNEL.exe --serve-cache 8770
+#
+# в файле --batch каждая строка - такие же аргументы (кроме --batch), # - комментарий.
+# все операции идут общими задачами лаунчера с общим хранилищем и кешем манифеста:
+# сначала обновление модулей, инстансы и джава, потом установки параллельно, потом запуски,
+# --serve-cache после всего раздаёт файлы лаунчера в локальной сети до Ctrl+C
+import os
+import shlex
+import time
+from pathlib import Path
+
+from launcher_downloads import download_file, DownloadError
+from launcher_versions import get_version_index
+from launcher_install import install_version
+from launcher_installed import get_installed_versions, find_installed_version, bundled_java, game_version_java
+from launcher_store import deduplicate_trees
+from launcher_extract import extract_archive
+from launcher_launch import get_launch_command, start_minecraft
+from launcher_jobs import submit_job, set_job_progress, active_jobs, set_job_limit
+from launcher_processes import running_sessions, pop_finished_sessions, session_uptime, format_uptime, ClientLimitReached
+from launcher_jvm import instance_jvm_arguments
+from launcher_mods import scan_mods_folder, check_mods
+from launcher_clone import clone_instance, valid_instance_name
+from launcher_modloaders import install_modloader, delta_loaders
+from launcher_verify import VerifyError
+from launcher_update import plan_update, apply_update, UpdateError
+from launcher_peer import peer_server, PEER_PORT
+from launcher_metrics import record_metric
+
+instance_subfolders = ["mods", "resourcepacks", "saves", "config", "schematics", "screenshots", "shaderpacks"]
+
+
+def create_instance_folders(instance_path):
+ for subfolder in instance_subfolders:
+  os.makedirs(Path(instance_path) / subfolder, exist_ok=True)
+
+
+def batch_argument_parser(batch_file_line=False):
+ import argparse
+ parser = argparse.ArgumentParser(prog="KERNEL.exe", description="Cobalt Launcher Nano без вопросов: установка и запуск из командной строки и файлов")
+ parser.add_argument("--install-version", action="append", default=[], metavar="ВЕРСИЯ", help="скачать ванильную версию")
+ parser.add_argument("--install-modloader", action="append", default=[], metavar="НАЗВАНИЕ", help="\"Fabric|Quilt|Forge|NeoForge ВЕРСИЯ_ИГРЫ [ВЕРСИЯ_МОДЛОАДЕРА]\" - поверх ванили, иначе сборка из каталога modloader_minecraft.json")
+ parser.add_argument("--install-java", action="store_true", help="скачать недостающие джавы")
+ parser.add_argument("--create-instance", action="append", default=[], metavar="ИНСТАНС", help="создать инстанс")
+ parser.add_argument("--template", metavar="ШАБЛОН", help="создавать инстансы этой строки клоном шаблона из templates")
+ parser.add_argument("--launch", action="store_true", help="запустить игру")
+ parser.add_argument("--instance", default="default", help="инстанс для запуска (создаётся, если его нет)")
+ parser.add_argument("--version", help="установленная версия или модлоадер для запуска")
+ parser.add_argument("--java", help="8, 17, 21 или путь до java (по умолчанию подходящая для версии)")
+ parser.add_argument("--account", help="номер аккаунта из accounts.txt или никнейм")
+ parser.add_argument("--ram", default="auto", help="ГБ под игру или auto - профиль JVM инстанса")
+ parser.add_argument("--jvm-args", help="свои аргументы JVM одной строкой, через =: --jvm-args=\"-Xmx4G -XX:+UseG1GC\"")
+ parser.add_argument("--force", action="store_true", help="запускать несмотря на проблемы с модами")
+ if not batch_file_line:
+  parser.add_argument("--batch", action="append", default=[], metavar="ФАЙЛ", help="файл с операциями, по одной строке аргументов")
+  parser.add_argument("--parallel", type=int, metavar="N", help="сколько установок идёт одновременно")
+  parser.add_argument("--update", action="store_true", help="обновить модули лаунчера и плагины по манифесту")
+  parser.add_argument("--serve-cache", nargs="?", const=PEER_PORT, type=int, metavar="ПОРТ", help=f"раздавать скачанные файлы другим лаунчерам в локальной сети (порт по умолчанию {PEER_PORT})")
+  parser.add_argument("--detach", action="store_true", help="не ждать закрытия игры (лог сессии игра пишет сама, падение замечается, пока лаунчер работает)")
+  parser.add_argument("--profile-startup", action="store_true", help=argparse.SUPPRESS)
+ return parser
+
+
+def parse_batch_arguments(arguments):
+ # возвращает (общие параметры, операции), операции - список (вид, параметры)
+ options = batch_argument_parser().parse_args(arguments)
+ operations = ([("update", None)] if options.update else []) + batch_operations(options)
+ serve_operations = [("serve", options.serve_cache)] if options.serve_cache else []
+ for batch_file in options.batch:
+  line_parser = batch_argument_parser(batch_file_line=True)
+  for line_number, line in enumerate(Path(batch_file).read_text(encoding="utf-8").splitlines(), start=1):
+   line = line.strip()
+   if not line or line.startswith("#"):
+    continue
+   try:
+    line_options = line_parser.parse_args(shlex.split(line, posix=os.name != "nt"))
+   except SystemExit:
+    raise SystemExit(f"{batch_file}:{line_number}: не разобрана строка: {line}")
+   operations += batch_operations(line_options)
+ operations += serve_operations
+ if not operations:
+  batch_argument_parser().error("не задано ни одной операции")
+ return options, operations
+
+
+def batch_operations(options):
+ if options.launch and not options.version:
+  raise SystemExit("--launch требует --version")
+ for name in options.create_instance + [options.instance]:
+  if not valid_instance_name(name):
+   raise SystemExit(f"недопустимое имя инстанса: {name!r} (нужно непустое имя без /, \\ и ..)")
+ operations = [("instance", (name, options.template)) for name in options.create_instance]
+ if options.install_java:
+  operations.append(("java", None))
+ operations += [("vanilla", version_id) for version_id in options.install_version]
+ operations += [("modloader", name) for name in options.install_modloader]
+ if options.launch:
+  operations.append(("launch", options))
+ return operations
+
+
+def install_vanilla_batch_job(job, version_id, context, version_index):
+ minecraft_folder = Path(context["root_folder"]) / "minecraft_vanilla"
+ install_stats = install_version(version_id, minecraft_folder, version_index, store_folder=context["store_folder"], cache_folder=context["cache_folder"], progress=lambda stats: set_job_progress(job, f"{stats['done']}/{stats['files']}"))
+ get_installed_versions(context["root_folder"], context["cache_folder"])
+ return f"скачано файлов {install_stats['done'] - install_stats['from_store']} из {install_stats['files']}, из хранилища {install_stats['from_store']}"
+
+
+def install_modloader_batch_job(job, modloader, context):
+ modloader_folder = Path(context["root_folder"]) / "modloader_minecraft"
+ target_version_folder = modloader_folder / modloader["name"]
+ modloader_zip_file = modloader_folder / f"temp_{modloader['name']}.zip"
+ set_job_progress(job, "скачивание")
+ download_file(modloader["download_url"], modloader_zip_file, modloader.get("sha256"))
+ set_job_progress(job, "распаковка")
+ extract_started = time.perf_counter()
+ extract_stats = extract_archive(modloader_zip_file, target_version_folder, keep_extra=True, progress=lambda done, total: set_job_progress(job, f"распаковка {done}/{total}"))
+ modloader_zip_file.unlink()
+ record_metric("extract", modloader["name"], ms=round((time.perf_counter() - extract_started) * 1000, 1), bytes=extract_stats["bytes"], files=extract_stats["files"])
+ set_job_progress(job, "объединение с хранилищем")
+ deduplicate_trees([target_version_folder], context["store_folder"])
+ get_installed_versions(context["root_folder"], context["cache_folder"])
+ unverified_note = "" if modloader.get("sha256") else ", без проверки sha256: в каталоге нет хеша архива"
+ return f"распаковано файлов {extract_stats['extracted']}, без изменений {extract_stats['reused']}{unverified_note}"
+
+
+def install_delta_modloader_batch_job(job, loader, game_version, loader_version, context, version_index):
+ java_choice = bundled_java(game_version_java(game_version))
+ java_exe = context["java_folders"][java_choice] / f"java_{java_choice}" / "bin" / ("java.exe" if os.name == "nt" else "java")
+ # процессорам forge нужна джава, которая может ещё ставиться соседней задачей
+ if loader in ("forge", "neoforge"):
+  while active_jobs("java"):
+   set_job_progress(job, "ожидание джавы")
+   time.sleep(0.5)
+ install_stats = install_modloader(loader, game_version, loader_version, Path(context["root_folder"]) / "minecraft_vanilla", context["cache_folder"], version_index, java_exe, context["store_folder"], progress=lambda stats: set_job_progress(job, stats.get("processor") and f"процессоры {stats['processor']}" or f"{stats['done']}/{stats['missing']}"))
+ get_installed_versions(context["root_folder"], context["cache_folder"])
+ return f"{install_stats['id']}: скачано файлов {install_stats['done'] - install_stats['from_store']} из {install_stats['files']} ({install_stats['bytes'] / 1048576:.1f} МБ), из хранилища {install_stats['from_store']}"
+
+
+def wait_for_jobs(submitted_jobs):
+ # ход задач раз в 5 секунд, итог каждой - как только она закончилась. возвращает число неудачных
+ failed = 0
+ reported = set()
+ last_report = time.monotonic()
+ while True:
+  for job in submitted_jobs:
+   if job["finished"] is None or id(job) in reported:
+    continue
+   reported.add(id(job))
+   if job["status"] == "готово":
+    print(f"[{job['name']}] готово: {job['result']}", flush=True)
+   else:
+    failed += 1
+    print(f"[{job['name']}] {job['status']}: {job['error'] or ''}", flush=True)
+  if len(reported) == len(submitted_jobs):
+   return failed
+  if time.monotonic() - last_report >= 5:
+   last_report = time.monotonic()
+   for job in submitted_jobs:
+    if job["finished"] is None:
+     print(f"[{job['name']}] {job['status']} {job['progress']}", flush=True)
+  time.sleep(0.2)
+
+
+def resolve_account(account, accounts_file):
+ if not account:
+  return "Player"
+ if account.isdigit():
+  try:
+   accounts = [line.strip() for line in Path(accounts_file).read_text(encoding="utf-8").splitlines() if line.strip()]
+  except OSError:
+   accounts = []
+  if not 0 < int(account) <= len(accounts):
+   raise ValueError(f"нет аккаунта с номером {account}")
+  return accounts[int(account) - 1]
+ return account
+
+
+def launch_batch(options, context):
+ # возвращает сессию игры или None, причина неудачи печатается
+ installed_entry = find_installed_version(get_installed_versions(context["root_folder"], context["cache_folder"]), options.version)
+ if not installed_entry:
+  print(f"[запуск {options.version}] версия не установлена")
+  return None
+
+ instance_path = Path(context["instances_folder"]) / options.instance
+ create_instance_folders(instance_path)
+ java_folders = context["java_folders"]
+ java_choice = options.java or bundled_java(installed_entry["java"])
+ if java_choice in java_folders:
+  java_exe = java_folders[java_choice] / f"java_{java_choice}" / "bin" / ("java.exe" if os.name == "nt" else "java")
+ else:
+  java_exe = Path(java_choice)
+
+ modded = installed_entry["kind"] == "modloader"
+ instance_mods = []
+ if modded:
+  instance_mods, _ = scan_mods_folder(instance_path / "mods", context["cache_folder"])
+  mods_problems = check_mods(instance_mods, installed_entry["loader"], installed_entry["game_version"])
+  for mods_problem in mods_problems:
+   print(f"[запуск {options.version}] {mods_problem}")
+  if mods_problems and not options.force:
+   print(f"[запуск {options.version}] не запущено из-за проблем с модами, --force - запустить всё равно")
+   return None
+
+ if options.jvm_args:
+  jvm_arguments = options.jvm_args.split()
+ elif options.ram and options.ram != "auto":
+  jvm_arguments = [f"-Xmx{options.ram}G", "-Xms4G" if modded else "-Xms2G"]
+ else:
+  jvm_arguments, jvm_description, _ = instance_jvm_arguments(context["jvm_profiles_file"], options.instance, java_exe, int(java_choice) if java_choice.isdigit() else None, modded, len(instance_mods))
+  print(f"[запуск {options.version}] JVM: {jvm_description}")
+
+ try:
+  username = resolve_account(options.account, context["accounts_file"])
+ except ValueError as e:
+  print(f"[запуск {options.version}] {e}")
+  return None
+
+ launch_options = {
+  "username": username,
+  "uuid": "",
+  "token": "",
+  "executablePath": str(java_exe),
+  "jvmArguments": jvm_arguments,
+  "enableLoggingConfig": False,
+  "gameDirectory": str(instance_path),
+ }
+ try:
+  launch_command, _ = get_launch_command(options.version, installed_entry["minecraft_folder"], launch_options, context["cache_folder"], f"{options.version} ({options.instance})")
+ except (VerifyError, DownloadError) as e:
+  print(f"[запуск {options.version}] не запущено: {e}")
+  return None
+ try:
+  session = start_minecraft(launch_command)
+ except (ClientLimitReached, OSError) as e:
+  print(f"[запуск {options.version}] не запущено: {e}")
+  return None
+ print(f"[запуск {options.version}] pid {session['pid']}, инстанс {options.instance}, лог {session['log_file']}", flush=True)
+ return session
+
+
+def run_batch(options, operations, context):
+ # context - пути и функции ядра: root_folder, cache_folder, store_folder, instances_folder, accounts_file,
+ # jvm_profiles_file, java_folders, java_runtimes, install_java_job, read_catalog, fetch_update_manifest, start_peer_server.
+ # возвращает код выхода
+ started = time.perf_counter()
+ failed = 0
+ if options.parallel:
+  set_job_limit("install", options.parallel)
+  set_job_limit("download", options.parallel)
+
+ # новые модули подхватит уже следующий запуск лаунчера, пакетный режим их не выполняет
+ if any(kind == "update" for kind, _ in operations):
+  try:
+   update_plan = plan_update(context["fetch_update_manifest"](), context["root_folder"])
+   update_stats = apply_update(update_plan, context["root_folder"])
+   print(f"[обновление] версия {update_stats['version'] or '?'}: обновлено файлов {update_stats['downloaded']}, удалено {update_stats['removed']}, без изменений {update_plan['unchanged']}", flush=True)
+  except (UpdateError, DownloadError, ValueError) as e:
+   print(f"[обновление] не выполнено: {e}", flush=True)
+   failed += 1
+
+ for kind, name in operations:
+  if kind == "instance":
+   instance_name, template = name
+   instance_path = Path(context["instances_folder"]) / instance_name
+   if template and not instance_path.exists():
+    try:
+     clone_stats = clone_instance(Path(context["root_folder"]) / "templates" / template, instance_path)
+    except OSError as e:
+     print(f"[инстанс {instance_name}] не создан из шаблона {template}: {e}")
+     failed += 1
+     continue
+    print(f"[инстанс {instance_name}] из шаблона {template}: файлов {clone_stats['files']}, скопировано {clone_stats['copied_bytes'] / 1048576:.1f} МБ")
+   create_instance_folders(instance_path)
+   print(f"[инстанс {instance_name}] готов")
+
+ # "Fabric 1.20.1 0.15.11" ставится поверх ванили, остальные названия ищутся в каталоге
+ delta_modloaders = []
+ modloader_names = []
+ for kind, name in operations:
+  if kind == "modloader":
+   name_parts = name.split()
+   if len(name_parts) in (2, 3) and name_parts[0].lower() in delta_loaders:
+    delta_modloaders.append((name_parts[0].lower(), name_parts[1], name_parts[2] if len(name_parts) == 3 else None))
+   else:
+    modloader_names.append(name)
+
+ # джава нужна для --install-java, запусков и процессоров forge
+ submitted_jobs = []
+ if any(kind == "java" or kind == "launch" and (name.java is None or name.java in context["java_folders"]) for kind, name in operations) or any(loader in ("forge", "neoforge") for loader, _, _ in delta_modloaders):
+  missing_java_runtimes = [runtime for runtime in context["java_runtimes"] if not runtime["folder"].is_dir()]
+  if missing_java_runtimes:
+   submitted_jobs.append(submit_job("Установка джавы", "java", context["install_java_job"], missing_java_runtimes))
+
+ vanilla_versions = [name for kind, name in operations if kind == "vanilla"]
+ version_index = None
+ if vanilla_versions or delta_modloaders:
+  try:
+   version_index, _ = get_version_index(context["cache_folder"])
+  except DownloadError as e:
+   # без манифеста модлоадер встанет только поверх уже установленной ванили
+   print(f"[версии] не удалось получить список версий: {e}")
+   failed += len(vanilla_versions)
+   vanilla_versions = []
+  # ваниль под модлоадером ставится его же задачей, чтобы две задачи не качали одни файлы
+  delta_game_versions = {game_version for _, game_version, _ in delta_modloaders}
+  for version_id in dict.fromkeys(vanilla_versions):
+   if version_id not in delta_game_versions:
+    submitted_jobs.append(submit_job(f"Установка {version_id}", "install", install_vanilla_batch_job, version_id, context, version_index))
+  for loader, game_version, loader_version in dict.fromkeys(delta_modloaders):
+   submitted_jobs.append(submit_job(f"Установка {delta_loaders[loader]} {game_version}", "install", install_delta_modloader_batch_job, loader, game_version, loader_version, context, version_index))
+
+ if modloader_names:
+  import json
+  try:
+   modloader_catalog = {modloader["name"].lower(): modloader for modloader in json.loads(context["read_catalog"]("modloader_minecraft.json"))}
+  except DownloadError as e:
+   print(f"[модлоадеры] не удалось получить каталог модлоадеров: {e}")
+   modloader_catalog = {}
+  for modloader_name in dict.fromkeys(modloader_names):
+   modloader = modloader_catalog.get(modloader_name.lower())
+   if not modloader or not modloader.get("download_url"):
+    print(f"[модлоадер {modloader_name}] нет в каталоге modloader_minecraft.json")
+    failed += 1
+    continue
+   submitted_jobs.append(submit_job(f"Установка {modloader['name']}", "install", install_modloader_batch_job, modloader, context))
+
+ failed += wait_for_jobs(submitted_jobs)
+
+ sessions = []
+ for kind, launch_options in operations:
+  if kind != "launch":
+   continue
+  session = launch_batch(launch_options, context)
+  if session is None:
+   failed += 1
+  else:
+   sessions.append(session)
+
+ print(f"[итог] операций {len(operations)}, неудачных {failed}, {time.perf_counter() - started:.1f} с", flush=True)
+
+ # лаунчер остаётся наблюдать за клиентами, пока они не закроются (вывод игры пишется в логи сессий)
+ if sessions and not options.detach:
+  while running_sessions():
+   time.sleep(1)
+  for finished_session in pop_finished_sessions():
+   state = "упал" if finished_session["crashed"] else "закрыт"
+   print(f"[Minecraft {finished_session['label']}] {state} (код {finished_session['exit_code']}) через {format_uptime(session_uptime(finished_session))}")
+   failed += finished_session["crashed"]
+
+ if options.serve_cache:
+  try:
+   peer_address = context["start_peer_server"](options.serve_cache)
+  except OSError as e:
+   print(f"[кеш сети] порт {options.serve_cache} занят или недоступен: {e}", flush=True)
+   return 1
+  print(f"[кеш сети] раздаю файлы на {peer_address}, остановка - Ctrl+C", flush=True)
+  try:
+   while True:
+    time.sleep(1)
+  except KeyboardInterrupt:
+   # поток сервера фоновый и закроется вместе с лаунчером
+   peer_stats = peer_server["stats"]
+   print(f"[кеш сети] остановлен: запросов {peer_stats['requests']}, из хранилища {peer_stats['store']}, из кеша {peer_stats['cache']}, скачано для сети {peer_stats['fetched']}, отдано {peer_stats['bytes'] / 1048576:.1f} МБ", flush=True)
+ return 1 if failed else 0
@@ -0,0 +1,146 @@
+# клонирование инстансов и шаблоны
+# файлы клона сначала пробуют встать reflink'ом (btrfs, xfs, apfs): данные общие, пока одну из копий не изменят.
+# без reflink неизменяемые файлы (моды, ресурспаки, шейдеры, схемы) ставятся жёсткими ссылками,
+# а изменяемые данные (config, saves, options.txt и прочее) копируются целиком, чтобы клоны не портили друг друга
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from launcher_extract import member_parts
+
+CLONE_WORKERS = 8
+
+# игра и лаунчеры заменяют эти файлы целиком и никогда не дописывают их на месте
+immutable_clone_folders = {"mods", "resourcepacks", "shaderpacks", "schematics"}
+# этого в клон не переносим
+skipped_clone_folders = {"logs", "crash-reports", "screenshots", ".fabric", ".cache"}
+
+# ioctl FICLONE из linux/fs.h
+FICLONE = 0x40049409
+reflink_errors = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EPERM}
+
+
+def reflink_file(source, target):
+ # True - файл склонирован, False - файловая система так не умеет (target тогда не создаётся)
+ if sys.platform.startswith("linux"):
+  import fcntl
+  with open(source, "rb") as source_file, open(target, "wb") as target_file:
+   try:
+    fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+    cloned = True
+   except OSError as e:
+    if e.errno not in reflink_errors:
+     raise
+    cloned = False
+  if not cloned:
+   os.unlink(target)
+  else:
+   shutil.copystat(source, target)
+  return cloned
+
+ if sys.platform == "darwin":
+  import ctypes
+  libc = ctypes.CDLL(None, use_errno=True)
+  if not hasattr(libc, "clonefile"):
+   return False
+  libc.clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+  if libc.clonefile(os.fsencode(source), os.fsencode(target), 0) == 0:
+   return True
+  if ctypes.get_errno() not in reflink_errors:
+   raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), str(target))
+  return False
+
+ # на windows (ReFS) клонирование блоков не используем
+ return False
+
+
+def clone_plan(source_folder):
+ # [(относительный путь, неизменяемый ли файл)]
+ source_folder = Path(source_folder)
+ plan = []
+ for folder, dir_names, file_names in os.walk(source_folder):
+  relative_folder = Path(folder).relative_to(source_folder)
+  if relative_folder == Path("."):
+   dir_names[:] = [dir_name for dir_name in dir_names if dir_name not in skipped_clone_folders]
+  immutable = bool(relative_folder.parts) and relative_folder.parts[0] in immutable_clone_folders
+  for file_name in file_names:
+   plan.append((relative_folder / file_name, immutable))
+ return plan
+
+
+def valid_instance_name(name):
+ # название инстанса или шаблона становится папкой: непустое, без разделителей пути, .. и дисков
+ return member_parts(name) == [name]
+
+
+def clone_instance(source_folder, target_folder, workers=CLONE_WORKERS, progress=None):
+ # возвращает {"files", "reflinked", "linked", "copied", "bytes", "copied_bytes"}.
+ # клон собирается в .<имя>.clone и появляется под своим именем только целиком
+ from concurrent.futures import ThreadPoolExecutor, as_completed
+ source_folder = Path(source_folder)
+ target_folder = Path(target_folder)
+ if not source_folder.is_dir():
+  raise FileNotFoundError(f"нет папки {source_folder.name}")
+ if target_folder.exists():
+  raise FileExistsError(f"{target_folder.name} уже существует")
+ staging_folder = target_folder.with_name(f".{target_folder.name}.clone")
+ if staging_folder.exists():
+  shutil.rmtree(staging_folder)
+
+ plan = clone_plan(source_folder)
+ stats = {"files": len(plan), "reflinked": 0, "linked": 0, "copied": 0, "bytes": 0, "copied_bytes": 0}
+ # после первого отказа reflink больше не пробуем: файловая система одна на весь клон
+ reflink_supported = [True]
+
+ def clone_file(relative_path, immutable):
+  source = source_folder / relative_path
+  target = staging_folder / relative_path
+  target.parent.mkdir(parents=True, exist_ok=True)
+  size = source.stat().st_size
+  if reflink_supported[0]:
+   if reflink_file(source, target):
+    return "reflinked", size
+   reflink_supported[0] = False
+  if immutable:
+   try:
+    os.link(source, target)
+    return "linked", size
+   except OSError:
+    pass
+  shutil.copy2(source, target)
+  return "copied", size
+
+ staging_folder.mkdir(parents=True)
+ try:
+  # пустые папки инстанса (saves, config...) тоже должны быть в клоне
+  for folder, dir_names, _ in os.walk(source_folder):
+   relative_folder = Path(folder).relative_to(source_folder)
+   if relative_folder == Path("."):
+    dir_names[:] = [dir_name for dir_name in dir_names if dir_name not in skipped_clone_folders]
+   (staging_folder / relative_folder).mkdir(parents=True, exist_ok=True)
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+   futures = [executor.submit(clone_file, relative_path, immutable) for relative_path, immutable in plan]
+   for done, future in enumerate(as_completed(futures), start=1):
+    method, size = future.result()
+    stats[method] += 1
+    stats["bytes"] += size
+    if method == "copied":
+     stats["copied_bytes"] += size
+    if progress:
+     progress(done, len(plan))
+ except BaseException:
+  shutil.rmtree(staging_folder, ignore_errors=True)
+  raise
+
+ os.replace(staging_folder, target_folder)
+ return stats
+
+
+def list_templates(templates_folder):
+ templates_folder = Path(templates_folder)
+ if not templates_folder.is_dir():
+  return []
+ return sorted(folder for folder in templates_folder.iterdir() if folder.is_dir() and not folder.name.startswith("."))
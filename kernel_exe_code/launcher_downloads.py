@@ -0,0 +1,417 @@
+# движок загрузок лаунчера
+# файлы качаются потоком кусками в .part рядом с целью, оборванная загрузка докачивается через Range,
+# после загрузки сверяется sha256 и .part атомарно переименовывается в готовый файл.
+# если задан кеш соседа в локальной сети (launcher_peer), файл сначала спрашивается у него
+# urllib.request и http.client тянут за собой ssl и email, а hashlib - openssl, поэтому они импортируются
+# при первой загрузке, а не при старте лаунчера
+import json
+import os
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+from launcher_metrics import record_metric
+
+USER_AGENT = "Mozilla"
+CHUNK_SIZE = 256 * 1024
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_TIMEOUT = 60
+
+
+class DownloadError(Exception):
+ pass
+
+
+# кеш соседа: при недоступности после PEER_FAILURES ошибок подряд он пропускается PEER_RETRY_SECONDS секунд
+PEER_FAILURES = 3
+PEER_RETRY_SECONDS = 60
+peer_cache = {"url": "", "failures": 0, "down_until": 0.0, "served": 0, "failed": 0}
+peer_lock = threading.Lock()
+
+
+def configure_peer_cache(url):
+ with peer_lock:
+  peer_cache.update(url=(url or "").rstrip("/"), failures=0, down_until=0.0)
+
+
+def peer_url(url, sha1=None):
+ # адрес файла у соседа или None, если сосед не задан или недавно не отвечал.
+ # сосед сам качает то, чего у него нет, а чего не может - перенаправляет на исходный адрес
+ if not peer_cache["url"] or time.monotonic() < peer_cache["down_until"] or url.startswith(peer_cache["url"]):
+  return None
+ query = {"url": url}
+ if sha1:
+  query["sha1"] = sha1
+ return f"{peer_cache['url']}/get?{urllib.parse.urlencode(query)}"
+
+
+def peer_result(ok):
+ with peer_lock:
+  if ok:
+   peer_cache["served"] += 1
+   peer_cache["failures"] = 0
+   return
+  peer_cache["failed"] += 1
+  peer_cache["failures"] += 1
+  if peer_cache["failures"] >= PEER_FAILURES:
+   peer_cache["failures"] = 0
+   peer_cache["down_until"] = time.monotonic() + PEER_RETRY_SECONDS
+
+
+def read_sha256_file(url):
+ # файл вида "<sha256>  java_8.zip" рядом с архивом, None - его нет или он не читается
+ import urllib.request
+ import urllib.error
+ request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+ try:
+  with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+   text = response.read(1024).decode("utf-8", "replace").strip()
+ except (urllib.error.URLError, OSError):
+  return None
+ sha256 = text.split()[0].lower() if text else ""
+ if len(sha256) != 64:
+  return None
+ return sha256
+
+
+def hash_existing_part(part_file):
+ import hashlib
+ hasher = hashlib.sha256()
+ with open(part_file, "rb") as file:
+  while True:
+   chunk = file.read(CHUNK_SIZE)
+   if not chunk:
+    break
+   hasher.update(chunk)
+ return hasher
+
+
+# у download_file имя .part постоянное, на нём держится докачка после перезапуска лаунчера,
+# поэтому загрузки в один и тот же файл (плагин в очереди дважды, починка джавы во время установки) идут по очереди
+target_locks = {}
+target_locks_lock = threading.Lock()
+
+
+def download_file(url, target, sha256=None, progress=None, retries=DOWNLOAD_RETRIES, use_peer=True):
+ with target_locks_lock:
+  target_lock = target_locks.setdefault(os.path.abspath(target), threading.Lock())
+ with target_lock:
+  return download_file_unlocked(url, target, sha256, progress, retries, use_peer)
+
+
+def download_file_unlocked(url, target, sha256=None, progress=None, retries=DOWNLOAD_RETRIES, use_peer=True):
+ import urllib.request
+ import urllib.error
+ import hashlib
+ from_peer = use_peer and peer_url(url)
+ if from_peer:
+  try:
+   file_sha256 = download_file_unlocked(from_peer, target, sha256, progress, retries=0, use_peer=False)
+   peer_result(True)
+   return file_sha256
+  except DownloadError:
+   peer_result(False)
+   # оборванное у соседа не докачивается с исходного адреса: без sha256 склейку старых и новых байт не заметить
+   Path(target).with_name(Path(target).name + ".part").unlink(missing_ok=True)
+ target = Path(target)
+ target.parent.mkdir(parents=True, exist_ok=True)
+ part_file = target.with_name(target.name + ".part")
+ last_error = None
+ started = time.perf_counter()
+ received = 0
+
+ for attempt in range(retries + 1):
+  downloaded = part_file.stat().st_size if part_file.exists() else 0
+  hasher = hash_existing_part(part_file) if downloaded else hashlib.sha256()
+  headers = {"User-Agent": USER_AGENT}
+  if downloaded:
+   headers["Range"] = f"bytes={downloaded}-"
+
+  try:
+   request = urllib.request.Request(url, headers=headers)
+   with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+    # сервер не умеет Range и отдал файл целиком - начинаем заново
+    if downloaded and response.status != 206:
+     downloaded = 0
+     hasher = hashlib.sha256()
+    content_length = response.headers.get("Content-Length")
+    total = downloaded + int(content_length) if content_length else None
+
+    with open(part_file, "ab" if downloaded else "wb") as out_file:
+     while True:
+      chunk = response.read(CHUNK_SIZE)
+      if not chunk:
+       break
+      out_file.write(chunk)
+      hasher.update(chunk)
+      downloaded += len(chunk)
+      received += len(chunk)
+      if progress:
+       progress(downloaded, total)
+
+   if total is not None and downloaded < total:
+    raise DownloadError(f"соединение оборвалось на {downloaded} из {total} байт")
+
+  except urllib.error.HTTPError as e:
+   # 416 - в .part мусор или файл на сервере сменился, качаем с нуля
+   if e.code == 416 and part_file.exists():
+    part_file.unlink()
+    last_error = e
+    continue
+   if e.code < 500:
+    raise DownloadError(f"{url}: HTTP {e.code}") from e
+   last_error = e
+   time.sleep(min(2 ** attempt, 10) if attempt < retries else 0)
+   continue
+
+  except (urllib.error.URLError, OSError, DownloadError) as e:
+   last_error = e
+   time.sleep(min(2 ** attempt, 10) if attempt < retries else 0)
+   continue
+
+  file_sha256 = hasher.hexdigest()
+  if sha256 and file_sha256 != sha256.lower():
+   part_file.unlink()
+   raise DownloadError(f"{target.name}: sha256 не совпадает ({file_sha256} вместо {sha256})")
+
+  os.replace(part_file, target)
+  record_metric("download", target.name, bytes=received, ms=round((time.perf_counter() - started) * 1000, 1), attempts=attempt + 1)
+  return file_sha256
+
+ raise DownloadError(f"{url}: {last_error}")
+
+
+def download_files(jobs, workers=4, progress=None, on_complete=None):
+ # jobs - список словарей {"name", "url", "target", "sha256" или "sha256_url"}.
+ # после загрузки в job["verified"] - был ли известен sha256 (у релизов на GitHub файла .sha256 может не быть)
+ # progress(states) получает {name: (скачано, всего)} не чаще раза в 0.2 секунды
+ states = {job["name"]: (0, None) for job in jobs}
+ states_lock = threading.Lock()
+ last_report = [0.0]
+
+ def report(name, downloaded, total):
+  with states_lock:
+   states[name] = (downloaded, total)
+   now = time.monotonic()
+   if progress and (now - last_report[0] >= 0.2 or (total is not None and downloaded >= total)):
+    last_report[0] = now
+    progress(dict(states))
+
+ def run_job(job):
+  sha256 = job.get("sha256")
+  if not sha256 and job.get("sha256_url"):
+   sha256 = read_sha256_file(job["sha256_url"])
+  job["verified"] = bool(sha256)
+  file_sha256 = download_file(job["url"], job["target"], sha256, lambda downloaded, total: report(job["name"], downloaded, total))
+  if on_complete:
+   on_complete(job)
+  return file_sha256
+
+ results = {}
+ from concurrent.futures import ThreadPoolExecutor
+ with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+  futures = {job["name"]: executor.submit(run_job, job) for job in jobs}
+  for name, future in futures.items():
+   try:
+    results[name] = future.result()
+   except Exception as e:
+    results[name] = e
+ return results
+
+
+def format_download_progress(states):
+ parts = []
+ for name, (downloaded, total) in states.items():
+  if total:
+   parts.append(f"{name}: {downloaded * 100 // total}%")
+  else:
+   parts.append(f"{name}: {downloaded / 1048576:.1f} МБ")
+ return " | ".join(parts)
+
+
+def read_cache_meta(cache_file):
+ meta_file = Path(cache_file).with_name(Path(cache_file).name + ".meta.json")
+ if not Path(cache_file).exists() or not meta_file.exists():
+  return {}
+ try:
+  return json.loads(meta_file.read_text(encoding="utf-8"))
+ except ValueError:
+  return {}
+
+
+def fetch_cached(url, cache_file, ttl=3600, timeout=15):
+ # кеш с ревалидацией: пока ttl не вышел отдаётся локальная копия без сети,
+ # потом запрос с If-None-Match/If-Modified-Since, без сети - последняя сохранённая копия
+ # возвращает (данные, источник): "cache", "revalidated", "network" или "offline"
+ import urllib.request
+ import urllib.error
+ cache_file = Path(cache_file)
+ meta_file = cache_file.with_name(cache_file.name + ".meta.json")
+ meta = read_cache_meta(cache_file)
+
+ if meta and time.time() - meta.get("checked_at", 0) < ttl:
+  return cache_file.read_bytes(), "cache"
+
+ headers = {"User-Agent": USER_AGENT}
+ if meta.get("etag"):
+  headers["If-None-Match"] = meta["etag"]
+ if meta.get("last_modified"):
+  headers["If-Modified-Since"] = meta["last_modified"]
+
+ started = time.perf_counter()
+ try:
+  request = urllib.request.Request(url, headers=headers)
+  with urllib.request.urlopen(request, timeout=timeout) as response:
+   data = response.read()
+   meta = {"url": url, "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"), "checked_at": time.time()}
+  cache_file.parent.mkdir(parents=True, exist_ok=True)
+  temp_file = cache_file.with_name(cache_file.name + ".tmp")
+  temp_file.write_bytes(data)
+  os.replace(temp_file, cache_file)
+  source = "network"
+ except urllib.error.HTTPError as e:
+  if not cache_file.exists():
+   raise DownloadError(f"{url}: HTTP {e.code}") from e
+  if e.code != 304:
+   return cache_file.read_bytes(), "offline"
+  data = cache_file.read_bytes()
+  meta["checked_at"] = time.time()
+  source = "revalidated"
+ except (urllib.error.URLError, OSError) as e:
+  if not cache_file.exists():
+   raise DownloadError(f"{url}: {e}") from e
+  return cache_file.read_bytes(), "offline"
+
+ meta_file.write_text(json.dumps(meta), encoding="utf-8")
+ record_metric("catalog", cache_file.name, source=source, bytes=len(data) if source == "network" else 0, ms=round((time.perf_counter() - started) * 1000, 1))
+ return data, source
+
+
+CATALOG_TTL = 3600
+
+background_refreshes = set()
+background_lock = threading.Lock()
+
+
+def refresh_in_background(url, cache_file, ttl=CATALOG_TTL):
+ # одна фоновая ревалидация на файл, ошибки сети не мешают - останется старая копия
+ with background_lock:
+  if str(cache_file) in background_refreshes:
+   return
+  background_refreshes.add(str(cache_file))
+
+ def refresh():
+  try:
+   fetch_cached(url, cache_file, ttl)
+  except DownloadError:
+   pass
+  finally:
+   with background_lock:
+    background_refreshes.discard(str(cache_file))
+
+ threading.Thread(target=refresh, daemon=True).start()
+
+
+def read_catalog(url, cache_file, ttl=CATALOG_TTL):
+ # сохранённая копия отдаётся сразу, даже устаревшая, а обновление уходит в фон.
+ # по сети с ожиданием качаем только если копии ещё нет
+ cache_file = Path(cache_file)
+ if cache_file.exists():
+  if time.time() - read_cache_meta(cache_file).get("checked_at", 0) >= ttl:
+   refresh_in_background(url, cache_file, ttl)
+  return cache_file.read_bytes(), "cache"
+ return fetch_cached(url, cache_file, ttl)
+
+
+# пул keep-alive соединений: у каждого потока своё соединение на хост,
+# поэтому тысячи мелких файлов качаются без нового TCP и TLS рукопожатия на каждый
+connection_pool = threading.local()
+
+
+def pooled_connection(scheme, host):
+ import http.client
+ connections = connection_pool.__dict__.setdefault("connections", {})
+ connection = connections.get((scheme, host))
+ if connection is None:
+  connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+  connection = connection_class(host, timeout=DOWNLOAD_TIMEOUT)
+  connections[(scheme, host)] = connection
+ return connection
+
+
+def drop_pooled_connection(scheme, host):
+ connections = connection_pool.__dict__.setdefault("connections", {})
+ connection = connections.pop((scheme, host), None)
+ if connection is not None:
+  connection.close()
+
+
+def pooled_download(url, target, sha1=None, size=None, retries=DOWNLOAD_RETRIES, redirects=5, use_peer=True):
+ # возвращает количество скачанных байт, файл проверяется по size и sha1 если они известны
+ import http.client
+ import hashlib
+ from_peer = use_peer and peer_url(url, sha1)
+ if from_peer:
+  try:
+   downloaded = pooled_download(from_peer, target, sha1, size, retries=0, redirects=redirects, use_peer=False)
+   peer_result(True)
+   return downloaded
+  except DownloadError:
+   peer_result(False)
+ target = Path(target)
+ target.parent.mkdir(parents=True, exist_ok=True)
+ # у каждого потока свой .part: две задачи установки могут одновременно качать одну библиотеку
+ part_file = target.with_name(f"{target.name}.{threading.get_ident()}.part")
+ last_error = None
+
+ for attempt in range(retries + 1):
+  parsed_url = urllib.parse.urlsplit(url)
+  request_path = parsed_url.path + (f"?{parsed_url.query}" if parsed_url.query else "")
+  connection = pooled_connection(parsed_url.scheme, parsed_url.netloc)
+  try:
+   connection.request("GET", request_path, headers={"User-Agent": USER_AGENT, "Connection": "keep-alive"})
+   response = connection.getresponse()
+
+   if response.status in (301, 302, 303, 307, 308) and redirects:
+    response.read()
+    location = urllib.parse.urljoin(url, response.headers.get("Location", ""))
+    return pooled_download(location, target, sha1, size, retries, redirects - 1, use_peer=False)
+
+   if response.status != 200:
+    response.read()
+    if response.status < 500:
+     raise DownloadError(f"{url}: HTTP {response.status}")
+    raise OSError(f"HTTP {response.status}")
+
+   hasher = hashlib.sha1()
+   downloaded = 0
+   with open(part_file, "wb") as out_file:
+    while True:
+     chunk = response.read(CHUNK_SIZE)
+     if not chunk:
+      break
+     out_file.write(chunk)
+     hasher.update(chunk)
+     downloaded += len(chunk)
+
+   if response.will_close:
+    drop_pooled_connection(parsed_url.scheme, parsed_url.netloc)
+   if size is not None and downloaded != size:
+    raise OSError(f"размер {downloaded} вместо {size}")
+   if sha1 and hasher.hexdigest() != sha1.lower():
+    raise OSError(f"sha1 {hasher.hexdigest()} вместо {sha1}")
+
+   os.replace(part_file, target)
+   return downloaded
+
+  except (http.client.HTTPException, OSError) as e:
+   # соединение могло закрыться на стороне сервера - открываем новое и пробуем ещё раз
+   drop_pooled_connection(parsed_url.scheme, parsed_url.netloc)
+   last_error = e
+   if attempt < retries:
+    time.sleep(min(2 ** attempt, 10) / 4)
+
+ if part_file.exists():
+  part_file.unlink()
+ raise DownloadError(f"{url}: {last_error}")
@@ -0,0 +1,164 @@
+# распаковка архивов джавы и модлоадеров
+# файлы архива распаковываются несколькими потоками (у каждого потока свой ZipFile) кусками по 1 МБ
+# в соседнюю папку .<имя>.staging, которая потом переименовывается в целевую. поэтому недораспакованная
+# джава или модлоадер никогда не выглядит установленной. при переустановке файлы, у которых совпали
+# размер и CRC32 с архивом, не распаковываются заново, а переносятся жёсткой ссылкой.
+# размеры и CRC32 файлов архива остаются в папке в EXTRACT_MANIFEST, по ним launcher_verify проверяет распакованное
+import json
+import os
+import shutil
+import threading
+import zlib
+from pathlib import Path
+
+EXTRACT_WORKERS = 8
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+EXTRACT_MANIFEST = ".archive_files.json"
+
+
+def member_parts(member_name):
+ # части пути внутри архива, None для абсолютных путей и выхода за папку через ..
+ parts = [part for part in member_name.replace("\\", "/").split("/") if part not in ("", ".")]
+ if not parts or ".." in parts or ":" in parts[0]:
+  return None
+ return parts
+
+
+def file_crc32(path):
+ crc = 0
+ with open(path, "rb") as file:
+  while True:
+   chunk = file.read(EXTRACT_CHUNK_SIZE)
+   if not chunk:
+    break
+   crc = zlib.crc32(chunk, crc)
+ return crc
+
+
+def link_or_copy(source, target):
+ try:
+  os.link(source, target)
+ except OSError:
+  shutil.copy2(source, target)
+
+
+def staging_folders(target_folder):
+ target_folder = Path(target_folder)
+ return target_folder.with_name(f".{target_folder.name}.staging"), target_folder.with_name(f".{target_folder.name}.old")
+
+
+def recover_extraction(target_folder):
+ # прерванная замена: старая папка уже отодвинута, а новая ещё не встала на место - возвращаем старую
+ target_folder = Path(target_folder)
+ staging_folder, old_folder = staging_folders(target_folder)
+ if old_folder.is_dir() and not target_folder.exists():
+  os.replace(old_folder, target_folder)
+ for leftover_folder in (staging_folder, old_folder):
+  if leftover_folder.exists():
+   shutil.rmtree(leftover_folder, ignore_errors=True)
+
+
+def extract_archive(archive, target_folder, workers=EXTRACT_WORKERS, keep_extra=False, progress=None):
+ # возвращает {"files", "extracted", "reused", "bytes"}, bytes - распакованный размер архива.
+ # keep_extra оставляет файлы, которых нет в архиве (natives и т.п. в папке модлоадера),
+ # progress(готово, всего) вызывается после каждого файла
+ import zipfile
+ from concurrent.futures import ThreadPoolExecutor, as_completed
+ target_folder = Path(target_folder)
+ staging_folder, old_folder = staging_folders(target_folder)
+ recover_extraction(target_folder)
+
+ members = []
+ directories = set()
+ with zipfile.ZipFile(archive) as zip_file:
+  for info in zip_file.infolist():
+   parts = member_parts(info.filename)
+   if parts is None:
+    raise zipfile.BadZipFile(f"недопустимый путь в архиве: {info.filename}")
+   if info.is_dir():
+    directories.add(Path(*parts))
+   else:
+    members.append((info, Path(*parts)))
+ # большие файлы первыми, чтобы в конце потоки не ждали один длинный файл
+ members.sort(key=lambda member: -member[0].file_size)
+
+ stats = {"files": len(members), "extracted": 0, "reused": 0, "bytes": sum(info.file_size for info, _ in members)}
+ thread_archives = threading.local()
+ opened_archives = []
+ opened_lock = threading.Lock()
+
+ def place_member(member):
+  info, relative_path = member
+  staged_file = staging_folder / relative_path
+  staged_file.parent.mkdir(parents=True, exist_ok=True)
+  existing_file = target_folder / relative_path
+  try:
+   existing_size = existing_file.stat().st_size
+  except OSError:
+   existing_size = None
+  if existing_size == info.file_size and file_crc32(existing_file) == info.CRC:
+   link_or_copy(existing_file, staged_file)
+   return False
+
+  if not hasattr(thread_archives, "zip_file"):
+   thread_archives.zip_file = zipfile.ZipFile(archive)
+   with opened_lock:
+    opened_archives.append(thread_archives.zip_file)
+  # ZipExtFile сам сверяет CRC в конце чтения, битый файл даёт BadZipFile
+  with thread_archives.zip_file.open(info) as source, open(staged_file, "wb") as out_file:
+   shutil.copyfileobj(source, out_file, EXTRACT_CHUNK_SIZE)
+  # права на запуск (bin/java в архивах для linux и mac)
+  mode = info.external_attr >> 16
+  if os.name != "nt" and mode & 0o111:
+   os.chmod(staged_file, mode & 0o777)
+  return True
+
+ if staging_folder.exists():
+  shutil.rmtree(staging_folder)
+ staging_folder.mkdir(parents=True)
+ try:
+  for directory in directories:
+   (staging_folder / directory).mkdir(parents=True, exist_ok=True)
+
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+   futures = [executor.submit(place_member, member) for member in members]
+   try:
+    for done, future in enumerate(as_completed(futures), start=1):
+     if future.result():
+      stats["extracted"] += 1
+     else:
+      stats["reused"] += 1
+     if progress:
+      progress(done, len(members))
+   except BaseException:
+    for future in futures:
+     future.cancel()
+    raise
+
+  if keep_extra and target_folder.is_dir():
+   for folder, _, file_names in os.walk(target_folder):
+    for file_name in file_names:
+     existing_file = Path(folder) / file_name
+     staged_file = staging_folder / existing_file.relative_to(target_folder)
+     if not staged_file.exists():
+      staged_file.parent.mkdir(parents=True, exist_ok=True)
+      link_or_copy(existing_file, staged_file)
+
+  # через временный файл: старый список мог попасть в staging жёсткой ссылкой вместе с keep_extra
+  manifest_file = staging_folder / EXTRACT_MANIFEST
+  manifest_temp = manifest_file.with_name(EXTRACT_MANIFEST + ".tmp")
+  manifest_temp.write_text(json.dumps({relative_path.as_posix(): [info.file_size, info.CRC] for info, relative_path in members}), encoding="utf-8")
+  os.replace(manifest_temp, manifest_file)
+ except BaseException:
+  shutil.rmtree(staging_folder, ignore_errors=True)
+  raise
+ finally:
+  for opened_archive in opened_archives:
+   opened_archive.close()
+
+ # замена папки: старая отодвигается, новая встаёт на её место, старая удаляется
+ if target_folder.exists():
+  os.replace(target_folder, old_folder)
+ os.replace(staging_folder, target_folder)
+ shutil.rmtree(old_folder, ignore_errors=True)
+ return stats
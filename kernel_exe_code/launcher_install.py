@@ -0,0 +1,214 @@
+# быстрый установщик версий майнкрафта
+# сам разбирает json версии и индекс ассетов, а недостающие файлы качает пулом потоков
+# через keep-alive соединения. раскладка папок такая же как у minecraft_launcher_lib,
+# поэтому запуск через get_minecraft_command работает без изменений
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+from launcher_downloads import pooled_download, DownloadError
+from launcher_metrics import record_metric
+from launcher_store import restore_from_store, store_file
+
+LIBRARIES_URL = "https://libraries.minecraft.net"
+ASSETS_URL = "https://resources.download.minecraft.net"
+INSTALL_WORKERS = 16
+
+
+def current_os_name():
+ return {"win32": "windows", "darwin": "osx"}.get(sys.platform, "linux")
+
+
+def rules_allow(rules):
+ # правила библиотек: последнее подходящее правило решает, без правил - разрешено
+ if not rules:
+  return True
+ os_name = current_os_name()
+ is_32bit = sys.maxsize <= 2 ** 32
+ allowed = False
+ for rule in rules:
+  if rule.get("features"):
+   continue
+  os_rule = rule.get("os", {})
+  if os_rule.get("name") and os_rule["name"] != os_name:
+   continue
+  if os_rule.get("arch") and (os_rule["arch"] == "x86") != is_32bit:
+   continue
+  allowed = rule.get("action") == "allow"
+ return allowed
+
+
+def maven_path(name):
+ # group:artifact:version[:classifier][@ext] -> group/artifact/version/artifact-version[-classifier].ext
+ name, _, extension = name.partition("@")
+ parts = name.split(":")
+ group, artifact, version = parts[0], parts[1], parts[2]
+ classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+ return f"{group.replace('.', '/')}/{artifact}/{version}/{artifact}-{version}{classifier}.{extension or 'jar'}"
+
+
+def library_files(library, minecraft_folder):
+ files = []
+ if not rules_allow(library.get("rules")):
+  return files
+
+ downloads = library.get("downloads", {})
+ artifact = downloads.get("artifact")
+ if artifact and artifact.get("url") and artifact.get("path"):
+  files.append({"url": artifact["url"], "path": minecraft_folder / "libraries" / artifact["path"], "sha1": artifact.get("sha1"), "size": artifact.get("size")})
+ elif not downloads and library.get("name", "").count(":") >= 2:
+  library_path = maven_path(library["name"])
+  files.append({"url": f"{library.get('url', LIBRARIES_URL).rstrip('/')}/{library_path}", "path": minecraft_folder / "libraries" / library_path, "sha1": library.get("sha1"), "size": library.get("size")})
+
+ classifier = library.get("natives", {}).get(current_os_name())
+ if classifier:
+  classifier = classifier.replace("${arch}", "32" if sys.maxsize <= 2 ** 32 else "64")
+  native = downloads.get("classifiers", {}).get(classifier)
+  if native:
+   files.append({"url": native["url"], "path": minecraft_folder / "libraries" / native["path"], "sha1": native.get("sha1"), "size": native.get("size"), "extract": library.get("extract", {"exclude": []})})
+ return files
+
+
+def file_is_present(file):
+ # быстрая проверка по размеру, полная сверка хешей - отдельная задача
+ path = file["path"]
+ if not path.is_file():
+  return False
+ return file.get("size") is None or path.stat().st_size == file["size"]
+
+
+def download_missing(files, workers, progress=None, store_folder=None):
+ # одинаковые пути (ассеты с общим хешем) качаются один раз
+ unique_files = list({str(file["path"]): file for file in files}.values())
+ missing_files = [file for file in unique_files if not file_is_present(file)]
+ stats = {"files": len(unique_files), "missing": len(missing_files), "done": 0, "bytes": 0, "from_store": 0, "started": time.perf_counter()}
+ stats_lock = threading.Lock()
+ last_report = [0.0]
+
+ def fetch(file):
+  # файл, который уже есть в общем хранилище, ставится ссылкой без загрузки
+  from_store = bool(store_folder and file.get("sha1") and restore_from_store(store_folder, file["sha1"], file["path"]))
+  downloaded = 0
+  if not from_store:
+   downloaded = pooled_download(file["url"], file["path"], file.get("sha1"), file.get("size"))
+   if store_folder and file.get("sha1"):
+    store_file(store_folder, file["path"], file["sha1"])
+  with stats_lock:
+   stats["done"] += 1
+   stats["from_store"] += from_store
+   stats["bytes"] += downloaded
+   now = time.perf_counter()
+   if progress and (now - last_report[0] >= 0.2 or stats["done"] == stats["missing"]):
+    last_report[0] = now
+    progress(dict(stats))
+
+ errors = []
+ if missing_files:
+  from concurrent.futures import ThreadPoolExecutor
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+   futures = [executor.submit(fetch, file) for file in missing_files]
+   for future in futures:
+    try:
+     future.result()
+    except DownloadError as e:
+     errors.append(e)
+    except Exception:
+     # прерывание (например, отмена фоновой задачи): оставшиеся файлы не качаются
+     for pending_future in futures:
+      pending_future.cancel()
+     raise
+ if errors:
+  raise DownloadError(f"не скачано файлов: {len(errors)}, первая ошибка: {errors[0]}")
+ # fetched - скачанные и взятые из хранилища файлы, они уже сверены с sha1
+ stats["fetched"] = missing_files
+ stats["seconds"] = time.perf_counter() - stats["started"]
+ return stats
+
+
+def extract_natives(jar_file, natives_folder, exclude):
+ import zipfile
+ with zipfile.ZipFile(jar_file) as jar:
+  for member in jar.namelist():
+   if member.endswith("/") or any(member.startswith(prefix) for prefix in exclude):
+    continue
+   jar.extract(member, natives_folder)
+
+
+def load_version_json(version_id, minecraft_folder, version_index=None):
+ version_file = minecraft_folder / "versions" / version_id / f"{version_id}.json"
+ if not version_file.is_file():
+  manifest_version = (version_index or {}).get("by_id", {}).get(version_id)
+  if not manifest_version:
+   raise DownloadError(f"версия {version_id} не найдена в манифесте")
+  pooled_download(manifest_version["url"], version_file, manifest_version.get("sha1"))
+ return json.loads(version_file.read_text(encoding="utf-8"))
+
+
+def version_files(version_id, version_data, minecraft_folder):
+ # файлы самой версии без родителя из inheritsFrom: клиент, библиотеки, конфиг логов и ассеты.
+ # индекс ассетов скачивается, если его ещё нет
+ files = []
+ client = version_data.get("downloads", {}).get("client")
+ if client:
+  files.append({"url": client["url"], "path": minecraft_folder / "versions" / version_id / f"{version_id}.jar", "sha1": client.get("sha1"), "size": client.get("size")})
+
+ for library in version_data.get("libraries", []):
+  files.extend(library_files(library, minecraft_folder))
+
+ logging_file = version_data.get("logging", {}).get("client", {}).get("file")
+ if logging_file:
+  files.append({"url": logging_file["url"], "path": minecraft_folder / "assets" / "log_configs" / logging_file["id"], "sha1": logging_file.get("sha1"), "size": logging_file.get("size")})
+
+ asset_index = version_data.get("assetIndex")
+ if asset_index:
+  asset_index_file = minecraft_folder / "assets" / "indexes" / f"{version_data.get('assets', asset_index['id'])}.json"
+  asset_index_entry = {"url": asset_index["url"], "path": asset_index_file, "sha1": asset_index.get("sha1"), "size": asset_index.get("size")}
+  if not file_is_present(asset_index_entry):
+   pooled_download(asset_index["url"], asset_index_file, asset_index.get("sha1"), asset_index.get("size"))
+   # индекс скачан здесь, мимо download_missing, и тоже уже сверен с sha1
+   asset_index_entry["fetched"] = True
+  files.append(asset_index_entry)
+  asset_objects = json.loads(asset_index_file.read_text(encoding="utf-8")).get("objects", {})
+  for asset in asset_objects.values():
+   asset_hash = asset["hash"]
+   files.append({"url": f"{ASSETS_URL}/{asset_hash[:2]}/{asset_hash}", "path": minecraft_folder / "assets" / "objects" / asset_hash[:2] / asset_hash, "sha1": asset_hash, "size": asset.get("size")})
+ return files
+
+
+def install_version(version_id, minecraft_folder, version_index=None, workers=INSTALL_WORKERS, progress=None, store_folder=None, cache_folder=None):
+ minecraft_folder = Path(minecraft_folder)
+ version_data = load_version_json(version_id, minecraft_folder, version_index)
+
+ # модлоадеры наследуют библиотеки и ассеты от ванильной версии
+ parent_stats = None
+ if version_data.get("inheritsFrom"):
+  parent_stats = install_version(version_data["inheritsFrom"], minecraft_folder, version_index, workers, progress, store_folder, cache_folder)
+
+ files = version_files(version_id, version_data, minecraft_folder)
+ stats = download_missing(files, workers, progress, store_folder)
+ record_metric("install", version_id, files=stats["files"], missing=stats["missing"], from_store=stats["from_store"], bytes=stats["bytes"], ms=round(stats["seconds"] * 1000, 1))
+
+ natives_folder = minecraft_folder / "versions" / version_id / "natives"
+ extract_started = time.perf_counter()
+ natives = [file for file in files if "extract" in file]
+ for file in natives:
+  extract_natives(file["path"], natives_folder, file["extract"].get("exclude", []))
+ if natives:
+  record_metric("extract", f"natives {version_id}", files=len(natives), ms=round((time.perf_counter() - extract_started) * 1000, 1))
+
+ # штампы проверки в cache_folder: первый запуск не будет заново хешировать только что скачанную версию
+ if cache_folder:
+  from launcher_verify import remember_install
+  remember_install(version_id, minecraft_folder, cache_folder, stats["fetched"] + [file for file in files if file.get("fetched")])
+
+ if parent_stats:
+  for key in ("files", "missing", "done", "bytes", "from_store", "seconds"):
+   stats[key] += parent_stats[key]
+ return stats
+
+
+def format_install_progress(stats):
+ elapsed = max(time.perf_counter() - stats["started"], 0.001)
+ return f"Файлов: {stats['done']}/{stats['missing']}, {stats['bytes'] / 1048576:.1f} МБ, {stats['bytes'] / 1048576 / elapsed:.1f} МБ/с"
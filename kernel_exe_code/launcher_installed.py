@@ -0,0 +1,182 @@
+# индекс установленных версий (ваниль и модлоадеры)
+# хранится в cache/installed_versions.json вместе с mtime папок, при запуске перечитываются
+# только папки, у которых mtime поменялся, поэтому обход modloader_minecraft целиком больше не нужен
+import json
+import os
+import re
+from pathlib import Path
+
+# внутри этих папок версий не бывает, обход их пропускает
+skipped_folders = {"libraries", "assets", "natives", "mods", "saves", "resourcepacks", "shaderpacks", "config", "logs", "screenshots", "runtime"}
+
+loader_libraries = [
+ ("net.fabricmc:fabric-loader", "fabric"),
+ ("org.quiltmc:quilt-loader", "quilt"),
+ ("net.neoforged", "neoforge"),
+ ("net.minecraftforge", "forge"),
+ ("com.mumfrey:liteloader", "liteloader"),
+ ("optifine", "optifine"),
+]
+
+installed_indexes = {}
+
+
+def folder_mtime(folder):
+ try:
+  return os.stat(folder).st_mtime_ns
+ except OSError:
+  return None
+
+
+def game_version_java(game_version):
+ # 1.17 - 1.20.4 идут на 17, с 1.20.5 и новые номера вида 26.1 нужна 21, старее 1.17 - 8
+ numbers = [int(number) for number in re.findall(r"\d+", game_version or "")[:3]]
+ if not numbers:
+  return 21
+ if numbers[0] != 1:
+  return 21 if numbers[0] > 1 else 8
+ minor = numbers[1] if len(numbers) > 1 else 0
+ patch = numbers[2] if len(numbers) > 2 else 0
+ if minor < 17:
+  return 8
+ if (minor, patch) < (20, 5):
+  return 17
+ return 21
+
+
+def bundled_java(java):
+ # ближайшая из джав, которые ставит лаунчер
+ if java <= 8:
+  return "8"
+ if java <= 17:
+  return "17"
+ return "21"
+
+
+def read_version_entry(version_folder, kind, bundle):
+ version_file = version_folder / f"{version_folder.name}.json"
+ try:
+  version_data = json.loads(version_file.read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return None
+
+ library_names = " ".join(library.get("name", "") for library in version_data.get("libraries", [])).lower()
+ loader = "vanilla"
+ for library_prefix, loader_name in loader_libraries:
+  if library_prefix in library_names:
+   loader = loader_name
+   break
+ if loader == "vanilla" and version_data.get("inheritsFrom"):
+  loader = "modloader"
+ # модлоадер, поставленный поверх ванили (launcher_modloaders), лежит в minecraft_vanilla рядом с ней
+ if kind == "vanilla" and loader != "vanilla":
+  kind = "modloader"
+
+ game_version = version_data.get("inheritsFrom") or version_data.get("jar") or version_data.get("id", version_folder.name)
+ if loader != "vanilla" and not version_data.get("inheritsFrom"):
+  # старые forge и liteloader без inheritsFrom: версия игры в начале id
+  match = re.match(r"\d+\.\d+(\.\d+)?", version_folder.name)
+  game_version = match.group(0) if match else game_version
+
+ java = version_data.get("javaVersion", {}).get("majorVersion")
+ if not java and version_data.get("inheritsFrom"):
+  parent_file = version_folder.parent / game_version / f"{game_version}.json"
+  try:
+   java = json.loads(parent_file.read_text(encoding="utf-8")).get("javaVersion", {}).get("majorVersion")
+  except (OSError, ValueError):
+   java = None
+
+ return {
+  "id": version_folder.name,
+  "kind": kind,
+  "bundle": bundle,
+  "loader": loader,
+  "game_version": game_version,
+  "java": java or game_version_java(game_version),
+  "minecraft_folder": str(version_folder.parent.parent),
+  "json_mtime": folder_mtime(version_file),
+ }
+
+
+def find_versions_folders(bundle_folder):
+ found = []
+ for folder, dir_names, _ in os.walk(bundle_folder):
+  if "versions" in dir_names:
+   found.append(str(Path(folder) / "versions"))
+  dir_names[:] = [dir_name for dir_name in dir_names if dir_name not in skipped_folders and dir_name != "versions"]
+ return found
+
+
+def scan_versions_folder(versions_folder, kind, bundle, cached):
+ mtime = folder_mtime(versions_folder)
+ if cached and cached["mtime"] == mtime:
+  return cached, False
+
+ old_versions = cached["versions"] if cached else {}
+ versions = {}
+ if mtime is not None:
+  for version_folder in Path(versions_folder).iterdir():
+   if not version_folder.is_dir():
+    continue
+   old_entry = old_versions.get(version_folder.name)
+   if old_entry and old_entry["json_mtime"] == folder_mtime(version_folder / f"{version_folder.name}.json"):
+    versions[version_folder.name] = old_entry
+    continue
+   entry = read_version_entry(version_folder, kind, bundle)
+   if entry:
+    versions[version_folder.name] = entry
+ return {"mtime": mtime, "kind": kind, "bundle": bundle, "versions": versions}, True
+
+
+def get_installed_versions(root_folder, cache_folder):
+ index_file = Path(cache_folder) / "installed_versions.json"
+ index = installed_indexes.get(str(index_file))
+ if index is None:
+  try:
+   index = json.loads(index_file.read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+   index = {"modloader_mtime": None, "bundles": {}, "folders": {}}
+ changed = False
+
+ # список сборок модлоадеров перечитывается только если поменялась папка modloader_minecraft
+ modloader_folder = Path(root_folder) / "modloader_minecraft"
+ modloader_mtime = folder_mtime(modloader_folder)
+ if modloader_mtime != index["modloader_mtime"]:
+  bundle_names = [folder.name for folder in modloader_folder.iterdir() if folder.is_dir()] if modloader_mtime is not None else []
+  index["bundles"] = {name: index["bundles"].get(name, {"mtime": None, "versions_folders": []}) for name in bundle_names}
+  index["modloader_mtime"] = modloader_mtime
+  changed = True
+
+ for bundle_name, bundle in index["bundles"].items():
+  bundle_mtime = folder_mtime(modloader_folder / bundle_name)
+  if bundle_mtime != bundle["mtime"]:
+   bundle["versions_folders"] = find_versions_folders(modloader_folder / bundle_name)
+   bundle["mtime"] = bundle_mtime
+   changed = True
+
+ tracked_folders = [(str(Path(root_folder) / "minecraft_vanilla" / "versions"), "vanilla", "")]
+ for bundle_name, bundle in index["bundles"].items():
+  tracked_folders += [(versions_folder, "modloader", bundle_name) for versions_folder in bundle["versions_folders"]]
+
+ folders = {}
+ for versions_folder, kind, bundle_name in tracked_folders:
+  folders[versions_folder], folder_changed = scan_versions_folder(versions_folder, kind, bundle_name, index["folders"].get(versions_folder))
+  changed = changed or folder_changed
+ changed = changed or set(folders) != set(index["folders"])
+ index["folders"] = folders
+
+ if changed:
+  index_file.parent.mkdir(parents=True, exist_ok=True)
+  temp_file = index_file.with_name("installed_versions.json.tmp")
+  temp_file.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+  os.replace(temp_file, index_file)
+ installed_indexes[str(index_file)] = index
+
+ return [entry for folder in folders.values() for entry in sorted(folder["versions"].values(), key=lambda entry: entry["id"])]
+
+
+def find_installed_version(installed_versions, version_id, kind=None):
+ for entry in installed_versions:
+  if entry["id"] == version_id and (kind is None or entry["kind"] == kind):
+   return entry
+ return None
@@ -0,0 +1,98 @@
+# фоновые задачи лаунчера
+# долгие операции (джава, установка версий и модлоадеров, плагины) идут в отдельных потоках,
+# а строка ввода остаётся свободной. число одновременных задач ограничено по видам
+import threading
+import time
+
+job_limits = {"java": 1, "install": 2, "download": 3}
+job_semaphores = {kind: threading.Semaphore(limit) for kind, limit in job_limits.items()}
+
+jobs = []
+jobs_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+ pass
+
+
+def set_job_limit(kind, limit):
+ # новый лимит действует для задач, отправленных после вызова
+ job_limits[kind] = max(1, limit)
+ job_semaphores[kind] = threading.Semaphore(job_limits[kind])
+
+
+def set_job_progress(job, text):
+ # каждый отчёт о прогрессе - точка, где задача может быть отменена
+ job["progress"] = text
+ if job["cancel"].is_set():
+  raise JobCancelled(job["name"])
+
+
+def check_job_cancelled(job):
+ if job["cancel"].is_set():
+  raise JobCancelled(job["name"])
+
+
+def run_job(job, function, args):
+ semaphore = job_semaphores.get(job["kind"])
+ acquired = False
+ # пока задача ждёт своей очереди, её можно отменить
+ while semaphore and not acquired and not job["cancel"].is_set():
+  acquired = semaphore.acquire(timeout=0.2)
+ try:
+  if job["cancel"].is_set():
+   raise JobCancelled(job["name"])
+  job["status"] = "выполняется"
+  job["started"] = time.time()
+  job["result"] = function(job, *args)
+  job["status"] = "готово"
+ except JobCancelled:
+  job["status"] = "отменено"
+ except Exception as e:
+  job["status"] = "ошибка"
+  job["error"] = str(e)
+ finally:
+  if acquired:
+   semaphore.release()
+  job["finished"] = time.time()
+
+
+def submit_job(name, kind, function, *args):
+ # function(job, *args) получает словарь задачи для set_job_progress и возвращает итоговое сообщение
+ job = {"name": name, "kind": kind, "status": "в очереди", "progress": "", "result": None, "error": None, "created": time.time(), "started": None, "finished": None, "reported": False, "cancel": threading.Event()}
+ with jobs_lock:
+  jobs.append(job)
+ job["thread"] = threading.Thread(target=run_job, args=(job, function, args), daemon=True)
+ job["thread"].start()
+ return job
+
+
+def cancel_job(job):
+ job["cancel"].set()
+
+
+def active_jobs(kind=None):
+ with jobs_lock:
+  return [job for job in jobs if job["finished"] is None and (kind is None or job["kind"] == kind)]
+
+
+def list_jobs():
+ with jobs_lock:
+  return list(jobs)
+
+
+def pop_finished_jobs():
+ # завершённые задачи, о которых ещё не сообщали пользователю
+ finished = []
+ with jobs_lock:
+  for job in jobs:
+   if job["finished"] is not None and not job["reported"]:
+    job["reported"] = True
+    finished.append(job)
+ return finished
+
+
+def job_elapsed(job):
+ if not job["started"]:
+  return 0.0
+ return (job["finished"] or time.time()) - job["started"]
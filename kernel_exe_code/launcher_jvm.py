@@ -0,0 +1,160 @@
+# автоматический подбор аргументов JVM
+# размер кучи, сборщик мусора и его флаги выбираются по объёму и свободной памяти, числу ядер,
+# версии выбранной джавы и числу модов. результат сохраняется профилем инстанса в config_files/jvm_profiles.json,
+# свой набор аргументов пользователя (ручной профиль) авто подбор не перезаписывает
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+GIGABYTE = 1024 ** 3
+# сколько памяти всегда оставлять системе и самой JVM (метаспейс, потоки, нативные буферы)
+SYSTEM_RESERVE_BYTES = 2 * GIGABYTE
+MIN_HEAP_BYTES = 2 * GIGABYTE
+MAX_HEAP_BYTES = 12 * GIGABYTE
+# с таким объёмом ОЗУ и числом ядер у ZGC хватает места под свои структуры и потоки
+ZGC_MIN_TOTAL_BYTES = 12 * GIGABYTE
+ZGC_MIN_CPUS = 4
+
+g1_flags = [
+ "-XX:+UseG1GC",
+ "-XX:+ParallelRefProcEnabled",
+ "-XX:MaxGCPauseMillis=50",
+ "-XX:+UnlockExperimentalVMOptions",
+ "-XX:G1NewSizePercent=30",
+ "-XX:G1MaxNewSizePercent=40",
+ "-XX:G1ReservePercent=20",
+ "-XX:InitiatingHeapOccupancyPercent=15",
+ "-XX:+DisableExplicitGC",
+ "-XX:+PerfDisableSharedMem",
+]
+
+
+def system_memory():
+ # (всего, доступно) в байтах или None, если узнать нельзя
+ if sys.platform.startswith("linux"):
+  try:
+   meminfo = dict(re.findall(r"(\w+):\s+(\d+)", Path("/proc/meminfo").read_text()))
+   return int(meminfo["MemTotal"]) * 1024, int(meminfo.get("MemAvailable", meminfo["MemFree"])) * 1024
+  except (OSError, KeyError):
+   return None
+
+ if os.name == "nt":
+  import ctypes
+
+  class MemoryStatus(ctypes.Structure):
+   _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong), ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong), ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong), ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong), ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+
+  status = MemoryStatus()
+  status.dwLength = ctypes.sizeof(status)
+  if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+   return None
+  return status.ullTotalPhys, status.ullAvailPhys
+
+ try:
+  total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+ except (ValueError, OSError, AttributeError):
+  return None
+ return total, total // 2
+
+
+def java_major_version(java_exe):
+ # версия из файла release рядом с bin, без запуска java. 1.8.0_392 -> 8, 17.0.9 -> 17
+ java_home = Path(java_exe).parent.parent
+ try:
+  release = (java_home / "release").read_text(encoding="utf-8", errors="replace")
+ except OSError:
+  return None
+ match = re.search(r'JAVA_VERSION="(\d+)(?:\.(\d+))?', release)
+ if not match:
+  return None
+ major = int(match.group(1))
+ if major == 1 and match.group(2):
+  major = int(match.group(2))
+ return major
+
+
+def tune_jvm(java_major, modded, mod_count=0, memory=None, cpu_count=None):
+ # возвращает (аргументы, описание выбора)
+ memory = memory or system_memory()
+ cpu_count = cpu_count or os.cpu_count() or 2
+
+ # сколько нужно игре: ваниле 3 ГБ, модам 4 ГБ и ещё 1 ГБ на каждые 100 модов
+ wanted = 4 * GIGABYTE + mod_count // 100 * GIGABYTE if modded else 3 * GIGABYTE
+ if memory:
+  total, available = memory
+  # не больше половины ОЗУ и не больше того, что сейчас свободно за вычетом запаса
+  limit = min(total // 2, total - SYSTEM_RESERVE_BYTES, available - SYSTEM_RESERVE_BYTES // 2)
+ else:
+  total = available = None
+  limit = wanted
+ heap = max(MIN_HEAP_BYTES, min(wanted, limit, MAX_HEAP_BYTES))
+ # кратно 512 МБ
+ heap_mb = heap // (512 * 1024 * 1024) * 512
+
+ # Xms = Xmx: куча не перестраивается во время игры, из-за этого и бывают фризы при росте
+ arguments = [f"-Xmx{heap_mb}M", f"-Xms{heap_mb}M"]
+ use_zgc = bool(java_major and java_major >= 21 and cpu_count >= ZGC_MIN_CPUS and total and total >= ZGC_MIN_TOTAL_BYTES)
+ if use_zgc:
+  arguments += ["-XX:+UseZGC", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]
+  # в 21 и 22 поколенческий режим включается флагом, с 23 он единственный
+  if java_major < 23:
+   arguments.append("-XX:+ZGenerational")
+  gc_name = "ZGC (поколенческий)"
+ else:
+  arguments += g1_flags
+  arguments.append("-XX:G1HeapRegionSize=16M" if heap_mb >= 8192 else "-XX:G1HeapRegionSize=8M")
+  # на слабых процессорах фоновая сборка не должна забирать ядра у игры
+  if cpu_count <= 4:
+   arguments.append(f"-XX:ConcGCThreads={max(1, cpu_count // 4)}")
+  gc_name = "G1"
+
+ details = [f"джава {java_major or '?'}", f"ядер {cpu_count}"]
+ if total:
+  details.insert(0, f"ОЗУ {total / GIGABYTE:.1f} ГБ, свободно {available / GIGABYTE:.1f} ГБ")
+ if modded:
+  details.append(f"модов {mod_count}")
+ return arguments, f"куча {heap_mb / 1024:g} ГБ, {gc_name} ({', '.join(details)})"
+
+
+def load_jvm_profiles(profiles_file):
+ try:
+  return json.loads(Path(profiles_file).read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return {}
+
+
+def write_jvm_profiles(profiles_file, profiles):
+ profiles_file = Path(profiles_file)
+ profiles_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = profiles_file.with_name(profiles_file.name + ".tmp")
+ temp_file.write_text(json.dumps(profiles, ensure_ascii=False, indent=1), encoding="utf-8")
+ os.replace(temp_file, profiles_file)
+
+
+def save_jvm_profile(profiles_file, instance, mode, arguments, description=""):
+ # mode: auto - подобрано лаунчером и пересчитывается при каждом запуске, manual - аргументы пользователя
+ profiles = load_jvm_profiles(profiles_file)
+ profiles[instance] = {"mode": mode, "arguments": arguments, "description": description}
+ write_jvm_profiles(profiles_file, profiles)
+
+
+def delete_jvm_profile(profiles_file, instance):
+ profiles = load_jvm_profiles(profiles_file)
+ if profiles.pop(instance, None) is None:
+  return False
+ write_jvm_profiles(profiles_file, profiles)
+ return True
+
+
+def instance_jvm_arguments(profiles_file, instance, java_exe, java_hint=None, modded=False, mod_count=0):
+ # аргументы для запуска инстанса: ручной профиль как есть, иначе свежий авто подбор, который сохраняется в профиль.
+ # возвращает (аргументы, описание, режим)
+ profile = load_jvm_profiles(profiles_file).get(instance)
+ if profile and profile.get("mode") == "manual" and profile.get("arguments"):
+  return profile["arguments"], profile.get("description") or "свой профиль", "manual"
+ java_major = java_major_version(java_exe) or java_hint
+ arguments, description = tune_jvm(java_major, modded, mod_count)
+ save_jvm_profile(profiles_file, instance, "auto", arguments, description)
+ return arguments, description, "auto"
@@ -0,0 +1,131 @@
+# кеш планов запуска
+# get_minecraft_command каждый раз разбирает json версии с наследованием и собирает classpath,
+# поэтому готовая команда сохраняется по ключу (версия, папка, инстанс, джава, аргументы)
+# и используется повторно, пока не поменялись json версий и файлы из classpath
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from launcher_metrics import record_metric
+from launcher_processes import start_game
+from launcher_verify import verify_before_launch
+
+MAX_LAUNCH_PLANS = 50
+
+launch_plans = {}
+# когда начался разбор последнего запуска, чтобы замерить время до старта процесса,
+# и что запускается - для сессии в launcher_processes
+launch_timer = {"started": None, "label": "", "version": "", "instance": ""}
+
+
+def plan_key(version, minecraft_folder, options):
+ key_data = json.dumps([version, str(minecraft_folder), options], sort_keys=True, ensure_ascii=False)
+ return hashlib.sha1(key_data.encode("utf-8")).hexdigest()
+
+
+def file_stamp(path):
+ try:
+  stat = os.stat(path)
+ except OSError:
+  return None
+ return [stat.st_size, stat.st_mtime_ns]
+
+
+def version_json_chain(version, minecraft_folder):
+ chain = []
+ while version:
+  version_file = Path(minecraft_folder) / "versions" / version / f"{version}.json"
+  chain.append(str(version_file))
+  try:
+   version = json.loads(version_file.read_text(encoding="utf-8")).get("inheritsFrom")
+  except (OSError, ValueError):
+   break
+ return chain
+
+
+def plan_dependencies(version, minecraft_folder, launch_command):
+ dependencies = version_json_chain(version, minecraft_folder)
+ if "-cp" in launch_command:
+  classpath = launch_command[launch_command.index("-cp") + 1]
+  dependencies += [path for path in classpath.split(os.pathsep) if path]
+ return {path: file_stamp(path) for path in dependencies}
+
+
+def plan_is_fresh(plan):
+ return all(file_stamp(path) == stamp for path, stamp in plan["dependencies"].items())
+
+
+def load_launch_plans(cache_folder):
+ plans_file = Path(cache_folder) / "launch_plans.json"
+ if str(plans_file) not in launch_plans:
+  try:
+   launch_plans[str(plans_file)] = json.loads(plans_file.read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+   launch_plans[str(plans_file)] = {"plans": {}, "last": None}
+ return launch_plans[str(plans_file)]
+
+
+def save_launch_plans(cache_folder):
+ plans_file = Path(cache_folder) / "launch_plans.json"
+ plans_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = plans_file.with_name("launch_plans.json.tmp")
+ temp_file.write_text(json.dumps(load_launch_plans(cache_folder), ensure_ascii=False), encoding="utf-8")
+ os.replace(temp_file, plans_file)
+
+
+def get_launch_command(version, minecraft_folder, options, cache_folder, label=""):
+ # возвращает (команда, взята ли она из кеша), план запоминается как последний для перезапуска
+ started = time.perf_counter()
+ verify_before_launch(version, minecraft_folder, options.get("executablePath"), cache_folder)
+ plans = load_launch_plans(cache_folder)
+ key = plan_key(version, minecraft_folder, options)
+ plan = plans["plans"].get(key)
+ cached = bool(plan) and plan_is_fresh(plan)
+
+ if not cached:
+  import minecraft_launcher_lib
+  launch_command = minecraft_launcher_lib.command.get_minecraft_command(version, str(minecraft_folder), options)
+  plan = {
+   "version": version,
+   "minecraft_folder": str(minecraft_folder),
+   "options": options,
+   "label": label or version,
+   "command": launch_command,
+   "dependencies": plan_dependencies(version, minecraft_folder, launch_command),
+  }
+  # свежие планы в конце словаря, самые старые вытесняются
+  plans["plans"].pop(key, None)
+  plans["plans"][key] = plan
+  while len(plans["plans"]) > MAX_LAUNCH_PLANS:
+   del plans["plans"][next(iter(plans["plans"]))]
+
+ plans["last"] = key
+ save_launch_plans(cache_folder)
+ launch_timer["started"] = started
+ launch_timer["label"] = plan["label"]
+ launch_timer["version"] = plan["version"]
+ launch_timer["instance"] = Path(plan["options"].get("gameDirectory") or "default").name
+ record_metric("launch_plan", plan["label"], cached=cached, ms=round((time.perf_counter() - started) * 1000, 1))
+ return plan["command"], cached
+
+
+def get_last_launch_command(cache_folder):
+ # последний план перепроверяется и при изменениях пересобирается с теми же параметрами
+ plans = load_launch_plans(cache_folder)
+ plan = plans["plans"].get(plans.get("last") or "")
+ if not plan:
+  return None, None, False
+ launch_command, cached = get_launch_command(plan["version"], plan["minecraft_folder"], plan["options"], cache_folder, plan["label"])
+ return launch_command, plan["label"], cached
+
+
+def start_minecraft(launch_command):
+ # процесс запускается под наблюдением launcher_processes, вывод игры идёт в лог сессии
+ session = start_game(launch_command, launch_timer["label"], launch_timer["instance"], launch_timer["version"])
+ # от начала сборки команды до появления процесса
+ if launch_timer["started"] is not None:
+  record_metric("launch", launch_timer["label"], ms=round((time.perf_counter() - launch_timer["started"]) * 1000, 1))
+  launch_timer["started"] = None
+ return session
@@ -0,0 +1,117 @@
+# телеметрия лаунчера
+# время команд, загрузки, распаковки и запуска пишутся строками json в cache/metrics.jsonl,
+# при переполнении файл сдвигается в metrics.jsonl.1, .2 и т.д. ничего не отправляется в сеть.
+# если метрики выключены, record_metric сразу возвращается
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+METRICS_MAX_BYTES = 1024 * 1024
+# текущий файл и два старых
+METRICS_KEEP_FILES = 3
+
+metrics_settings = {"enabled": False, "file": None}
+metrics_lock = threading.Lock()
+
+
+def configure_metrics(metrics_file, enabled=True):
+ metrics_settings["file"] = Path(metrics_file)
+ metrics_settings["enabled"] = enabled
+
+
+def metrics_enabled():
+ return metrics_settings["enabled"]
+
+
+def rotate_metrics(metrics_file):
+ # metrics.jsonl -> .1 -> .2, самый старый файл удаляется
+ for number in range(METRICS_KEEP_FILES - 1, 0, -1):
+  older_file = metrics_file.with_name(f"{metrics_file.name}.{number}")
+  if not older_file.exists():
+   continue
+  if number == METRICS_KEEP_FILES - 1:
+   older_file.unlink()
+  else:
+   os.replace(older_file, metrics_file.with_name(f"{metrics_file.name}.{number + 1}"))
+ os.replace(metrics_file, metrics_file.with_name(f"{metrics_file.name}.1"))
+
+
+def record_metric(kind, name, **values):
+ # kind - вид замера (command, download, install, extract, launch), name - команда, файл или версия
+ if not metrics_settings["enabled"]:
+  return
+ line = json.dumps({"time": round(time.time(), 3), "kind": kind, "name": name, **values}, ensure_ascii=False) + "\n"
+ metrics_file = metrics_settings["file"]
+ with metrics_lock:
+  try:
+   metrics_file.parent.mkdir(parents=True, exist_ok=True)
+   if metrics_file.exists() and metrics_file.stat().st_size >= METRICS_MAX_BYTES:
+    rotate_metrics(metrics_file)
+   with open(metrics_file, "a", encoding="utf-8") as file:
+    file.write(line)
+  except OSError:
+   pass
+
+
+def read_metrics(metrics_file=None):
+ # старые файлы первыми, чтобы записи шли по времени
+ metrics_file = Path(metrics_file or metrics_settings["file"])
+ files = [metrics_file.with_name(f"{metrics_file.name}.{number}") for number in range(METRICS_KEEP_FILES - 1, 0, -1)] + [metrics_file]
+ records = []
+ for path in files:
+  try:
+   lines = path.read_text(encoding="utf-8").splitlines()
+  except OSError:
+   continue
+  for line in lines:
+   try:
+    records.append(json.loads(line))
+   except ValueError:
+    continue
+ return records
+
+
+def percentile(values, point):
+ # ближайший ранг, values уже отсортированы
+ if not values:
+  return 0.0
+ rank = max(1, -(-len(values) * point // 100))
+ return values[min(rank, len(values)) - 1]
+
+
+def summarize_metrics(records, kind=None):
+ # {(kind, name): {"count", "p50", "p90", "p99", "bytes", "seconds"}}, время в мс
+ groups = {}
+ for record in records:
+  if kind and record.get("kind") != kind:
+   continue
+  group = groups.setdefault((record.get("kind"), record.get("name")), {"times": [], "bytes": 0, "seconds": 0.0})
+  if "ms" in record:
+   group["times"].append(record["ms"])
+  if "bytes" in record:
+   group["bytes"] += record["bytes"]
+   group["seconds"] += record.get("ms", 0) / 1000
+
+ summary = {}
+ for key, group in groups.items():
+  times = sorted(group["times"])
+  summary[key] = {
+   "count": len(times),
+   "p50": percentile(times, 50),
+   "p90": percentile(times, 90),
+   "p99": percentile(times, 99),
+   "bytes": group["bytes"],
+   "seconds": group["seconds"],
+  }
+ return summary
+
+
+def clear_metrics(metrics_file=None):
+ metrics_file = Path(metrics_file or metrics_settings["file"])
+ with metrics_lock:
+  for number in range(METRICS_KEEP_FILES - 1, -1, -1):
+   path = metrics_file.with_name(f"{metrics_file.name}.{number}") if number else metrics_file
+   if path.exists():
+    path.unlink()
@@ -0,0 +1,296 @@
+# установка модлоадеров без готовых архивов с игрой внутри
+# качается только json версии модлоадера и его библиотеки: у fabric и quilt - профиль с их мета-серверов,
+# у forge и neoforge - установщик, из которого берутся version.json, install_profile.json и вложенные библиотеки.
+# версия кладётся в minecraft_vanilla/versions рядом с ванилью и наследует её через inheritsFrom,
+# поэтому клиент, ассеты и общие библиотеки берутся уже установленные, а недостающее докачивается.
+# процессоры forge (патчи клиента) запускаются установленной джавой, их результаты сверяются по sha1
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from launcher_downloads import fetch_cached, pooled_download, DownloadError, CATALOG_TTL
+from launcher_install import install_version, library_files, download_missing, maven_path, INSTALL_WORKERS
+from launcher_store import file_sha1
+from launcher_extract import link_or_copy
+from launcher_metrics import record_metric
+
+FABRIC_META_URL = "https://meta.fabricmc.net/v2"
+QUILT_META_URL = "https://meta.quiltmc.org/v3"
+FORGE_MAVEN_URL = "https://maven.minecraftforge.net"
+NEOFORGE_MAVEN_URL = "https://maven.neoforged.net/releases"
+
+# модлоадеры, которые ставятся без архива. остальные (liteloader, optifine) - по-старому из каталога
+delta_loaders = {
+ "fabric": "Fabric",
+ "quilt": "Quilt",
+ "forge": "Forge",
+ "neoforge": "NeoForge",
+}
+
+
+class ModloaderError(Exception):
+ pass
+
+
+def fetch_loader_json(url, cache_file, ttl=CATALOG_TTL):
+ return json.loads(fetch_cached(url, cache_file, ttl)[0])
+
+
+def maven_versions(metadata_url, cache_file):
+ # версии из maven-metadata.xml, от новых к старым
+ import xml.etree.ElementTree as ElementTree
+ data = fetch_cached(metadata_url, cache_file, CATALOG_TTL)[0]
+ return [element.text for element in reversed(ElementTree.fromstring(data).findall("versioning/versions/version")) if element.text]
+
+
+def loader_versions(loader, game_version, cache_folder):
+ # версии модлоадера для версии игры, от новых к старым: [(версия, стабильная ли)]
+ loaders_folder = Path(cache_folder) / "catalogs" / "loaders"
+ if loader in ("fabric", "quilt"):
+  meta_url = FABRIC_META_URL if loader == "fabric" else QUILT_META_URL
+  entries = fetch_loader_json(f"{meta_url}/versions/loader/{game_version}", loaders_folder / f"{loader}-{game_version}.json")
+  # у quilt нет флага stable, нестабильные версии помечены в номере
+  return [(entry["loader"]["version"], entry["loader"].get("stable", "-" not in entry["loader"]["version"])) for entry in entries]
+
+ if loader == "forge":
+  versions = maven_versions(f"{FORGE_MAVEN_URL}/net/minecraftforge/forge/maven-metadata.xml", loaders_folder / "forge-maven-metadata.xml")
+  forge_versions = [version.split("-", 1)[1] for version in versions if version.startswith(f"{game_version}-")]
+  try:
+   promotions = fetch_loader_json(f"{FORGE_MAVEN_URL}/net/minecraftforge/forge/promotions_slim.json", loaders_folder / "forge-promotions.json").get("promos", {})
+  except DownloadError:
+   promotions = {}
+  recommended = promotions.get(f"{game_version}-recommended")
+  return [(version, version == recommended) for version in forge_versions]
+
+ if loader == "neoforge":
+  # версии neoforge повторяют версию игры без "1.": 1.21.1 -> 21.1.x, 1.20.2 -> 20.2.x, 26.1 -> 26.1.x
+  numbers = game_version.split(".")
+  if numbers[0] == "1":
+   numbers = numbers[1:] + ["0"] * (3 - len(numbers))
+  prefix = ".".join(numbers[:2]) + "."
+  versions = maven_versions(f"{NEOFORGE_MAVEN_URL}/net/neoforged/neoforge/maven-metadata.xml", loaders_folder / "neoforge-maven-metadata.xml")
+  return [(version, "beta" not in version) for version in versions if version.startswith(prefix)]
+
+ raise ModloaderError(f"{loader} ставится только из каталога модлоадеров")
+
+
+def version_json_file(version_id, minecraft_folder):
+ return Path(minecraft_folder) / "versions" / version_id / f"{version_id}.json"
+
+
+def write_version_json(version_data, minecraft_folder):
+ # клиент берётся из папки ванильной версии, своей копии jar у модлоадера нет
+ if version_data.get("inheritsFrom"):
+  version_data.setdefault("jar", version_data["inheritsFrom"])
+ version_file = version_json_file(version_data["id"], minecraft_folder)
+ version_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = version_file.with_name(version_file.name + ".tmp")
+ temp_file.write_text(json.dumps(version_data, ensure_ascii=False, indent=1), encoding="utf-8")
+ os.replace(temp_file, version_file)
+ return version_data["id"]
+
+
+def discard_version_json(version_id, minecraft_folder):
+ # json пишется до загрузки библиотек (install_version читает его из versions), при ошибке новой установки
+ # он удаляется, чтобы модлоадер, который не запустится, не попал в список установленных
+ version_json_file(version_id, minecraft_folder).unlink(missing_ok=True)
+
+
+def link_parent_natives(version_id, minecraft_folder):
+ # java.library.path указывает на natives самого модлоадера, а распакованы они у ванили
+ versions_folder = Path(minecraft_folder) / "versions"
+ parent_id = json.loads((versions_folder / version_id / f"{version_id}.json").read_text(encoding="utf-8"))["inheritsFrom"]
+ parent_natives = versions_folder / parent_id / "natives"
+ for folder, _, file_names in os.walk(parent_natives):
+  target_folder = versions_folder / version_id / "natives" / Path(folder).relative_to(parent_natives)
+  target_folder.mkdir(parents=True, exist_ok=True)
+  for file_name in file_names:
+   if not (target_folder / file_name).exists():
+    link_or_copy(Path(folder) / file_name, target_folder / file_name)
+
+
+def library_path(coordinates, minecraft_folder):
+ # [group:artifact:version] из профиля установщика -> файл в libraries
+ return Path(minecraft_folder) / "libraries" / maven_path(coordinates.strip("[]"))
+
+
+def extract_bundled_libraries(installer, libraries, minecraft_folder):
+ # библиотеки, вложенные в установщик (maven/...), не качаются - у некоторых из них и нет ссылки
+ installer_names = set(installer.namelist())
+ extracted = 0
+ for library in libraries:
+  artifact = library.get("downloads", {}).get("artifact", {})
+  member = f"maven/{artifact.get('path') or maven_path(library.get('name', 'x:x:x'))}"
+  target = Path(minecraft_folder) / "libraries" / member[len("maven/"):]
+  if member not in installer_names or target.is_file() and (not artifact.get("size") or target.stat().st_size == artifact["size"]):
+   continue
+  target.parent.mkdir(parents=True, exist_ok=True)
+  temp_file = target.with_name(target.name + ".tmp")
+  with installer.open(member) as source, open(temp_file, "wb") as output:
+   while chunk := source.read(1024 * 1024):
+    output.write(chunk)
+  os.replace(temp_file, target)
+  extracted += 1
+ return extracted
+
+
+def processor_data(install_profile, installer, temp_folder, minecraft_folder, game_version, installer_file):
+ # значения для подстановки в аргументы процессоров: [координаты] - файл в libraries,
+ # 'строка' - как есть, /путь - файл из установщика
+ minecraft_folder = Path(minecraft_folder)
+ data = {
+  "SIDE": "client",
+  "MINECRAFT_JAR": str(minecraft_folder / "versions" / game_version / f"{game_version}.jar"),
+  "MINECRAFT_VERSION": game_version,
+  "ROOT": str(minecraft_folder),
+  "INSTALLER": str(installer_file),
+  "LIBRARY_DIR": str(minecraft_folder / "libraries"),
+ }
+ for key, values in install_profile.get("data", {}).items():
+  value = values.get("client", "")
+  if value.startswith("[") and value.endswith("]"):
+   data[key] = str(library_path(value, minecraft_folder))
+  elif value.startswith("'") and value.endswith("'"):
+   data[key] = value[1:-1]
+  elif value.startswith("/"):
+   target = Path(temp_folder) / value.lstrip("/")
+   target.parent.mkdir(parents=True, exist_ok=True)
+   target.write_bytes(installer.read(value.lstrip("/")))
+   data[key] = str(target)
+  else:
+   data[key] = value
+ return data
+
+
+def substitute(value, data, minecraft_folder):
+ if value.startswith("[") and value.endswith("]"):
+  return str(library_path(value, minecraft_folder))
+ value = re.sub(r"\{(\w+)\}", lambda match: data.get(match.group(1), match.group(0)), value)
+ return value[1:-1] if value.startswith("'") and value.endswith("'") else value
+
+
+def processor_outputs_match(outputs):
+ return all(Path(path).is_file() and file_sha1(path) == sha1 for path, sha1 in outputs.items())
+
+
+def run_processors(install_profile, data, minecraft_folder, java_exe, progress=None):
+ # возвращает (запущено, пропущено): процессор, чьи результаты уже на месте, не запускается
+ import subprocess
+ import zipfile
+ processors = [processor for processor in install_profile.get("processors", []) if "client" in processor.get("sides", ["client"])]
+ stats = [0, 0]
+ for number, processor in enumerate(processors, start=1):
+  if progress:
+   progress(number, len(processors))
+  outputs = {substitute(path, data, minecraft_folder): substitute(sha1, data, minecraft_folder) for path, sha1 in processor.get("outputs", {}).items()}
+  if outputs and processor_outputs_match(outputs):
+   stats[1] += 1
+   continue
+  processor_jar = library_path(processor["jar"], minecraft_folder)
+  with zipfile.ZipFile(processor_jar) as jar:
+   manifest = jar.read("META-INF/MANIFEST.MF").decode("utf-8", "replace")
+  main_class = re.search(r"^Main-Class:\s*(\S+)", manifest, re.MULTILINE)
+  if not main_class:
+   raise ModloaderError(f"в {processor_jar.name} нет Main-Class")
+  classpath = os.pathsep.join([str(processor_jar)] + [str(library_path(coordinates, minecraft_folder)) for coordinates in processor.get("classpath", [])])
+  arguments = [substitute(argument, data, minecraft_folder) for argument in processor.get("args", [])]
+  result = subprocess.run([str(java_exe), "-cp", classpath, main_class.group(1)] + arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+  if result.returncode != 0:
+   last_lines = " | ".join(result.stdout.strip().splitlines()[-3:])
+   raise ModloaderError(f"процессор {processor_jar.name} завершился с кодом {result.returncode}: {last_lines}")
+  if outputs and not processor_outputs_match(outputs):
+   raise ModloaderError(f"процессор {processor_jar.name}: результат не совпал по sha1")
+  stats[0] += 1
+ return stats
+
+
+def installer_url(loader, loader_version, game_version):
+ if loader == "forge":
+  return f"{FORGE_MAVEN_URL}/net/minecraftforge/forge/{game_version}-{loader_version}/forge-{game_version}-{loader_version}-installer.jar"
+ return f"{NEOFORGE_MAVEN_URL}/net/neoforged/neoforge/{loader_version}/neoforge-{loader_version}-installer.jar"
+
+
+def install_from_installer(loader, game_version, loader_version, minecraft_folder, cache_folder, java_exe, version_index, store_folder, workers, progress):
+ import tempfile
+ import zipfile
+ minecraft_folder = Path(minecraft_folder)
+ installer_file = Path(cache_folder) / "installers" / f"{loader}-{game_version}-{loader_version}-installer.jar"
+ if not installer_file.is_file():
+  pooled_download(installer_url(loader, loader_version, game_version), installer_file)
+
+ with zipfile.ZipFile(installer_file) as installer:
+  install_profile = json.loads(installer.read("install_profile.json"))
+  if "versionInfo" in install_profile:
+   # старый формат (до 1.13): json версии внутри профиля, сам forge лежит в установщике
+   version_data = install_profile["versionInfo"]
+   version_data.setdefault("inheritsFrom", install_profile["install"]["minecraft"])
+   version_data.setdefault("jar", install_profile["install"]["minecraft"])
+   universal_file = minecraft_folder / "libraries" / maven_path(install_profile["install"]["path"])
+   universal_file.parent.mkdir(parents=True, exist_ok=True)
+   universal_file.write_bytes(installer.read(install_profile["install"]["filePath"]))
+   # у библиотеки forge в json ссылка на maven, но файл уже распакован
+   version_data["libraries"] = [library for library in version_data["libraries"] if library.get("name") != install_profile["install"]["path"]]
+   version_data["libraries"].append({"name": install_profile["install"]["path"]})
+   profile_libraries = []
+  else:
+   version_data = json.loads(installer.read("version.json"))
+   profile_libraries = install_profile.get("libraries", [])
+  extract_bundled_libraries(installer, version_data.get("libraries", []) + profile_libraries, minecraft_folder)
+
+  fresh_install = not version_json_file(version_data["id"], minecraft_folder).is_file()
+  version_id = write_version_json(version_data, minecraft_folder)
+  try:
+   stats = install_version(version_id, minecraft_folder, version_index, workers, progress, store_folder, cache_folder)
+   link_parent_natives(version_id, minecraft_folder)
+   # библиотеки процессоров в json версии не входят, игре они не нужны
+   profile_files = [file for library in profile_libraries for file in library_files(library, minecraft_folder)]
+   profile_stats = download_missing(profile_files, workers, progress, store_folder)
+   for key in ("files", "missing", "done", "bytes", "from_store"):
+    stats[key] += profile_stats[key]
+
+   stats["processors"], stats["processors_skipped"] = 0, 0
+   if install_profile.get("processors"):
+    if not java_exe or not Path(java_exe).is_file():
+     raise ModloaderError(f"для установки {delta_loaders[loader]} нужна джава, она ещё не установлена")
+    processors_started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=cache_folder) as temp_folder:
+     data = processor_data(install_profile, installer, temp_folder, minecraft_folder, version_data["inheritsFrom"], installer_file)
+     stats["processors"], stats["processors_skipped"] = run_processors(install_profile, data, minecraft_folder, java_exe, progress=lambda done, total: progress and progress({**stats, "processor": f"{done}/{total}"}))
+    record_metric("install", f"{version_id} процессоры", ms=round((time.perf_counter() - processors_started) * 1000, 1), files=stats["processors"])
+  except BaseException:
+   if fresh_install:
+    discard_version_json(version_id, minecraft_folder)
+   raise
+ installer_file.unlink()
+ stats["id"] = version_id
+ return stats
+
+
+def install_modloader(loader, game_version, loader_version, minecraft_folder, cache_folder, version_index=None, java_exe=None, store_folder=None, workers=INSTALL_WORKERS, progress=None):
+ # ставит модлоадер поверх ванильной версии в minecraft_folder, возвращает статистику install_version с id версии.
+ # loader_version None - последняя стабильная
+ if loader not in delta_loaders:
+  raise ModloaderError(f"{loader} ставится только из каталога модлоадеров")
+ if not loader_version:
+  versions = loader_versions(loader, game_version, cache_folder)
+  if not versions:
+   raise ModloaderError(f"нет версий {delta_loaders[loader]} для {game_version}")
+  loader_version = next((version for version, stable in versions if stable), versions[0][0])
+
+ if loader in ("fabric", "quilt"):
+  meta_url = FABRIC_META_URL if loader == "fabric" else QUILT_META_URL
+  version_data = fetch_loader_json(f"{meta_url}/versions/loader/{game_version}/{loader_version}/profile/json", Path(cache_folder) / "catalogs" / "loaders" / f"{loader}-{game_version}-{loader_version}.json", ttl=float("inf"))
+  fresh_install = not version_json_file(version_data["id"], minecraft_folder).is_file()
+  version_id = write_version_json(version_data, minecraft_folder)
+  try:
+   stats = install_version(version_id, Path(minecraft_folder), version_index, workers, progress, store_folder, cache_folder)
+   link_parent_natives(version_id, minecraft_folder)
+  except BaseException:
+   if fresh_install:
+    discard_version_json(version_id, minecraft_folder)
+   raise
+  stats["id"] = version_id
+  return stats
+ return install_from_installer(loader, game_version, loader_version, minecraft_folder, cache_folder, java_exe, version_index, store_folder, workers, progress)
@@ -0,0 +1,389 @@
+# индекс модов инстанса
+# из каждого jar в mods/ читается только оглавление zip и файлы описания (fabric.mod.json, quilt.mod.json,
+# META-INF/mods.toml, META-INF/neoforge.mods.toml, mcmod.info). результат хранится в cache/mods_index.json:
+# по пути - размер, mtime и sha1 файла, по sha1 - описание модов, поэтому повторный обход читает только
+# новые и изменённые jar, а один и тот же jar в разных инстансах разбирается один раз.
+# перед запуском по индексу ищутся повторяющиеся id, моды под другой загрузчик или версию игры
+# и отсутствующие зависимости - до того, как игра упадёт через полторы минуты загрузки
+import io
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from launcher_store import file_sha1
+
+MODS_INDEX_WORKERS = 8
+
+# моды какого загрузчика может загрузить загрузчик версии
+loader_accepts = {
+ "fabric": {"fabric"},
+ "quilt": {"fabric", "quilt"},
+ "forge": {"forge", "forge-legacy"},
+ "neoforge": {"neoforge", "forge"},
+}
+
+# id, которые даёт сам загрузчик, а не моды из папки
+loader_provides = {
+ "fabric": {"minecraft", "java", "fabricloader"},
+ "quilt": {"minecraft", "java", "fabricloader", "quilt_loader"},
+ "forge": {"minecraft", "forge", "javafml", "lowcodefml", "mcp", "fml"},
+ "neoforge": {"minecraft", "neoforge", "javafml", "lowcodefml", "fml"},
+}
+
+mods_index_lock = threading.Lock()
+
+
+def version_numbers(version):
+ # "1.20.1" -> (1, 20, 1), суффиксы вроде -pre1 и +build отбрасываются. снапшоты ("23w31a") и всё,
+ # где за числами идёт не разделитель, дают None - такая версия считается неизвестной
+ match = re.match(r"\s*v?(\d+)(?:\.(\d+))?(?:\.(\d+))?", str(version))
+ if not match:
+  return None
+ next_char = str(version)[match.end():match.end() + 1]
+ if next_char and next_char not in "-+_." and not next_char.isspace():
+  return None
+ return tuple(int(number or 0) for number in match.groups())
+
+
+def fabric_predicate_matches(version, predicate):
+ # ">=1.20 <1.21", "~1.20.1", "^1.20", "1.20.x", "1.20.1", "*". непонятное условие считается выполненным
+ numbers = version_numbers(version)
+ if numbers is None:
+  return True
+ for condition in str(predicate).split():
+  if condition in ("*", "x", "X"):
+   continue
+  match = re.fullmatch(r"(>=|<=|>|<|=|~|\^)?(.+)", condition)
+  operator, required = match.group(1) or "=", match.group(2)
+  if re.search(r"\.[xX*]$", required):
+   prefix = version_numbers(required[:-2])
+   length = required[:-2].count(".") + 1
+   if prefix is None or numbers[:length] != prefix[:length]:
+    return False
+   continue
+  required_numbers = version_numbers(required)
+  if required_numbers is None:
+   continue
+  if operator == "=" and numbers != required_numbers:
+   return False
+  if operator == ">=" and numbers < required_numbers:
+   return False
+  if operator == "<=" and numbers > required_numbers:
+   return False
+  if operator == ">" and numbers <= required_numbers:
+   return False
+  if operator == "<" and numbers >= required_numbers:
+   return False
+  if operator == "~" and not (required_numbers <= numbers < (required_numbers[0], required_numbers[1] + 1, 0)):
+   return False
+  if operator == "^" and not (required_numbers <= numbers < (required_numbers[0] + 1, 0, 0)):
+   return False
+ return True
+
+
+def maven_range_matches(version, version_range):
+ # "[1.20.1,1.21)", "[1.20,)", "[1.20.1]", несколько диапазонов через запятую. голая версия - любая, как у maven
+ numbers = version_numbers(version)
+ ranges = re.findall(r"([\[(])([^\])]*)([\])])", str(version_range))
+ if numbers is None or not ranges:
+  return True
+ for opening, bounds, closing in ranges:
+  if "," not in bounds:
+   if version_numbers(bounds) == numbers:
+    return True
+   continue
+  lower, upper = (version_numbers(bound) if bound.strip() else None for bound in bounds.split(",", 1))
+  if lower is not None and (numbers < lower or (opening == "(" and numbers == lower)):
+   continue
+  if upper is not None and (numbers > upper or (closing == ")" and numbers == upper)):
+   continue
+  return True
+ return False
+
+
+def requirement_matches(mod, version, requirement):
+ if requirement is None:
+  return True
+ if mod["loader"] in ("forge", "neoforge") or str(requirement).startswith(("[", "(")):
+  return maven_range_matches(version, requirement)
+ # у fabric список условий - любое из них
+ if isinstance(requirement, list):
+  return not requirement or any(fabric_predicate_matches(version, predicate) for predicate in requirement)
+ return fabric_predicate_matches(version, requirement)
+
+
+def read_mods_toml(text):
+ # не полный toml: только таблицы и простые ключи, которые есть в mods.toml.
+ # многострочные описания пропускаются, ${file.jarVersion} и т.п. остаются как есть
+ root = {"table": ""}
+ tables = [root]
+ current = root
+ multiline_quote = None
+ for raw_line in text.splitlines():
+  line = raw_line.strip()
+  if multiline_quote:
+   if multiline_quote in line:
+    multiline_quote = None
+   continue
+  if not line or line.startswith("#"):
+   continue
+  if line.startswith("["):
+   current = {"table": line.strip("[] ").replace('"', "").replace("'", "")}
+   tables.append(current)
+   continue
+  match = re.match(r"([\w\-]+)\s*=\s*(.*)", line)
+  if not match:
+   continue
+  key, value = match.groups()
+  if value.startswith(('"""', "'''")):
+   if value[:3] not in value[3:]:
+    multiline_quote = value[:3]
+   continue
+  if value[:1] in ("\"", "'"):
+   end = value.find(value[0], 1)
+   current[key] = value[1:end if end > 0 else None]
+  elif value.startswith(("true", "false")):
+   current[key] = value.startswith("true")
+  else:
+   current[key] = value.split("#", 1)[0].strip()
+ return tables
+
+
+def fabric_mod_entry(metadata):
+ depends = metadata.get("depends") or {}
+ return {
+  "id": metadata.get("id", ""),
+  "name": metadata.get("name") or metadata.get("id", ""),
+  "version": str(metadata.get("version", "")),
+  "loader": "fabric",
+  "minecraft": depends.get("minecraft"),
+  "depends": {mod_id: requirement for mod_id, requirement in depends.items() if mod_id != "minecraft"},
+  "breaks": dict(metadata.get("breaks") or {}),
+  "provides": [provided if isinstance(provided, str) else provided.get("id", "") for provided in metadata.get("provides") or []],
+ }
+
+
+def quilt_mod_entry(metadata):
+ quilt_loader = metadata.get("quilt_loader") or {}
+
+ def dependency_map(dependencies):
+  # зависимость - строка с id или объект {"id", "versions"}, необязательные пропускаются
+  mapping = {}
+  for dependency in dependencies or []:
+   if isinstance(dependency, str):
+    mapping[dependency.split(":")[-1]] = None
+   elif isinstance(dependency, dict) and not dependency.get("optional"):
+    mapping[str(dependency.get("id", "")).split(":")[-1]] = dependency.get("versions")
+  return mapping
+
+ depends = dependency_map(quilt_loader.get("depends"))
+ return {
+  "id": quilt_loader.get("id", ""),
+  "name": (quilt_loader.get("metadata") or {}).get("name") or quilt_loader.get("id", ""),
+  "version": str(quilt_loader.get("version", "")),
+  "loader": "quilt",
+  "minecraft": depends.pop("minecraft", None),
+  "depends": depends,
+  "breaks": dependency_map(quilt_loader.get("breaks")),
+  "provides": [provided if isinstance(provided, str) else provided.get("id", "") for provided in quilt_loader.get("provides") or []],
+ }
+
+
+def forge_mod_entries(text, loader):
+ tables = read_mods_toml(text)
+ entries = []
+ for table in tables:
+  if table["table"] != "mods":
+   continue
+  entries.append({"id": table.get("modId", ""), "name": table.get("displayName") or table.get("modId", ""), "version": table.get("version", ""), "loader": loader, "minecraft": None, "depends": {}, "breaks": {}, "provides": []})
+
+ for table in tables:
+  if not table["table"].startswith("dependencies.") or "modId" not in table:
+   continue
+  owner_id = table["table"].split(".", 1)[1]
+  owner = next((entry for entry in entries if entry["id"] == owner_id), entries[0] if len(entries) == 1 else None)
+  # серверные зависимости клиенту не нужны
+  if owner is None or str(table.get("side", "BOTH")).upper() == "SERVER":
+   continue
+  dependency_id = table["modId"]
+  dependency_type = str(table.get("type", "")).lower()
+  if dependency_id == "minecraft":
+   owner["minecraft"] = table.get("versionRange")
+  elif dependency_type == "incompatible":
+   owner["breaks"][dependency_id] = table.get("versionRange")
+  # в neoforge.mods.toml зависимость обязательна, если не сказано иначе
+  elif table.get("mandatory") is True or dependency_type == "required" or (loader == "neoforge" and not dependency_type and "mandatory" not in table):
+   owner["depends"][dependency_id] = table.get("versionRange")
+ return entries
+
+
+def legacy_mod_entries(text):
+ # mcmod.info старых forge: список модов или {"modList": [...]}
+ metadata = json.loads(text, strict=False)
+ if isinstance(metadata, dict):
+  metadata = metadata.get("modList") or []
+ entries = []
+ for mod in metadata:
+  if not isinstance(mod, dict) or not mod.get("modid"):
+   continue
+  entries.append({
+   "id": mod["modid"],
+   "name": mod.get("name") or mod["modid"],
+   "version": str(mod.get("version", "")),
+   "loader": "forge-legacy",
+   "minecraft": mod.get("mcversion") or None,
+   "depends": {dependency.split("@")[0]: None for dependency in mod.get("requiredMods") or [] if isinstance(dependency, str)},
+   "breaks": {},
+   "provides": [],
+  })
+ return entries
+
+
+def read_jar_mods(jar_file):
+ # описание модов из jar: открывается только оглавление zip и нужные файлы
+ import zipfile
+ with zipfile.ZipFile(jar_file) as jar:
+  names = set(jar.namelist())
+  if "fabric.mod.json" in names:
+   metadata = json.loads(jar.read("fabric.mod.json").decode("utf-8-sig"), strict=False)
+   entry = fabric_mod_entry(metadata)
+   # моды внутри jar (jar-in-jar) тоже дают свои id, например модули fabric api
+   for nested in metadata.get("jars") or []:
+    nested_name = nested.get("file", "") if isinstance(nested, dict) else ""
+    if nested_name not in names:
+     continue
+    try:
+     with zipfile.ZipFile(io.BytesIO(jar.read(nested_name))) as nested_jar:
+      nested_metadata = json.loads(nested_jar.read("fabric.mod.json").decode("utf-8-sig"), strict=False)
+    except (KeyError, ValueError, zipfile.BadZipFile):
+     continue
+    entry["provides"].append(nested_metadata.get("id", ""))
+    entry["provides"].extend(provided for provided in nested_metadata.get("provides") or [] if isinstance(provided, str))
+   return [entry]
+  if "quilt.mod.json" in names:
+   return [quilt_mod_entry(json.loads(jar.read("quilt.mod.json").decode("utf-8-sig"), strict=False))]
+  if "META-INF/neoforge.mods.toml" in names:
+   return forge_mod_entries(jar.read("META-INF/neoforge.mods.toml").decode("utf-8", "replace"), "neoforge")
+  if "META-INF/mods.toml" in names:
+   return forge_mod_entries(jar.read("META-INF/mods.toml").decode("utf-8", "replace"), "forge")
+  if "mcmod.info" in names:
+   return legacy_mod_entries(jar.read("mcmod.info").decode("utf-8", "replace"))
+ return []
+
+
+def load_mods_index(cache_folder):
+ index_file = Path(cache_folder) / "mods_index.json"
+ try:
+  index = json.loads(index_file.read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  index = {}
+ index.setdefault("files", {})
+ index.setdefault("mods", {})
+ return index
+
+
+def save_mods_index(cache_folder, index):
+ # описания, на которые не ссылается ни один файл, выкидываются
+ referenced = {entry[2] for entry in index["files"].values()}
+ index["mods"] = {sha1: mods for sha1, mods in index["mods"].items() if sha1 in referenced}
+ index_file = Path(cache_folder) / "mods_index.json"
+ index_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = index_file.with_name("mods_index.json.tmp")
+ temp_file.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+ os.replace(temp_file, index_file)
+
+
+def scan_mods_folder(mods_folder, cache_folder, workers=MODS_INDEX_WORKERS):
+ # возвращает ([{"file", "sha1", "mods", "error"}], stats), stats - сколько файлов взято из кеша, захешировано и разобрано
+ mods_folder = Path(mods_folder)
+ try:
+  jar_files = sorted(entry.path for entry in os.scandir(mods_folder) if entry.is_file() and entry.name.lower().endswith(".jar"))
+ except FileNotFoundError:
+  jar_files = []
+
+ with mods_index_lock:
+  index = load_mods_index(cache_folder)
+ stats = {"files": len(jar_files), "cached": 0, "hashed": 0, "parsed": 0}
+
+ def index_jar(jar_file):
+  stat = os.stat(jar_file)
+  cached = index["files"].get(jar_file)
+  if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns and cached[2] in index["mods"]:
+   return jar_file, cached, index["mods"][cached[2]], None, "cached"
+  # файл новый или изменился: по sha1 его могли уже разобрать в другом инстансе
+  sha1 = file_sha1(jar_file)
+  entry = [stat.st_size, stat.st_mtime_ns, sha1]
+  if sha1 in index["mods"]:
+   return jar_file, entry, index["mods"][sha1], None, "hashed"
+  try:
+   return jar_file, entry, read_jar_mods(jar_file), None, "parsed"
+  except Exception as e:
+   return jar_file, entry, None, str(e) or e.__class__.__name__, "parsed"
+
+ from concurrent.futures import ThreadPoolExecutor
+ results = []
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  for jar_file, entry, mods, error, source in executor.map(index_jar, jar_files):
+   stats[source] += 1
+   results.append({"file": jar_file, "sha1": entry[2], "mods": mods or [], "error": error})
+   # битые jar не кешируются, чтобы после замены файла их разобрали заново
+   if error is None:
+    index["files"][jar_file] = entry
+    index["mods"][entry[2]] = mods
+
+ folder_prefix = str(mods_folder) + os.sep
+ removed_files = [path for path in index["files"] if path.startswith(folder_prefix) and path not in jar_files]
+ for removed_file in removed_files:
+  del index["files"][removed_file]
+
+ if stats["hashed"] or stats["parsed"] or removed_files:
+  with mods_index_lock:
+   save_mods_index(cache_folder, index)
+ return results, stats
+
+
+def check_mods(scanned, loader, game_version):
+ # список проблем текстом: повторяющиеся id, чужой загрузчик, другая версия игры, зависимости
+ problems = []
+ accepted_loaders = loader_accepts.get(loader)
+ provided = set(loader_provides.get(loader, ()))
+ # neoforge для 1.20.1 ещё грузил моды с зависимостью forge
+ if loader == "neoforge" and game_version == "1.20.1":
+  provided.add("forge")
+
+ mods_by_id = {}
+ for jar in scanned:
+  jar_name = Path(jar["file"]).name
+  if jar["error"]:
+   problems.append(f"{jar_name}: не читается как jar ({jar['error']})")
+   continue
+  for mod in jar["mods"]:
+   mods_by_id.setdefault(mod["id"], []).append((jar_name, mod))
+   provided.add(mod["id"])
+   provided.update(mod["provides"])
+
+ for mod_id, owners in sorted(mods_by_id.items()):
+  if len(owners) > 1:
+   problems.append(f"{mod_id}: один мод в нескольких файлах - {', '.join(jar_name for jar_name, _ in owners)}")
+
+ # неизвестный загрузчик (optifine, liteloader) не проверяется
+ if accepted_loaders is None:
+  return problems
+
+ for mod_id, owners in sorted(mods_by_id.items()):
+  jar_name, mod = owners[0]
+  if mod["loader"] not in accepted_loaders:
+   problems.append(f"{jar_name}: мод для {mod['loader']}, а версия запускается на {loader}")
+   continue
+  if not requirement_matches(mod, game_version, mod["minecraft"]):
+   problems.append(f"{jar_name}: нужна версия игры {mod['minecraft']}, а запускается {game_version}")
+  missing = sorted(dependency_id for dependency_id in mod["depends"] if dependency_id not in provided)
+  if missing:
+   problems.append(f"{jar_name}: не хватает модов {', '.join(missing)}")
+  for broken_id, requirement in mod["breaks"].items():
+   for other_jar, other_mod in mods_by_id.get(broken_id, ()):
+    if requirement_matches(mod, other_mod["version"], requirement or "*"):
+     problems.append(f"{jar_name}: несовместим с {other_jar}")
+ return problems
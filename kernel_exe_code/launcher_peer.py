@@ -0,0 +1,294 @@
+# кеш-сервер лаунчера для локальной сети
+# один компьютер раздаёт по HTTP то, что уже скачал, остальные лаунчеры спрашивают файлы у него
+# (launcher_downloads.configure_peer_cache) и идут в интернет только если он недоступен.
+# GET /get?url=<исходный адрес>[&sha1=<хеш>]: файл с известным sha1 отдаётся из общего хранилища store,
+# остальное - из cache/peer (без sha1 и с хостов, где файлы меняются, - после проверки ETag/Last-Modified). чего нет, сервер качает сам один раз и одновременно отдаёт первому клиенту,
+# остальные клиенты ждут окончания и получают файл из кеша. адреса чужих хостов и всё, что скачать
+# не удалось, перенаправляются на исходный адрес. поддерживается Range, клиенты обслуживаются параллельно
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from launcher_downloads import CHUNK_SIZE, DOWNLOAD_TIMEOUT, USER_AGENT
+from launcher_store import object_path
+
+PEER_PORT = 8770
+# сколько клиент ждёт файл, который сервер в этот момент качает для другого клиента
+PEER_WAIT_SECONDS = 50
+
+# откуда лаунчер и модули что-либо качают, на другие хосты сервер ходить не будет
+peer_upstream_hosts = {
+ "launchermeta.mojang.com", "launcher.mojang.com", "piston-meta.mojang.com", "piston-data.mojang.com",
+ "libraries.minecraft.net", "resources.download.minecraft.net",
+ "github.com", "objects.githubusercontent.com", "release-assets.githubusercontent.com", "raw.githubusercontent.com",
+ "meta.fabricmc.net", "maven.fabricmc.net", "meta.quiltmc.org", "maven.quiltmc.org",
+ "files.minecraftforge.net", "maven.minecraftforge.net", "maven.neoforged.net",
+}
+
+# по этим адресам файл никогда не меняется (имя содержит хеш или версию), кеш отдаётся без запроса к ним.
+# остальное (плагины, модули с raw.githubusercontent.com, каталоги) без sha1 от клиента перепроверяется по ETag
+peer_fixed_hosts = {"piston-data.mojang.com", "libraries.minecraft.net", "resources.download.minecraft.net"}
+
+peer_server = {"server": None, "thread": None, "port": None, "stats": None}
+
+
+def peer_cache_file(cache_folder, url):
+ import hashlib
+ url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+ return Path(cache_folder) / "peer" / url_hash[:2] / url_hash
+
+
+def peer_cache_meta(cache_file):
+ # ETag и Last-Modified, с которыми файл лёг в кеш
+ try:
+  return json.loads(Path(cache_file).with_name(Path(cache_file).name + ".meta.json").read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return {}
+
+
+def parse_range(range_header, size):
+ # (начало, конец включительно) для "bytes=a-b", "bytes=a-", "bytes=-n", None - отдать весь файл,
+ # False - диапазон за пределами файла
+ if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+  return None
+ start, _, end = range_header[len("bytes="):].strip().partition("-")
+ try:
+  if not start:
+   length = int(end)
+   return (max(size - length, 0), size - 1) if length > 0 and size else False
+  start = int(start)
+  end = min(int(end), size - 1) if end else size - 1
+ except ValueError:
+  return None
+ if start >= size or end < start:
+  return False
+ return start, end
+
+
+def load_peer_settings(settings_file):
+ try:
+  settings = json.loads(Path(settings_file).read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  settings = {}
+ return {"url": settings.get("url", ""), "port": settings.get("port", PEER_PORT)}
+
+
+def save_peer_settings(settings_file, url, port=PEER_PORT):
+ settings_file = Path(settings_file)
+ settings_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = settings_file.with_name(settings_file.name + ".tmp")
+ temp_file.write_text(json.dumps({"url": url, "port": port}), encoding="utf-8")
+ os.replace(temp_file, settings_file)
+
+
+def lan_address():
+ # адрес этого компьютера в локальной сети: udp-сокет ничего не отправляет, только выбирает интерфейс
+ import socket
+ with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+  try:
+   probe.connect(("10.255.255.255", 1))
+   return probe.getsockname()[0]
+  except OSError:
+   return "127.0.0.1"
+
+
+def peer_cache_size(cache_folder):
+ files = 0
+ size = 0
+ for folder, _, file_names in os.walk(Path(cache_folder) / "peer"):
+  for file_name in file_names:
+   files += 1
+   size += os.path.getsize(os.path.join(folder, file_name))
+ return files, size
+
+
+def clear_peer_cache(cache_folder):
+ shutil.rmtree(Path(cache_folder) / "peer", ignore_errors=True)
+
+
+def start_peer_server(cache_folder, store_folder, port=PEER_PORT, host="0.0.0.0", upstream_hosts=()):
+ # запускает сервер в фоновом потоке, возвращает его статистику
+ import http.server
+ import urllib.parse
+ import urllib.request
+ import urllib.error
+ import hashlib
+ if peer_server["server"]:
+  return peer_server["stats"]
+ allowed_hosts = peer_upstream_hosts | set(upstream_hosts)
+ store_root = Path(store_folder).resolve()
+ stats = {"started": time.time(), "requests": 0, "store": 0, "cache": 0, "fetched": 0, "redirected": 0, "bytes": 0, "clients": set()}
+ stats_lock = threading.Lock()
+ fetch_locks = {}
+
+ def count(**values):
+  with stats_lock:
+   for key, value in values.items():
+    stats[key] += value
+
+ class Handler(http.server.BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  server_version = "CobaltPeerCache"
+
+  def log_message(self, format, *args):
+   pass
+
+  def redirect(self, url):
+   count(redirected=1)
+   self.send_response(307)
+   self.send_header("Location", url)
+   self.send_header("Content-Length", "0")
+   self.end_headers()
+
+  def send_file(self, path, source):
+   with open(path, "rb") as file:
+    size = os.fstat(file.fileno()).st_size
+    byte_range = parse_range(self.headers.get("Range"), size)
+    if byte_range is False:
+     self.send_response(416)
+     self.send_header("Content-Range", f"bytes */{size}")
+     self.send_header("Content-Length", "0")
+     self.end_headers()
+     return
+    start, end = byte_range or (0, size - 1)
+    self.send_response(206 if byte_range else 200)
+    if byte_range:
+     self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+    self.send_header("Accept-Ranges", "bytes")
+    self.send_header("Content-Length", str(end - start + 1))
+    self.end_headers()
+    file.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+     chunk = file.read(min(CHUNK_SIZE, remaining))
+     if not chunk:
+      break
+     self.wfile.write(chunk)
+     remaining -= len(chunk)
+   count(**{source: 1, "bytes": end - start + 1 - remaining})
+
+  def fetch_and_send(self, url, cache_file, sha1, revalidate=False):
+   # качает файл в кеш и одновременно отдаёт его клиенту. клиент может отключиться - файл всё равно докачивается.
+   # revalidate - запрос с ETag/Last-Modified файла из кеша, False в ответ - файл не изменился, отдавать кеш
+   headers = {"User-Agent": USER_AGENT}
+   meta_file = cache_file.with_name(cache_file.name + ".meta.json")
+   if revalidate and cache_file.is_file():
+    cache_meta = peer_cache_meta(cache_file)
+    if cache_meta.get("etag"):
+     headers["If-None-Match"] = cache_meta["etag"]
+    if cache_meta.get("last_modified"):
+     headers["If-Modified-Since"] = cache_meta["last_modified"]
+   request = urllib.request.Request(url, headers=headers)
+   part_file = cache_file.with_name(f"{cache_file.name}.{threading.get_ident()}.part")
+   cache_file.parent.mkdir(parents=True, exist_ok=True)
+   try:
+    with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+     cache_meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+     content_length = response.headers.get("Content-Length")
+     self.send_response(200)
+     if content_length:
+      self.send_header("Content-Length", content_length)
+     else:
+      self.send_header("Connection", "close")
+      self.close_connection = True
+     self.end_headers()
+     self.response_started = True
+     client_connected = True
+     hasher = hashlib.sha1()
+     sent = 0
+     with open(part_file, "wb") as out_file:
+      while chunk := response.read(CHUNK_SIZE):
+       out_file.write(chunk)
+       hasher.update(chunk)
+       if client_connected:
+        try:
+         self.wfile.write(chunk)
+         sent += len(chunk)
+        except OSError:
+         client_connected = False
+   except urllib.error.HTTPError as e:
+    if e.code == 304 and ("If-None-Match" in headers or "If-Modified-Since" in headers):
+     return False
+    raise
+   except OSError:
+    # у неудачной загрузки свой .part, следующий клиент начнёт с нуля
+    part_file.unlink(missing_ok=True)
+    raise
+   if content_length and part_file.stat().st_size != int(content_length) or sha1 and hasher.hexdigest() != sha1:
+    part_file.unlink()
+    self.close_connection = True
+   else:
+    os.replace(part_file, cache_file)
+    if revalidate:
+     meta_file.write_text(json.dumps(cache_meta), encoding="utf-8")
+   count(fetched=1, bytes=sent)
+   return True
+
+  def do_GET(self):
+   count(requests=1)
+   with stats_lock:
+    stats["clients"].add(self.client_address[0])
+   parsed = urllib.parse.urlsplit(self.path)
+   query = urllib.parse.parse_qs(parsed.query)
+   url = query.get("url", [""])[0]
+   sha1 = query.get("sha1", [""])[0].lower()
+   upstream = urllib.parse.urlsplit(url)
+   # sha1 становится путём в хранилище, поэтому только 40 hex-символов
+   if parsed.path != "/get" or upstream.scheme not in ("http", "https") or sha1 and not re.fullmatch(r"[0-9a-f]{40}", sha1):
+    self.send_error(400)
+    return
+   store_file = object_path(store_folder, sha1) if sha1 else None
+   if store_file and store_file.resolve().is_relative_to(store_root) and store_file.is_file():
+    self.send_file(store_file, "store")
+    return
+   cache_file = peer_cache_file(cache_folder, url)
+   # без sha1 и не с неизменяемого хоста файл по тому же адресу мог обновиться, кеш сначала перепроверяется
+   fixed_content = bool(sha1) or upstream.hostname in peer_fixed_hosts
+   if fixed_content and cache_file.is_file():
+    self.send_file(cache_file, "cache")
+    return
+   self.response_started = False
+   if upstream.hostname not in allowed_hosts:
+    self.redirect(url)
+    return
+
+   # один и тот же файл с интернета качается один раз, остальные клиенты ждут
+   with stats_lock:
+    fetch_lock = fetch_locks.setdefault(url, threading.Lock())
+   if not fetch_lock.acquire(timeout=PEER_WAIT_SECONDS):
+    self.redirect(url)
+    return
+   try:
+    if fixed_content and cache_file.is_file():
+     self.send_file(cache_file, "cache")
+     return
+    try:
+     if not self.fetch_and_send(url, cache_file, sha1, revalidate=not fixed_content):
+      self.send_file(cache_file, "cache")
+    except (urllib.error.URLError, OSError):
+     # до отправки заголовков клиента можно отправить за файлом самого, после - только оборвать
+     if self.response_started:
+      self.close_connection = True
+     else:
+      self.redirect(url)
+   finally:
+    fetch_lock.release()
+    with stats_lock:
+     fetch_locks.pop(url, None)
+
+ server = http.server.ThreadingHTTPServer((host, port), Handler)
+ server.daemon_threads = True
+ peer_server.update(server=server, port=port, stats=stats, thread=threading.Thread(target=server.serve_forever, daemon=True))
+ peer_server["thread"].start()
+ return stats
+
+
+def stop_peer_server():
+ if peer_server["server"]:
+  peer_server["server"].shutdown()
+  peer_server["server"].server_close()
+  peer_server.update(server=None, thread=None, port=None)
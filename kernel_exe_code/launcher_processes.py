@@ -0,0 +1,340 @@
+# наблюдение за запущенными клиентами игры
+# каждый запуск - сессия: процесс, инстанс, версия, время старта. вывод игры (stdout и stderr) процесс сам
+# пишет в logs/<инстанс>/<время>_<версия>.log, поэтому лог пишется и после закрытия лаунчера.
+# фоновый поток читает этот файл: большой лог копируется в .log.1, .log.2 и обрезается, логи старых сессий
+# удаляются. после выхода процесса по коду возврата и строкам лога видно, упала ли игра
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from launcher_metrics import record_metric
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+# текущий файл сессии и два старых куска
+LOG_KEEP_FILES = 3
+# сколько последних сессий хранить на инстанс
+LOG_KEEP_SESSIONS = 20
+LOG_TAIL_LINES = 40
+LOG_READ_SIZE = 256 * 1024
+# как часто поток сессии заглядывает в лог, когда игра ничего не пишет
+LOG_POLL_SECONDS = 0.5
+
+# строки, по которым видно падение игры, даже если java вышла с кодом 0
+crash_markers = (
+ b"---- Minecraft Crash Report ----",
+ b"#@!@# Game crashed!",
+ b"A fatal error has been detected by the Java Runtime Environment",
+ b"java.lang.OutOfMemoryError",
+ b"Could not create the Java Virtual Machine",
+)
+
+# 0 - без ограничения. лимит памяти считается по сумме -Xmx запущенных клиентов
+process_settings = {"logs_folder": None, "settings_file": None, "max_clients": 0, "max_memory_gb": 0}
+
+game_sessions = []
+sessions_lock = threading.Lock()
+
+
+class ClientLimitReached(Exception):
+ pass
+
+
+def configure_processes(logs_folder, settings_file):
+ process_settings["logs_folder"] = Path(logs_folder)
+ process_settings["settings_file"] = Path(settings_file)
+ try:
+  saved_settings = json.loads(process_settings["settings_file"].read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  saved_settings = {}
+ for setting in ("max_clients", "max_memory_gb"):
+  if isinstance(saved_settings.get(setting), (int, float)):
+   process_settings[setting] = saved_settings[setting]
+
+
+def set_process_limits(max_clients, max_memory_gb):
+ process_settings["max_clients"] = max_clients
+ process_settings["max_memory_gb"] = max_memory_gb
+ settings_file = process_settings["settings_file"]
+ settings_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = settings_file.with_name(settings_file.name + ".tmp")
+ temp_file.write_text(json.dumps({"max_clients": max_clients, "max_memory_gb": max_memory_gb}), encoding="utf-8")
+ os.replace(temp_file, settings_file)
+
+
+def java_heap_bytes(launch_command):
+ # последний -Xmx побеждает, как и у самой java
+ units = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+ heap_bytes = 0
+ for argument in launch_command:
+  match = re.fullmatch(r"-Xmx(\d+)([kKmMgGtT]?)", argument)
+  if match:
+   heap_bytes = int(match.group(1)) * units[match.group(2).lower()]
+ return heap_bytes
+
+
+def running_sessions():
+ with sessions_lock:
+  return [session for session in game_sessions if session["finished"] is None]
+
+
+def list_sessions():
+ with sessions_lock:
+  return list(game_sessions)
+
+
+def check_limits(launch_command):
+ running = running_sessions()
+ max_clients = process_settings["max_clients"]
+ if max_clients and len(running) >= max_clients:
+  raise ClientLimitReached(f"уже запущено клиентов: {len(running)}, лимит {max_clients}")
+ max_memory_gb = process_settings["max_memory_gb"]
+ if max_memory_gb:
+  heap_gb = (sum(session["heap_bytes"] for session in running) + java_heap_bytes(launch_command)) / 1024 ** 3
+  if heap_gb > max_memory_gb:
+   raise ClientLimitReached(f"клиентам понадобится {heap_gb:.1f} ГБ (-Xmx), лимит {max_memory_gb} ГБ")
+
+
+def session_log_file(instance, version):
+ safe_version = re.sub(r"[^\w.-]+", "_", version) or "minecraft"
+ log_folder = process_settings["logs_folder"] / re.sub(r"[^\w.-]+", "_", instance or "default")
+ log_folder.mkdir(parents=True, exist_ok=True)
+ # несколько клиентов, запущенных в одну секунду, получают разные файлы
+ log_name = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{safe_version}"
+ log_file = log_folder / f"{log_name}.log"
+ number = 1
+ while log_file.exists():
+  number += 1
+  log_file = log_folder / f"{log_name}-{number}.log"
+ log_file.touch()
+ return log_file
+
+
+def prune_session_logs(log_folder, keep=LOG_KEEP_SESSIONS):
+ # имена начинаются с даты, поэтому сортировка по имени - сортировка по времени
+ session_logs = sorted(log_folder.glob("*.log"))
+ for old_log in session_logs[:-keep] if keep else session_logs:
+  for old_file in [old_log] + [old_log.with_name(f"{old_log.name}.{number}") for number in range(1, LOG_KEEP_FILES)]:
+   try:
+    old_file.unlink()
+   except OSError:
+    pass
+
+
+def open_game_log(log_file):
+ # дескриптор лога для процесса игры. запись всегда идёт в конец файла, поэтому лаунчер может обрезать лог,
+ # пока игра в него пишет. на windows для этого нужен доступ только FILE_APPEND_DATA
+ if os.name == "nt":
+  import _winapi
+  import msvcrt
+  # FILE_APPEND_DATA | SYNCHRONIZE, общий доступ на чтение, запись и удаление, OPEN_ALWAYS, FILE_ATTRIBUTE_NORMAL
+  handle = _winapi.CreateFile(str(log_file), 0x00100004, 0x7, 0, 4, 0x80, 0)
+  return msvcrt.open_osfhandle(handle, os.O_APPEND)
+ return os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+
+
+def rotate_log(log_file):
+ # .log.1 -> .log.2, самый старый кусок удаляется. сам .log копируется в .log.1 и обрезается, а не переименовывается:
+ # игра держит его открытым. строки, записанные между копированием и обрезкой, теряются
+ for number in range(LOG_KEEP_FILES - 1, 0, -1):
+  older_file = log_file.with_name(f"{log_file.name}.{number}")
+  if not older_file.exists():
+   continue
+  if number == LOG_KEEP_FILES - 1:
+   older_file.unlink()
+  else:
+   os.replace(older_file, log_file.with_name(f"{log_file.name}.{number + 1}"))
+ shutil.copyfile(log_file, log_file.with_name(f"{log_file.name}.1"))
+ with open(log_file, "r+b") as out_file:
+  out_file.truncate(0)
+
+
+def read_log_line(session, line):
+ session["tail"].append(line)
+ if session["crash_line"] is None and any(marker in line for marker in crash_markers):
+  session["crash_line"] = line.decode("utf-8", "replace").strip()
+
+
+def watch_session(session):
+ # читает лог, который пишет игра, пока процесс жив, потом дочитывает остаток
+ process = session["process"]
+ log_file = session["log_file"]
+ pending = b""
+ try:
+  with open(log_file, "rb") as in_file:
+   while True:
+    exited = process.poll() is not None
+    chunk = in_file.read(LOG_READ_SIZE)
+    if not chunk:
+     if exited:
+      break
+     time.sleep(LOG_POLL_SECONDS)
+     continue
+    lines = (pending + chunk).split(b"\n")
+    pending = lines.pop()
+    for line in lines:
+     read_log_line(session, line + b"\n")
+    if in_file.tell() >= LOG_MAX_BYTES and not exited:
+     rotate_log(log_file)
+     in_file.seek(0)
+ except OSError:
+  pass
+ if pending:
+  read_log_line(session, pending)
+
+ session["exit_code"] = process.wait()
+ # остановленный из лаунчера клиент не считается упавшим
+ session["crashed"] = not session["stopped"] and (session["exit_code"] != 0 or session["crash_line"] is not None)
+ session["finished"] = time.time()
+ record_metric("session", session["label"], ms=round((session["finished"] - session["started"]) * 1000), exit_code=session["exit_code"], crashed=session["crashed"])
+
+
+def start_game(launch_command, label, instance, version):
+ # возвращает сессию, ClientLimitReached если лимиты не дают запустить ещё один клиент
+ import subprocess
+ check_limits(launch_command)
+ log_file = session_log_file(instance, version)
+ prune_session_logs(log_file.parent)
+
+ # окно консоли больше не нужно: весь вывод игры уходит в лог сессии. игра пишет в файл сама и живёт
+ # в своей сессии, поэтому закрытие лаунчера (или --detach) её не останавливает и лог не обрывается
+ creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+ log_descriptor = open_game_log(log_file)
+ try:
+  process = subprocess.Popen(launch_command, stdin=subprocess.DEVNULL, stdout=log_descriptor, stderr=subprocess.STDOUT, creationflags=creationflags, start_new_session=os.name != "nt")
+ finally:
+  os.close(log_descriptor)
+ session = {
+  "label": label,
+  "instance": instance,
+  "version": version,
+  "pid": process.pid,
+  "process": process,
+  "heap_bytes": java_heap_bytes(launch_command),
+  "log_file": log_file,
+  "started": time.time(),
+  "finished": None,
+  "exit_code": None,
+  "crashed": False,
+  "stopped": False,
+  "crash_line": None,
+  "tail": deque(maxlen=LOG_TAIL_LINES),
+  "cpu_sample": None,
+  "reported": False,
+ }
+ with sessions_lock:
+  game_sessions.append(session)
+ session["thread"] = threading.Thread(target=watch_session, args=(session,), daemon=True)
+ session["thread"].start()
+ return session
+
+
+def stop_game(session, force=False):
+ # terminate на windows сразу завершает процесс, на linux отправляет SIGTERM
+ if session["finished"] is not None:
+  return False
+ session["stopped"] = True
+ try:
+  if force:
+   session["process"].kill()
+  else:
+   session["process"].terminate()
+ except OSError:
+  return False
+ return True
+
+
+def pop_finished_sessions():
+ # завершённые сессии, о которых ещё не сообщали пользователю
+ finished = []
+ with sessions_lock:
+  for session in game_sessions:
+   if session["finished"] is not None and not session["reported"]:
+    session["reported"] = True
+    finished.append(session)
+ return finished
+
+
+def session_uptime(session):
+ return (session["finished"] or time.time()) - session["started"]
+
+
+def session_log_tail(session, lines=LOG_TAIL_LINES):
+ return [line.decode("utf-8", "replace").rstrip() for line in list(session["tail"])[-lines:]]
+
+
+def read_process_counters(pid):
+ # (rss в байтах, процессорное время в секундах) или None, если узнать нельзя
+ if sys.platform.startswith("linux"):
+  try:
+   stat_fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+   resident_pages = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+  except (OSError, IndexError, ValueError):
+   return None
+  # после имени процесса: state, ppid, ... utime и stime - 12 и 13 поля
+  cpu_seconds = (int(stat_fields[11]) + int(stat_fields[12])) / os.sysconf("SC_CLK_TCK")
+  return resident_pages * os.sysconf("SC_PAGE_SIZE"), cpu_seconds
+
+ if os.name == "nt":
+  import ctypes
+  from ctypes import wintypes
+
+  class ProcessMemoryCounters(ctypes.Structure):
+   _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD), ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t), ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t), ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t), ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+  kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+  # без argtypes 64-битный HANDLE обрезался бы до int
+  kernel32.OpenProcess.restype = wintypes.HANDLE
+  kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+  kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [ctypes.POINTER(wintypes.FILETIME)] * 4
+  kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+  # PROCESS_QUERY_LIMITED_INFORMATION
+  handle = kernel32.OpenProcess(0x1000, False, pid)
+  if not handle:
+   return None
+  try:
+   counters = ProcessMemoryCounters()
+   counters.cb = ctypes.sizeof(counters)
+   creation_time, exit_time, kernel_time, user_time = (wintypes.FILETIME() for _ in range(4))
+   if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+    return None
+   if not kernel32.GetProcessTimes(handle, ctypes.byref(creation_time), ctypes.byref(exit_time), ctypes.byref(kernel_time), ctypes.byref(user_time)):
+    return None
+  finally:
+   kernel32.CloseHandle(handle)
+  # FILETIME считается в 100 нс
+  cpu_seconds = sum((filetime.dwHighDateTime << 32 | filetime.dwLowDateTime) for filetime in (kernel_time, user_time)) / 10_000_000
+  return counters.WorkingSetSize, cpu_seconds
+
+ return None
+
+
+def session_usage(session):
+ # (rss в байтах, загрузка процессора в % одного ядра с прошлого замера) или None.
+ # первый замер считает среднюю загрузку с момента запуска
+ if session["finished"] is not None:
+  return None
+ counters = read_process_counters(session["pid"])
+ if counters is None:
+  return None
+ rss_bytes, cpu_seconds = counters
+ now = time.time()
+ sample_time, sample_cpu = session["cpu_sample"] or (session["started"], 0.0)
+ session["cpu_sample"] = (now, cpu_seconds)
+ cpu_percent = (cpu_seconds - sample_cpu) / max(now - sample_time, 0.001) * 100
+ return rss_bytes, cpu_percent
+
+
+def format_uptime(seconds):
+ seconds = int(seconds)
+ if seconds >= 3600:
+  return f"{seconds // 3600} ч {seconds % 3600 // 60} мин"
+ if seconds >= 60:
+  return f"{seconds // 60} мин {seconds % 60} с"
+ return f"{seconds} с"
@@ -0,0 +1,180 @@
+# общее хранилище файлов по sha1
+# библиотеки, ассеты и файлы версий из minecraft_vanilla и каждой папки modloader_minecraft
+# хранятся один раз в store/objects, а в деревья ставятся жёсткие ссылки (или копии, если ссылки не поддерживаются)
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+HASH_CHUNK_SIZE = 1024 * 1024
+STORE_WORKERS = 8
+
+# в этих папках лежат неизменяемые файлы игры, всё остальное (конфиги, логи) не трогаем
+shared_folders = {"libraries", "assets", "versions"}
+
+store_lock = threading.Lock()
+
+
+def object_path(store_folder, sha1):
+ return Path(store_folder) / "objects" / sha1[:2] / sha1
+
+
+def file_sha1(path):
+ import hashlib
+ hasher = hashlib.sha1()
+ with open(path, "rb") as file:
+  while True:
+   chunk = file.read(HASH_CHUNK_SIZE)
+   if not chunk:
+    break
+   hasher.update(chunk)
+ return hasher.hexdigest()
+
+
+def place_object(object_file, target):
+ # ссылка ставится через временное имя и os.replace, чтобы файл в дереве не пропадал ни на миг
+ target = Path(target)
+ target.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = target.with_name(target.name + ".store")
+ if temp_file.exists():
+  temp_file.unlink()
+ try:
+  os.link(object_file, temp_file)
+  linked = True
+ except OSError:
+  shutil.copyfile(object_file, temp_file)
+  linked = False
+ os.replace(temp_file, target)
+ return linked
+
+
+def restore_from_store(store_folder, sha1, target):
+ object_file = object_path(store_folder, sha1)
+ if not object_file.is_file():
+  return False
+ place_object(object_file, target)
+ return True
+
+
+def store_file(store_folder, path, sha1):
+ # возвращает сколько байт освобождено: файл заменён ссылкой на уже существующий объект
+ path = Path(path)
+ object_file = object_path(store_folder, sha1)
+ with store_lock:
+  if not object_file.exists():
+   object_file.parent.mkdir(parents=True, exist_ok=True)
+   try:
+    os.link(path, object_file)
+   except FileExistsError:
+    pass
+   except OSError:
+    shutil.copyfile(path, object_file)
+   return 0
+ path_stat = path.stat()
+ if os.path.samestat(path_stat, object_file.stat()):
+  return 0
+ if place_object(object_file, path):
+  return path_stat.st_size
+ return 0
+
+
+def load_store_index(store_folder):
+ index_file = Path(store_folder) / "index.json"
+ try:
+  return json.loads(index_file.read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return {}
+
+
+def save_store_index(store_folder, index):
+ index_file = Path(store_folder) / "index.json"
+ index_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = index_file.with_name("index.json.tmp")
+ temp_file.write_text(json.dumps(index), encoding="utf-8")
+ os.replace(temp_file, index_file)
+
+
+def shared_tree_files(tree_folder):
+ tree_folder = Path(tree_folder)
+ for folder, _, file_names in os.walk(tree_folder):
+  relative_parts = Path(folder).relative_to(tree_folder).parts
+  if not shared_folders.intersection(relative_parts):
+   continue
+  for file_name in file_names:
+   if file_name.endswith((".part", ".store", ".tmp")):
+    continue
+   yield Path(folder) / file_name
+
+
+def deduplicate_trees(tree_folders, store_folder, workers=STORE_WORKERS):
+ # sha1 пересчитывается только для файлов, у которых поменялись размер или mtime
+ index = load_store_index(store_folder)
+ stats = {"files": 0, "hashed": 0, "deduplicated": 0, "saved_bytes": 0}
+ seen_paths = set()
+
+ def process(path):
+  stat = path.stat()
+  cached = index.get(str(path))
+  if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+   sha1 = cached[2]
+   hashed = False
+  else:
+   sha1 = file_sha1(path)
+   hashed = True
+  saved_bytes = store_file(store_folder, path, sha1)
+  stat = path.stat()
+  return str(path), [stat.st_size, stat.st_mtime_ns, sha1], hashed, saved_bytes
+
+ from concurrent.futures import ThreadPoolExecutor
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  paths = [path for tree_folder in tree_folders if Path(tree_folder).is_dir() for path in shared_tree_files(tree_folder)]
+  for path, entry, hashed, saved_bytes in executor.map(process, paths):
+   index[path] = entry
+   seen_paths.add(path)
+   stats["files"] += 1
+   stats["hashed"] += hashed
+   stats["deduplicated"] += saved_bytes > 0
+   stats["saved_bytes"] += saved_bytes
+
+ # записи удалённых файлов из обработанных деревьев больше не нужны
+ tree_prefixes = tuple(str(Path(tree_folder)) + os.sep for tree_folder in tree_folders)
+ for path in [path for path in index if path.startswith(tree_prefixes) and path not in seen_paths]:
+  del index[path]
+
+ save_store_index(store_folder, index)
+ return stats
+
+
+def collect_garbage(tree_folders, store_folder):
+ # объект нужен, если на него есть жёсткая ссылка из дерева или его sha1 есть в индексе деревьев
+ # записи деревьев, которых больше нет в списке (удалённые модлоадеры), выкидываются из индекса
+ deduplicate_trees(tree_folders, store_folder)
+ tree_prefixes = tuple(str(Path(tree_folder)) + os.sep for tree_folder in tree_folders)
+ index = {path: entry for path, entry in load_store_index(store_folder).items() if path.startswith(tree_prefixes)}
+ save_store_index(store_folder, index)
+ referenced = {entry[2] for entry in index.values()}
+ stats = {"objects": 0, "removed": 0, "freed_bytes": 0}
+ objects_folder = Path(store_folder) / "objects"
+ if not objects_folder.is_dir():
+  return stats
+
+ for object_file in objects_folder.glob("*/*"):
+  stats["objects"] += 1
+  object_stat = object_file.stat()
+  if object_stat.st_nlink > 1 or object_file.name in referenced:
+   continue
+  object_file.unlink()
+  stats["removed"] += 1
+  stats["freed_bytes"] += object_stat.st_size
+ return stats
+
+
+def verify_store(store_folder, workers=STORE_WORKERS):
+ # содержимое каждого объекта должно совпадать с его именем, битые объекты возвращаются списком
+ objects_folder = Path(store_folder) / "objects"
+ object_files = list(objects_folder.glob("*/*")) if objects_folder.is_dir() else []
+ from concurrent.futures import ThreadPoolExecutor
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  hashes = executor.map(file_sha1, object_files)
+  return len(object_files), [object_file for object_file, sha1 in zip(object_files, hashes) if sha1 != object_file.name]
@@ -0,0 +1,215 @@
+# обновление модулей лаунчера и плагинов по манифесту хешей
+# манифест: {"version", "base_url", "kernel", "files": {"launcher_models/x.py": {"sha256", "size", "url"}}, "removed": [...]}.
+# модули пользуются подсистемами kernel_exe_code и глобальными переменными ядра, а они обновляются только вместе
+# с KERNEL.exe, поэтому манифест для ядра старше "kernel" не применяется.
+# качаются только файлы, чей sha256 отличается от локального, параллельно и в cache/update/staging.
+# применение: старые версии файлов уходят в cache/update/backup, новые встают на место через os.replace,
+# журнал cache/update/journal.json позволяет откатить прерванное обновление при следующем запуске
+# и вернуть предыдущую версию командой. реестр команд ядра подхватывает изменённые модули перед
+# следующей командой, перезапуск лаунчера не нужен
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from launcher_downloads import download_files
+from launcher_extract import member_parts
+from launcher_metrics import record_metric
+
+UPDATE_WORKERS = 8
+# версия ядра для манифеста: поднимается, когда модулям нужно то, чего нет в ядре предыдущей версии
+# (новый launcher_*.py, новая функция в нём или глобальная переменная ядра)
+KERNEL_VERSION = 1
+# обновлять можно только эти папки лаунчера
+update_folders = {"launcher_models", "plugins"}
+
+
+class UpdateError(Exception):
+ pass
+
+
+def file_sha256(path):
+ import hashlib
+ hasher = hashlib.sha256()
+ with open(path, "rb") as file:
+  for chunk in iter(lambda: file.read(1024 * 1024), b""):
+   hasher.update(chunk)
+ return hasher.hexdigest()
+
+
+def update_paths(root_folder):
+ update_folder = Path(root_folder) / "cache" / "update"
+ return update_folder / "staging", update_folder / "backup", update_folder / "journal.json"
+
+
+def checked_relative_path(relative_path):
+ # путь из манифеста: только внутри update_folders, без выхода наружу через ..
+ parts = member_parts(relative_path)
+ if not parts or len(parts) < 2 or parts[0] not in update_folders:
+  raise UpdateError(f"недопустимый путь в манифесте: {relative_path}")
+ return Path(*parts)
+
+
+def plan_update(manifest, root_folder):
+ # возвращает {"version", "changed": [(путь, запись)], "removed": [путь], "unchanged"}.
+ # модули лаунчера ставятся всегда, плагины только обновляются, если уже установлены
+ root_folder = Path(root_folder)
+ required_kernel = manifest.get("kernel", 0)
+ if not isinstance(required_kernel, int) or required_kernel > KERNEL_VERSION:
+  raise UpdateError(f"модулям версии {manifest.get('version') or '?'} нужно ядро {required_kernel}, у этого лаунчера {KERNEL_VERSION}. Скачайте новый KERNEL.exe")
+ plan = {"version": manifest.get("version", ""), "changed": [], "removed": [], "unchanged": 0}
+ base_url = manifest.get("base_url", "").rstrip("/")
+ for relative_path, entry in sorted(manifest.get("files", {}).items()):
+  relative = checked_relative_path(relative_path)
+  local_file = root_folder / relative
+  if not local_file.is_file():
+   if relative.parts[0] == "plugins":
+    continue
+  elif local_file.stat().st_size == entry.get("size", -1) and file_sha256(local_file) == entry["sha256"]:
+   plan["unchanged"] += 1
+   continue
+  url = entry.get("url") or f"{base_url}/{relative.as_posix()}"
+  plan["changed"].append((relative, dict(entry, url=url)))
+ for relative_path in manifest.get("removed", []):
+  relative = checked_relative_path(relative_path)
+  if (root_folder / relative).is_file():
+   plan["removed"].append(relative)
+ return plan
+
+
+def write_journal(journal_file, journal):
+ journal_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = journal_file.with_name("journal.json.tmp")
+ temp_file.write_text(json.dumps(journal, ensure_ascii=False, indent=1), encoding="utf-8")
+ os.replace(temp_file, journal_file)
+
+
+def read_journal(root_folder):
+ try:
+  return json.loads(update_paths(root_folder)[2].read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return None
+
+
+def restore_backup(root_folder, journal):
+ # возвращает файлам состояние до обновления из журнала: заменённые - из backup, новые - удаляются
+ root_folder = Path(root_folder)
+ backup_folder = update_paths(root_folder)[1]
+ for relative_path in journal["files"]:
+  target = root_folder / relative_path
+  backup_file = backup_folder / relative_path
+  if backup_file.is_file():
+   target.parent.mkdir(parents=True, exist_ok=True)
+   os.replace(backup_file, target)
+  elif relative_path in journal["created"] and target.is_file():
+   target.unlink()
+
+
+def apply_update(plan, root_folder, workers=UPDATE_WORKERS, progress=None):
+ # возвращает {"version", "downloaded", "removed", "bytes", "seconds"}, при ошибке всё откатывается и UpdateError
+ started = time.perf_counter()
+ root_folder = Path(root_folder)
+ staging_folder, backup_folder, journal_file = update_paths(root_folder)
+ recover_update(root_folder)
+ shutil.rmtree(staging_folder, ignore_errors=True)
+
+ jobs = [{"name": relative.as_posix(), "url": entry["url"], "target": staging_folder / relative, "sha256": entry["sha256"]} for relative, entry in plan["changed"]]
+ results = download_files(jobs, workers=workers, progress=progress) if jobs else {}
+ failed = [f"{name}: {result}" for name, result in results.items() if isinstance(result, Exception)]
+ if failed:
+  shutil.rmtree(staging_folder, ignore_errors=True)
+  raise UpdateError(f"не скачано файлов: {len(failed)}, первая ошибка: {failed[0]}")
+
+ # прошлый backup больше не нужен: откатиться можно только на одно обновление назад
+ shutil.rmtree(backup_folder, ignore_errors=True)
+ touched = [relative for relative, _ in plan["changed"]] + plan["removed"]
+ journal = {
+  "version": plan["version"],
+  "previous_version": installed_update_version(root_folder),
+  "state": "applying",
+  "files": [relative.as_posix() for relative in touched],
+  "created": [relative.as_posix() for relative in touched if not (root_folder / relative).exists()],
+  "time": time.time(),
+ }
+ write_journal(journal_file, journal)
+ try:
+  for relative in touched:
+   target = root_folder / relative
+   if target.exists():
+    (backup_folder / relative).parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(target, backup_folder / relative)
+  for relative, _ in plan["changed"]:
+   (root_folder / relative).parent.mkdir(parents=True, exist_ok=True)
+   os.replace(staging_folder / relative, root_folder / relative)
+  for relative in plan["removed"]:
+   (root_folder / relative).unlink()
+ except OSError as e:
+  restore_backup(root_folder, journal)
+  journal["state"] = "rolled_back"
+  write_journal(journal_file, journal)
+  raise UpdateError(f"обновление откачено: {e}") from e
+ finally:
+  shutil.rmtree(staging_folder, ignore_errors=True)
+
+ journal["state"] = "applied"
+ write_journal(journal_file, journal)
+ stats = {"version": plan["version"], "downloaded": len(plan["changed"]), "removed": len(plan["removed"]), "bytes": sum(entry.get("size", 0) for _, entry in plan["changed"]), "seconds": time.perf_counter() - started}
+ record_metric("update", plan["version"] or "обновление", ms=round(stats["seconds"] * 1000, 1), bytes=stats["bytes"], files=stats["downloaded"])
+ return stats
+
+
+def installed_update_version(root_folder):
+ # версия модулей по журналу, "" - обновлений ещё не было
+ journal = read_journal(root_folder) or {}
+ if journal.get("state") == "applied":
+  return journal.get("version", "")
+ return journal.get("previous_version", "")
+
+
+def recover_update(root_folder):
+ # обновление прервалось посреди замены файлов - возвращаем прежние. True, если что-то откатили
+ journal = read_journal(root_folder)
+ if not journal or journal.get("state") != "applying":
+  return False
+ restore_backup(root_folder, journal)
+ journal["state"] = "rolled_back"
+ write_journal(update_paths(root_folder)[2], journal)
+ return True
+
+
+def rollback_update(root_folder):
+ # откат последнего применённого обновления, возвращает его журнал или None
+ journal = read_journal(root_folder)
+ if not journal or journal.get("state") != "applied":
+  return None
+ restore_backup(root_folder, journal)
+ journal["state"] = "rolled_back"
+ write_journal(update_paths(root_folder)[2], journal)
+ return journal
+
+
+def build_update_manifest(source_folders, version="", base_url=""):
+ # манифест для публикации: source_folders - {папка в манифесте: папка репозитория},
+ # файл качается с base_url/<папка репозитория>/<имя>
+ manifest = {"version": version, "base_url": base_url, "kernel": KERNEL_VERSION, "files": {}, "removed": []}
+ for manifest_folder, local_folder in source_folders.items():
+  for path in sorted(Path(local_folder).glob("*.py")):
+   manifest["files"][f"{manifest_folder}/{path.name}"] = {"sha256": file_sha256(path), "size": path.stat().st_size, "url": f"{base_url}/{Path(local_folder).name}/{path.name}"}
+ return manifest
+
+
+if __name__ == "__main__":
+ # python kernel_exe_code/launcher_update.py [версия] - пересобрать update_manifest.json в корне репозитория
+ # после изменения launcher_modules (хеши считаются по файлам как они лежат в git)
+ repository_folder = Path(__file__).resolve().parent.parent
+ manifest_file = repository_folder / "update_manifest.json"
+ try:
+  previous_files = json.loads(manifest_file.read_text(encoding="utf-8"))["files"]
+ except (OSError, ValueError, KeyError):
+  previous_files = {}
+ manifest = build_update_manifest({"launcher_models": repository_folder / "launcher_modules"}, sys.argv[1] if len(sys.argv) > 1 else time.strftime("%Y.%m.%d"), "https://raw.githubusercontent.com/m1r0tv0rets/Cobalt_Launcher_Nano/main")
+ manifest["removed"] = sorted(set(previous_files) - set(manifest["files"]))
+ manifest_file.write_text(json.dumps(manifest, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+ print(f"{manifest_file}: файлов {len(manifest['files'])}, удалённых {len(manifest['removed'])}")
@@ -0,0 +1,312 @@
+# проверка и восстановление установленных версий и джавы
+# библиотеки, ассеты, клиент и индекс ассетов сверяются с sha1 и размером из json версий, распакованные архивы
+# (джава, модлоадеры) - с размерами и CRC32 из EXTRACT_MANIFEST. проверенные файлы запоминаются в cache/verified.json
+# по размеру и mtime, поэтому повторная проверка хеширует только изменившиеся файлы. целиком проверенная версия
+# запоминается вместе с размерами и mtime всех своих файлов: перед запуском достаточно сравнить их с диском.
+# восстанавливаются только битые и пропавшие файлы
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from launcher_install import load_version_json, version_files, download_missing, extract_natives, INSTALL_WORKERS
+from launcher_store import file_sha1, object_path
+from launcher_extract import EXTRACT_MANIFEST, file_crc32
+from launcher_metrics import record_metric
+
+VERIFY_WORKERS = 8
+
+
+class VerifyError(Exception):
+ pass
+
+verified_stamps = {}
+stamps_lock = threading.Lock()
+
+
+def load_verified(cache_folder):
+ stamps_file = Path(cache_folder) / "verified.json"
+ with stamps_lock:
+  if str(stamps_file) not in verified_stamps:
+   # files - проверенные файлы {путь: [размер, mtime, хеш]}, versions - целиком проверенные версии
+   try:
+    stamps = json.loads(stamps_file.read_text(encoding="utf-8"))
+   except (OSError, ValueError):
+    stamps = {}
+   if not isinstance(stamps.get("files"), dict) or not isinstance(stamps.get("versions"), dict):
+    stamps = {"files": {}, "versions": {}}
+   verified_stamps[str(stamps_file)] = stamps
+  return verified_stamps[str(stamps_file)]
+
+
+def save_verified(cache_folder):
+ stamps_file = Path(cache_folder) / "verified.json"
+ with stamps_lock:
+  stamps = json.dumps(verified_stamps.get(str(stamps_file), {}))
+ stamps_file.parent.mkdir(parents=True, exist_ok=True)
+ temp_file = stamps_file.with_name("verified.json.tmp")
+ temp_file.write_text(stamps, encoding="utf-8")
+ os.replace(temp_file, stamps_file)
+
+
+def is_stamped(path, size, expected, method, stamps):
+ # файл не менялся с прошлой проверки, определяется без хеширования
+ try:
+  path_stat = os.stat(path)
+ except OSError:
+  return False
+ if method is None:
+  return size is None or path_stat.st_size == size
+ return stamps.get(str(path)) == [path_stat.st_size, path_stat.st_mtime_ns, expected]
+
+
+def remember_entries(entries, stamps):
+ # штампы файлов, которые уже сверены при скачивании или распаковке, пишутся без повторного хеширования
+ fresh_stamps = {}
+ for path, size, expected, method in entries:
+  try:
+   path_stat = os.stat(path)
+  except OSError:
+   continue
+  if method is not None and (size is None or path_stat.st_size == size):
+   fresh_stamps[str(path)] = [path_stat.st_size, path_stat.st_mtime_ns, expected]
+ with stamps_lock:
+  stamps.update(fresh_stamps)
+
+
+def check_file(path, size, expected, method, stamps):
+ # "ok" - файл не менялся с прошлой проверки, "hashed" - проверен заново, "missing", "broken".
+ # method: "sha1", "crc32" или None - только наличие и размер
+ key = str(path)
+ try:
+  path_stat = os.stat(path)
+ except OSError:
+  with stamps_lock:
+   stamps.pop(key, None)
+  return "missing"
+ if size is not None and path_stat.st_size != size:
+  with stamps_lock:
+   stamps.pop(key, None)
+  return "broken"
+ if method is None:
+  return "ok"
+ stamp = [path_stat.st_size, path_stat.st_mtime_ns, expected]
+ if stamps.get(key) == stamp:
+  return "ok"
+ actual = file_sha1(path) if method == "sha1" else file_crc32(path)
+ # check_file зовётся из потоков пула, а save_verified сериализует тот же словарь
+ with stamps_lock:
+  if actual != expected:
+   stamps.pop(key, None)
+   return "broken"
+  stamps[key] = stamp
+ return "hashed"
+
+
+def verify_entries(entries, cache_folder, workers=VERIFY_WORKERS, progress=None):
+ # entries - [(путь, размер, ожидаемый хеш, метод)]. возвращает {"files", "ok", "hashed", "missing", "broken"},
+ # в missing и broken - номера записей. файлы, чей штамп совпал, отсеиваются без пула потоков
+ from concurrent.futures import ThreadPoolExecutor
+ stamps = load_verified(cache_folder)["files"]
+ result = {"files": len(entries), "ok": 0, "hashed": 0, "missing": [], "broken": []}
+ pending = []
+ for number, entry in enumerate(entries):
+  if is_stamped(*entry, stamps):
+   result["ok"] += 1
+  else:
+   pending.append(number)
+
+ if pending:
+  with ThreadPoolExecutor(max_workers=workers) as executor:
+   states = executor.map(lambda number: check_file(*entries[number], stamps), pending)
+   for done, (number, state) in enumerate(zip(pending, states), start=1):
+    if state in ("ok", "hashed"):
+     result[state] += 1
+    else:
+     result[state].append(number)
+    if progress and done % 100 == 0:
+     progress(done, len(pending))
+ return result
+
+
+def version_chain_files(version_id, minecraft_folder):
+ # файлы версии вместе с родителями из inheritsFrom, без повторов, и json версий цепочки
+ minecraft_folder = Path(minecraft_folder)
+ files = {}
+ version_jsons = []
+ while version_id:
+  version_jsons.append(minecraft_folder / "versions" / version_id / f"{version_id}.json")
+  version_data = load_version_json(version_id, minecraft_folder)
+  for file in version_files(version_id, version_data, minecraft_folder):
+   file["version"] = version_id
+   files.setdefault(str(file["path"]), file)
+  version_id = version_data.get("inheritsFrom")
+ return list(files.values()), version_jsons
+
+
+def version_entries(version_id, minecraft_folder):
+ # файлы цепочки версии, записи для проверки и json версий. файлы модлоадера, распакованного из архива,
+ # которых нет в json, сверяются по CRC32
+ minecraft_folder = Path(minecraft_folder)
+ files, version_jsons = version_chain_files(version_id, minecraft_folder)
+ entries = [(file["path"], file.get("size"), file.get("sha1"), "sha1" if file.get("sha1") else None) for file in files]
+ known_paths = {str(file["path"]) for file in files}
+ for archive_folder in (minecraft_folder, minecraft_folder.parent):
+  extracted = archive_entries(archive_folder)
+  if extracted:
+   entries += [entry for entry in extracted if str(entry[0]) not in known_paths]
+   break
+ return files, entries, version_jsons
+
+
+def files_snapshot(folder, paths):
+ # [[путь от folder, размер, mtime]], None - какого-то файла нет
+ snapshot = []
+ for path in paths:
+  try:
+   path_stat = os.stat(path)
+  except OSError:
+   return None
+  snapshot.append([os.path.relpath(path, folder), path_stat.st_size, path_stat.st_mtime_ns])
+ return snapshot
+
+
+def snapshot_matches(folder, snapshot):
+ for relative_path, size, mtime in snapshot:
+  try:
+   path_stat = os.stat(os.path.join(folder, relative_path))
+  except OSError:
+   return False
+  if path_stat.st_size != size or path_stat.st_mtime_ns != mtime:
+   return False
+ return True
+
+
+def archive_entries(folder):
+ # записи из списка файлов распакованного архива или None, если списка нет (установлено до его появления)
+ folder = Path(folder)
+ try:
+  archive_files = json.loads((folder / EXTRACT_MANIFEST).read_text(encoding="utf-8"))
+ except (OSError, ValueError):
+  return None
+ return [(folder / relative_path, size, crc, "crc32") for relative_path, (size, crc) in archive_files.items()]
+
+
+def forget_broken_objects(files, store_folder):
+ # битый файл в дереве - обычно жёсткая ссылка на объект хранилища, тогда испорчен и объект
+ for file in files:
+  if not file.get("sha1"):
+   continue
+  object_file = object_path(store_folder, file["sha1"])
+  try:
+   if object_file.is_file() and file_sha1(object_file) != file["sha1"]:
+    object_file.unlink()
+  except OSError:
+   pass
+
+
+def verify_version(version_id, minecraft_folder, cache_folder, repair=False, store_folder=None, workers=VERIFY_WORKERS, progress=None):
+ # возвращает {"files", "ok", "hashed", "missing", "broken", "repaired", "unrepairable", "seconds"},
+ # в missing, broken и unrepairable - пути
+ started = time.perf_counter()
+ minecraft_folder = Path(minecraft_folder)
+ files, entries, version_jsons = version_entries(version_id, minecraft_folder)
+
+ result = verify_entries(entries, cache_folder, workers, progress)
+ result["repaired"] = 0
+ bad_numbers = result["missing"] + result["broken"]
+ result["missing"] = [entries[number][0] for number in result["missing"]]
+ result["broken"] = [entries[number][0] for number in result["broken"]]
+ repairable = [files[number] for number in bad_numbers if number < len(files)]
+ result["unrepairable"] = [entries[number][0] for number in bad_numbers if number >= len(files)]
+
+ if repair and repairable:
+  for file in repairable:
+   if file["path"].exists():
+    file["path"].unlink()
+  if store_folder:
+   forget_broken_objects(repairable, store_folder)
+  download_missing(repairable, INSTALL_WORKERS, store_folder=store_folder)
+  # скачанное уже сверено по sha1 при загрузке, натив нужно распаковать заново
+  stamps = load_verified(cache_folder)["files"]
+  for file in repairable:
+   check_file(file["path"], file.get("size"), file.get("sha1"), "sha1" if file.get("sha1") else None, stamps)
+   if "extract" in file:
+    extract_natives(file["path"], minecraft_folder / "versions" / file["version"] / "natives", file["extract"].get("exclude", []))
+  result["repaired"] = len(repairable)
+
+ # версия, где все файлы в порядке, запоминается целиком для быстрой проверки перед запуском
+ versions = load_verified(cache_folder)["versions"]
+ version_key = f"{minecraft_folder}|{version_id}"
+ snapshot = files_snapshot(minecraft_folder, version_jsons + [entry[0] for entry in entries]) if not result["unrepairable"] and (repair or not bad_numbers) else None
+ if snapshot != versions.get(version_key):
+  with stamps_lock:
+   if snapshot is None:
+    versions.pop(version_key, None)
+   else:
+    versions[version_key] = snapshot
+  save_verified(cache_folder)
+ elif result["hashed"] or bad_numbers:
+  save_verified(cache_folder)
+ result["seconds"] = time.perf_counter() - started
+ record_metric("verify", version_id, ms=round(result["seconds"] * 1000, 1), files=result["files"], hashed=result["hashed"], broken=len(bad_numbers))
+ return result
+
+
+def remember_install(version_id, minecraft_folder, cache_folder, fetched):
+ # установщик сверил скачанные файлы с sha1, а в хранилище объекты попадают только после такой же сверки,
+ # поэтому их штампы пишутся сразу. если после этого штамп есть у всех файлов цепочки, версия запоминается
+ # целиком и первый запуск обходится без проверки
+ minecraft_folder = Path(minecraft_folder)
+ verified = load_verified(cache_folder)
+ remember_entries([(file["path"], file.get("size"), file["sha1"], "sha1") for file in fetched if file.get("sha1")], verified["files"])
+ files, entries, version_jsons = version_entries(version_id, minecraft_folder)
+ if all(is_stamped(*entry, verified["files"]) for entry in entries):
+  snapshot = files_snapshot(minecraft_folder, version_jsons + [entry[0] for entry in entries])
+  if snapshot is not None:
+   with stamps_lock:
+    verified["versions"][f"{minecraft_folder}|{version_id}"] = snapshot
+ save_verified(cache_folder)
+
+
+def remember_extracted(folder, cache_folder):
+ # extract_archive сверил каждый файл с CRC32 архива, повторная проверка перед запуском не нужна
+ entries = archive_entries(folder)
+ if entries:
+  remember_entries(entries, load_verified(cache_folder)["files"])
+  save_verified(cache_folder)
+
+
+def verify_runtime(java_folder, cache_folder, workers=VERIFY_WORKERS):
+ # распакованная джава по списку файлов архива. None - списка нет, проверить нельзя
+ entries = archive_entries(java_folder)
+ if entries is None:
+  return None
+ started = time.perf_counter()
+ result = verify_entries(entries, cache_folder, workers)
+ result["missing"] = [entries[number][0] for number in result["missing"]]
+ result["broken"] = [entries[number][0] for number in result["broken"]]
+ if result["hashed"] or result["missing"] or result["broken"]:
+  save_verified(cache_folder)
+ result["seconds"] = time.perf_counter() - started
+ record_metric("verify", Path(java_folder).name, ms=round(result["seconds"] * 1000, 1), files=result["files"], hashed=result["hashed"], broken=len(result["missing"]) + len(result["broken"]))
+ return result
+
+
+def verify_before_launch(version_id, minecraft_folder, java_exe, cache_folder):
+ # быстрая проверка перед запуском: хешируются только файлы, изменившиеся с прошлой проверки,
+ # пропавшие и битые файлы версии докачиваются. повреждённую джаву так не починить - VerifyError
+ known_good = load_verified(cache_folder)["versions"].get(f"{Path(minecraft_folder)}|{version_id}")
+ if known_good and snapshot_matches(minecraft_folder, known_good):
+  version_result = None
+ else:
+  version_result = verify_version(version_id, minecraft_folder, cache_folder, repair=True)
+ if version_result and version_result["unrepairable"]:
+  raise VerifyError(f"повреждены файлы модлоадера ({len(version_result['unrepairable'])}), например {version_result['unrepairable'][0]}. Переустановите его")
+ # архив джавы распакован в java/java_8, а сама она лежит в java/java_8/java_8
+ java_folder = next((folder for folder in Path(java_exe).parents[1:3] if (folder / EXTRACT_MANIFEST).is_file()), None) if java_exe else None
+ java_result = verify_runtime(java_folder, cache_folder) if java_folder else None
+ if java_result and (java_result["missing"] or java_result["broken"]):
+  raise VerifyError(f"джава {java_folder.name} повреждена (файлов: {len(java_result['missing']) + len(java_result['broken'])}), восстановите её командой \"проверка\"")
+ return version_result
@@ -0,0 +1,94 @@
+# кеш и индекс манифеста версий майнкрафта
+# манифест хранится в папке cache и ревалидируется по ETag раз в VERSION_MANIFEST_TTL секунд,
+# индекс по типу, дате выхода и префиксу id строится один раз на каждое изменение файла
+import bisect
+import json
+from pathlib import Path
+
+from launcher_downloads import fetch_cached
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+VERSION_MANIFEST_TTL = 3600
+VERSIONS_PAGE_SIZE = 20
+
+version_types = {
+ "альфа": "old_alpha",
+ "бета": "old_beta",
+ "снапшоты": "snapshot",
+ "релизы": "release",
+}
+
+loaded_indexes = {}
+
+
+def build_version_index(manifest):
+ # versions в манифесте идут от новых к старым
+ versions = sorted(manifest.get("versions", []), key=lambda version: version["releaseTime"], reverse=True)
+ by_type = {}
+ for version in versions:
+  by_type.setdefault(version["type"], []).append(version)
+
+ # для поиска по дате - время выхода по возрастанию, для префикса - отсортированные id
+ release_times = {version_type: [version["releaseTime"] for version in reversed(type_versions)] for version_type, type_versions in by_type.items()}
+ sorted_ids = sorted((version["id"].lower(), version["id"]) for version in versions)
+
+ return {
+  "latest": manifest.get("latest", {}),
+  "versions": versions,
+  "by_id": {version["id"]: version for version in versions},
+  "by_type": by_type,
+  "release_times": release_times,
+  "sorted_ids": sorted_ids,
+ }
+
+
+def get_version_index(cache_folder, ttl=VERSION_MANIFEST_TTL, url=VERSION_MANIFEST_URL):
+ manifest_file = Path(cache_folder) / "version_manifest_v2.json"
+ data, source = fetch_cached(url, manifest_file, ttl)
+ stamp = (manifest_file.stat().st_mtime_ns, len(data))
+
+ cached = loaded_indexes.get(manifest_file)
+ if cached and cached["stamp"] == stamp:
+  return cached["index"], source
+
+ index = build_version_index(json.loads(data))
+ loaded_indexes[manifest_file] = {"stamp": stamp, "index": index}
+ return index, source
+
+
+def find_versions(index, version_type=None, query="", since="", until=""):
+ if version_type:
+  versions = index["by_type"].get(version_type, [])
+  # срез по дате делается бинарным поиском по отсортированным временам выхода
+  if since or until:
+   release_times = index["release_times"][version_type] if versions else []
+   start = bisect.bisect_left(release_times, since) if since else 0
+   end = bisect.bisect_right(release_times, until + "\uffff") if until else len(release_times)
+   versions = versions[len(versions) - end:len(versions) - start]
+ else:
+  versions = index["versions"]
+  if since or until:
+   versions = [version for version in versions if (not since or version["releaseTime"] >= since) and (not until or version["releaseTime"][:len(until)] <= until)]
+
+ query = query.strip().lower()
+ if not query:
+  return versions
+
+ # сначала совпадения по началу id: их границы в отсортированном списке ищутся бинарным поиском,
+ # а тип и дата проверяются только у них. потом совпадения по вхождению
+ sorted_ids = index["sorted_ids"]
+ start = bisect.bisect_left(sorted_ids, (query, ""))
+ end = bisect.bisect_left(sorted_ids, (query + "\uffff", ""), start)
+ prefix_matches = [index["by_id"][version_id] for _, version_id in sorted_ids[start:end]]
+ prefix_matches = [version for version in prefix_matches if (not version_type or version["type"] == version_type) and (not since or version["releaseTime"] >= since) and (not until or version["releaseTime"][:len(until)] <= until)]
+ prefix_matches.sort(key=lambda version: version["releaseTime"], reverse=True)
+ prefix_ids = {version["id"] for version in prefix_matches}
+ other_matches = [version for version in versions if version["id"] not in prefix_ids and query in version["id"].lower()]
+ return prefix_matches + other_matches
+
+
+def page_versions(versions, page, page_size=VERSIONS_PAGE_SIZE):
+ pages = max(1, (len(versions) + page_size - 1) // page_size)
+ page = min(max(page, 1), pages)
+ start = (page - 1) * page_size
+ return versions[start:start + page_size], page, pages
@@ -0,0 +1,265 @@
+# обслуживание миров инстанса (saves/): сжатие региональных файлов .mca
+# регион - заголовок из 1024 мест чанков (смещение и число секторов по 4 КБ) и 1024 меток времени, дальше данные чанков.
+# игра дописывает выросший чанк в конец файла и не возвращает освободившиеся секторы, поэтому старые миры разрастаются.
+# файл читается через mmap, живые чанки переписываются подряд во временный файл с новым заголовком,
+# который заменяет старый. чанки, где игроки почти не были (InhabitedTime ниже порога), можно удалить -
+# игра сгенерирует их заново. удаление применяется сразу к region, entities и poi одного и того же региона
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+
+from launcher_metrics import record_metric
+
+SECTOR_BYTES = 4096
+HEADER_SECTORS = 2
+REGION_CHUNKS = 1024
+WORLD_WORKERS = 4
+# 20 тиков в секунду
+TICKS_PER_SECOND = 20
+
+# сжатие чанка: 1 gzip, 2 zlib, 3 без сжатия, 4 lz4 (1.20.5+), +128 - данные в отдельном файле c.x.z.mcc
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+COMPRESSION_EXTERNAL = 128
+
+nbt_fixed_sizes = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+
+
+def nbt_skip(data, position, tag):
+ # позиция сразу за значением тега
+ if tag in nbt_fixed_sizes:
+  return position + nbt_fixed_sizes[tag]
+ if tag == 7:
+  return position + 4 + struct.unpack_from(">i", data, position)[0]
+ if tag == 8:
+  return position + 2 + struct.unpack_from(">H", data, position)[0]
+ if tag == 9:
+  item_tag = data[position]
+  count = struct.unpack_from(">i", data, position + 1)[0]
+  position += 5
+  if item_tag in nbt_fixed_sizes:
+   return position + count * nbt_fixed_sizes[item_tag]
+  for _ in range(count):
+   position = nbt_skip(data, position, item_tag)
+  return position
+ if tag == 10:
+  while True:
+   item_tag = data[position]
+   position += 1
+   if item_tag == 0:
+    return position
+   position += 2 + struct.unpack_from(">H", data, position)[0]
+   position = nbt_skip(data, position, item_tag)
+ if tag == 11:
+  return position + 4 + 4 * struct.unpack_from(">i", data, position)[0]
+ if tag == 12:
+  return position + 4 + 8 * struct.unpack_from(">i", data, position)[0]
+ raise ValueError(f"неизвестный тег NBT {tag}")
+
+
+def nbt_inhabited_time(data):
+ # InhabitedTime из корня чанка (1.18+) или из Level (старые версии), None если его нет.
+ # остальные теги не разбираются, а пропускаются
+ if not data or data[0] != 10:
+  return None
+ position = 3 + struct.unpack_from(">H", data, 1)[0]
+ while True:
+  tag = data[position]
+  position += 1
+  if tag == 0:
+   return None
+  name_length = struct.unpack_from(">H", data, position)[0]
+  name = data[position + 2:position + 2 + name_length]
+  position += 2 + name_length
+  if tag == 4 and name == b"InhabitedTime":
+   return struct.unpack_from(">q", data, position)[0]
+  if tag == 10 and name == b"Level":
+   # Level разбирается как корень: подставляем заголовок безымянного compound
+   level_end = nbt_skip(data, position, 10)
+   return nbt_inhabited_time(b"\x0a\x00\x00" + bytes(data[position:level_end]))
+  position = nbt_skip(data, position, tag)
+
+
+def chunk_inhabited_time(payload, compression):
+ # None - не удалось узнать (lz4, внешний файл, битые данные), такой чанк не удаляется
+ try:
+  if compression == COMPRESSION_ZLIB:
+   data = zlib.decompress(payload)
+  elif compression == COMPRESSION_GZIP:
+   data = zlib.decompress(payload, 31)
+  elif compression == COMPRESSION_NONE:
+   data = payload
+  else:
+   return None
+  return nbt_inhabited_time(data)
+ except (zlib.error, ValueError, IndexError, struct.error):
+  return None
+
+
+def read_region_chunks(region_map, file_size):
+ # живые чанки региона: {номер: (начало, длина записи с 5 байтами заголовка, метка времени, сжатие)}.
+ # записи, которые указывают за конец файла или на заголовок или имеют неверную длину, считаются битыми
+ chunks = {}
+ broken = []
+ for index in range(REGION_CHUNKS):
+  location = struct.unpack_from(">I", region_map, index * 4)[0]
+  if not location:
+   continue
+  offset, sectors = location >> 8, location & 0xFF
+  start = offset * SECTOR_BYTES
+  if offset < HEADER_SECTORS or not sectors or start + 5 > file_size:
+   broken.append(index)
+   continue
+  length, compression = struct.unpack_from(">IB", region_map, start)
+  if not 0 < length <= sectors * SECTOR_BYTES - 4 or start + 4 + length > file_size or compression & ~COMPRESSION_EXTERNAL not in (COMPRESSION_GZIP, COMPRESSION_ZLIB, COMPRESSION_NONE, COMPRESSION_LZ4):
+   broken.append(index)
+   continue
+  timestamp = struct.unpack_from(">I", region_map, SECTOR_BYTES + index * 4)[0]
+  chunks[index] = (start, 4 + length, timestamp, compression)
+ return chunks, broken
+
+
+def optimize_region(region_file, min_inhabited=0, drop_indexes=None, dry_run=False):
+ # возвращает {"chunks", "dropped", "dropped_indexes", "broken", "bytes_before", "bytes_after"}.
+ # min_inhabited - порог InhabitedTime в тиках (0 - ничего не удалять), drop_indexes - чанки, удалённые
+ # в основном регионе (для entities и poi). dry_run только считает
+ region_file = Path(region_file)
+ file_size = region_file.stat().st_size
+ stats = {"chunks": 0, "dropped": 0, "dropped_indexes": set(), "broken": 0, "bytes_before": file_size, "bytes_after": file_size}
+ if file_size < HEADER_SECTORS * SECTOR_BYTES:
+  # пустой или обрезанный файл без заголовка игра всё равно пересоздаёт
+  stats["bytes_after"] = 0
+  if not dry_run:
+   region_file.unlink()
+  return stats
+
+ with open(region_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as region_map:
+  chunks, broken = read_region_chunks(region_map, file_size)
+  stats["chunks"] = len(chunks)
+  stats["broken"] = len(broken)
+
+  for index, (start, length, _, compression) in list(chunks.items()):
+   dropped = drop_indexes is not None and index in drop_indexes
+   if not dropped and min_inhabited > 0:
+    inhabited = chunk_inhabited_time(region_map[start + 5:start + length], compression)
+    dropped = inhabited is not None and inhabited < min_inhabited
+   if dropped:
+    stats["dropped_indexes"].add(index)
+    del chunks[index]
+  stats["dropped"] = len(stats["dropped_indexes"])
+
+  # новая раскладка: чанки подряд в прежнем порядке, каждый занимает столько секторов, сколько нужно
+  layout = []
+  next_sector = HEADER_SECTORS
+  for index, (start, length, timestamp, _) in sorted(chunks.items(), key=lambda item: item[1][0]):
+   sectors = -(-length // SECTOR_BYTES)
+   layout.append((index, next_sector, sectors, start, length, timestamp))
+   next_sector += sectors
+  stats["bytes_after"] = next_sector * SECTOR_BYTES if layout else 0
+  unchanged = not broken and not stats["dropped"] and stats["bytes_after"] == file_size and all(new_sector * SECTOR_BYTES == start for _, new_sector, _, start, _, _ in layout)
+  if dry_run or unchanged:
+   return stats
+
+  temp_file = region_file.with_name(region_file.name + ".tmp")
+  if layout:
+   header = bytearray(HEADER_SECTORS * SECTOR_BYTES)
+   for index, new_sector, sectors, _, _, timestamp in layout:
+    struct.pack_into(">I", header, index * 4, new_sector << 8 | sectors)
+    struct.pack_into(">I", header, SECTOR_BYTES + index * 4, timestamp)
+   with open(temp_file, "wb") as out_file:
+    out_file.write(header)
+    for _, _, sectors, start, length, _ in layout:
+     out_file.write(region_map[start:start + length])
+     out_file.write(bytes(sectors * SECTOR_BYTES - length))
+    out_file.flush()
+    os.fsync(out_file.fileno())
+
+ # mmap закрыт: на windows файл с открытым отображением нельзя заменить
+ if layout:
+  os.replace(temp_file, region_file)
+ else:
+  region_file.unlink()
+ # внешние данные удалённых чанков (c.x.z.mcc) больше не нужны
+ region_x, region_z = region_coordinates(region_file)
+ if region_x is not None:
+  for index in stats["dropped_indexes"] | set(broken):
+   external_file = region_file.with_name(f"c.{region_x * 32 + index % 32}.{region_z * 32 + index // 32}.mcc")
+   if external_file.exists():
+    external_file.unlink()
+ return stats
+
+
+def region_coordinates(region_file):
+ parts = Path(region_file).name.split(".")
+ if len(parts) == 4 and parts[0] == "r" and parts[3] == "mca":
+  try:
+   return int(parts[1]), int(parts[2])
+  except ValueError:
+   pass
+ return None, None
+
+
+def world_region_groups(world_folder):
+ # [(регион с блоками, [тот же регион в entities и poi])] для всех измерений мира
+ groups = []
+ for folder, dir_names, file_names in os.walk(world_folder):
+  if Path(folder).name != "region":
+   continue
+  dir_names.clear()
+  for file_name in sorted(file_names):
+   if region_coordinates(file_name)[0] is None:
+    continue
+   companions = [Path(folder).parent / companion / file_name for companion in ("entities", "poi")]
+   groups.append((Path(folder) / file_name, [companion for companion in companions if companion.exists()]))
+ return groups
+
+
+def optimize_region_group(region_file, companions, min_inhabited, dry_run):
+ stats = optimize_region(region_file, min_inhabited, dry_run=dry_run)
+ for companion in companions:
+  companion_stats = optimize_region(companion, drop_indexes=stats["dropped_indexes"], dry_run=dry_run)
+  stats["bytes_before"] += companion_stats["bytes_before"]
+  stats["bytes_after"] += companion_stats["bytes_after"]
+  stats["broken"] += companion_stats["broken"]
+ return stats
+
+
+def optimize_world(world_folder, min_inhabited=0, dry_run=True, workers=WORLD_WORKERS, progress=None):
+ # регионы обрабатываются в потоках: распаковка zlib, чтение и запись файлов отпускают GIL.
+ # возвращает {"regions", "changed", "chunks", "dropped", "broken", "bytes_before", "bytes_after", "errors"}
+ from concurrent.futures import ThreadPoolExecutor, as_completed
+ started = time.perf_counter()
+ groups = world_region_groups(world_folder)
+ totals = {"regions": len(groups), "changed": 0, "chunks": 0, "dropped": 0, "broken": 0, "bytes_before": 0, "bytes_after": 0, "errors": []}
+ with ThreadPoolExecutor(max_workers=workers) as executor:
+  futures = {executor.submit(optimize_region_group, region_file, companions, min_inhabited, dry_run): region_file for region_file, companions in groups}
+  for done, future in enumerate(as_completed(futures), start=1):
+   try:
+    stats = future.result()
+   except (OSError, ValueError) as e:
+    totals["errors"].append(f"{futures[future].name}: {e}")
+   else:
+    for key in ("chunks", "dropped", "broken", "bytes_before", "bytes_after"):
+     totals[key] += stats[key]
+    totals["changed"] += stats["bytes_after"] != stats["bytes_before"] or bool(stats["dropped"] or stats["broken"])
+   if progress:
+    progress(done, len(groups))
+ if not dry_run:
+  record_metric("world", Path(world_folder).name, ms=round((time.perf_counter() - started) * 1000, 1), bytes=totals["bytes_before"], saved=totals["bytes_before"] - totals["bytes_after"], dropped=totals["dropped"])
+ return totals
+
+
+def folder_size(folder):
+ total = 0
+ for path, _, file_names in os.walk(folder):
+  for file_name in file_names:
+   try:
+    total += os.path.getsize(os.path.join(path, file_name))
+   except OSError:
+    pass
+ return total
@@ -1,2 +1,2 @@
-if command == "альт мод":
- webbrowser.open("https://ru-minecraft.ru/mody-minecraft/")
+if command == "альт мод":
+ webbrowser.open("https://ru-minecraft.ru/mody-minecraft/")
@@ -0,0 +1,55 @@
+if command == "бэкап":
+ from launcher_backup import create_snapshot, list_snapshots, load_snapshot, restore_snapshot, prune_snapshots, instance_backup_folders
+ print(f"""
+{GREEN}Что хотите сделать?{COLOR_END}
+{GREEN}1) Снимок активного инстанса (миры, моды, конфиги, ресурспаки){COLOR_END}
+{GREEN}2) Снимок конфигов лаунчера{COLOR_END}
+{GREEN}3) Показать снимки{COLOR_END}
+{GREEN}4) Восстановить снимок{COLOR_END}
+{GREEN}5) Удалить старые снимки{COLOR_END}
+""")
+ choise_backup = str(input("Укажите номер: ")).strip()
+
+ if choise_backup in ("1", "2"):
+  if choise_backup == "1":
+   backup_stats = create_snapshot(backup_folder, f"instance_{instance_name}", Path(root_folder) / "instances" / instance_name, instance_backup_folders)
+  else:
+   backup_stats = create_snapshot(backup_folder, "config_files", Path(root_folder) / "config_files")
+
+  print(f"{GREEN}Снимок {backup_stats['manifest'].stem} создан! Файлов: {backup_stats['files']}, изменилось: {backup_stats['hashed']}, новых: {backup_stats['new_objects']}{COLOR_END}")
+  print(f"{GREEN}Размер данных {backup_stats['total_bytes'] / 1048576:.1f} МБ, дописано в бэкап {backup_stats['stored_bytes'] / 1048576:.1f} МБ{COLOR_END}")
+  for skipped_file in backup_stats["skipped"]:
+   print(f"{RED}Пропущен: {skipped_file}{COLOR_END}")
+
+ elif choise_backup in ("3", "4"):
+  backup_snapshots = list_snapshots(backup_folder)
+  for number, snapshot_file in enumerate(backup_snapshots, start=1):
+   print(f"{SKY_BLUE}{number}) {snapshot_file.parent.name} - {snapshot_file.stem}{COLOR_END}")
+
+  if not backup_snapshots:
+   print(f"{RED}Снимков пока нет{COLOR_END}")
+
+  elif choise_backup == "4":
+   choice_snapshot = str(input(f"{GREEN}Введите номер снимка для восстановления: {COLOR_END}")).strip()
+   if choice_snapshot.isdigit() and 0 < int(choice_snapshot) <= len(backup_snapshots):
+    snapshot_file = backup_snapshots[int(choice_snapshot) - 1]
+    snapshot_manifest = load_snapshot(snapshot_file)
+    running_instances = [game_session["instance"] for game_session in running_sessions() if snapshot_manifest["source"] == f"instance_{game_session['instance']}"]
+    if running_instances:
+     # игра держит миры и конфиги открытыми, подменять и удалять их под ней нельзя
+     print(f"{RED}Инстанс {running_instances[0]} сейчас запущен, закройте игру перед восстановлением{COLOR_END}")
+     choise_restore = ""
+    else:
+     choise_restore = str(input(f"{RED}Текущие файлы будут заменены содержимым снимка. Продолжить? да/нет: {COLOR_END}")).strip()
+
+    if choise_restore == "да":
+     # перед восстановлением сохраняем текущее состояние, чтобы его можно было вернуть
+     create_snapshot(backup_folder, snapshot_manifest["source"], snapshot_manifest["path"], snapshot_manifest.get("include"))
+     restore_stats = restore_snapshot(backup_folder, snapshot_file)
+     print(f"{GREEN}Восстановлено файлов: {restore_stats['restored']}, без изменений: {restore_stats['unchanged']}, удалено лишних: {restore_stats['removed']}{COLOR_END}")
+
+ elif choise_backup == "5":
+  keep_snapshots = str(input(f"{GREEN}Сколько последних снимков оставить для каждого инстанса: {COLOR_END}")).strip()
+  if keep_snapshots.isdigit() and int(keep_snapshots) > 0:
+   prune_stats = prune_snapshots(backup_folder, int(keep_snapshots))
+   print(f"{GREEN}Удалено снимков: {prune_stats['snapshots']}, файлов: {prune_stats['objects']}, освобождено {prune_stats['freed_bytes'] / 1048576:.1f} МБ{COLOR_END}")
@@ -0,0 +1,69 @@
+if command == "клон":
+ from launcher_jvm import load_jvm_profiles, save_jvm_profile
+ from launcher_clone import clone_instance, list_templates, valid_instance_name
+ templates_folder = Path(root_folder) / "templates"
+ print(f"""
+{GREEN}Что хотите сделать?{COLOR_END}
+{GREEN}1) Клонировать инстанс (можно сразу несколько копий){COLOR_END}
+{GREEN}2) Сохранить инстанс как шаблон{COLOR_END}
+{GREEN}3) Создать инстансы из шаблона{COLOR_END}
+{GREEN}4) Удалить шаблон{COLOR_END}
+""")
+ choice_clone = str(input("Укажите номер: ")).strip()
+
+ clone_sources = []
+ if choice_clone in ("1", "2"):
+  clone_sources = sorted(folder for folder in instances_folder.iterdir() if folder.is_dir() and not folder.name.startswith("."))
+ elif choice_clone in ("3", "4"):
+  clone_sources = list_templates(templates_folder)
+  if not clone_sources:
+   print(f"{YELLOW}Шаблонов пока нет, сохраните инстанс как шаблон (пункт 2){COLOR_END}")
+
+ for number_source, clone_source in enumerate(clone_sources, start=1):
+  print(f"{SKY_BLUE}{number_source}) {clone_source.name}{COLOR_END}")
+
+ clone_source = None
+ if clone_sources:
+  choice_source = str(input(f"{GREEN}Введите номер (Enter - {instance_name if choice_clone in ('1', '2') else 'отмена'}): {COLOR_END}")).strip()
+  if choice_source.isdigit() and 0 < int(choice_source) <= len(clone_sources):
+   clone_source = clone_sources[int(choice_source) - 1]
+  elif not choice_source and choice_clone in ("1", "2") and (instances_folder / instance_name).is_dir():
+   clone_source = instances_folder / instance_name
+
+ if clone_source and choice_clone == "4":
+  if str(input(f"{RED}Удалить шаблон {clone_source.name}? да/нет: {COLOR_END}")).strip() == "да":
+   shutil.rmtree(clone_source)
+   print(f"{GREEN}Шаблон {clone_source.name} удалён{COLOR_END}")
+
+ elif clone_source:
+  if choice_clone == "2":
+   clone_name = str(input(f"{GREEN}Название шаблона (Enter - {clone_source.name}): {COLOR_END}")).strip() or clone_source.name
+  else:
+   clone_name = str(input(f"{GREEN}Название нового инстанса: {COLOR_END}")).strip()
+
+  # название становится папкой рядом с остальными инстансами, выйти из неё через / или .. нельзя
+  if not valid_instance_name(clone_name):
+   print(f"{RED}Недопустимое название \"{clone_name}\": нужно непустое имя без /, \\ и ..{COLOR_END}")
+   clone_targets = []
+  elif choice_clone == "2":
+   clone_targets = [templates_folder / clone_name]
+  else:
+   clone_count = str(input(f"{GREEN}Сколько копий (Enter - одна, несколько получат номера {clone_name}-1, {clone_name}-2...): {COLOR_END}")).strip()
+   if clone_count.isdigit() and int(clone_count) > 1:
+    clone_targets = [instances_folder / f"{clone_name}-{number_clone}" for number_clone in range(1, int(clone_count) + 1)]
+   else:
+    clone_targets = [instances_folder / clone_name]
+
+  clone_profile = load_jvm_profiles(jvm_profiles_file).get(clone_source.name) if choice_clone == "1" else None
+  for clone_target in clone_targets:
+   if clone_target.exists():
+    print(f"{RED}{clone_target.name} уже существует, пропущен{COLOR_END}")
+    continue
+   clone_started = time.perf_counter()
+   clone_stats = clone_instance(clone_source, clone_target)
+   clone_ms = (time.perf_counter() - clone_started) * 1000
+   record_metric("clone", clone_source.name, ms=round(clone_ms, 1), bytes=clone_stats["copied_bytes"], files=clone_stats["files"])
+   # свой профиль JVM переходит к клону, авто профиль клон подберёт себе сам при запуске
+   if clone_profile and clone_profile.get("mode") == "manual":
+    save_jvm_profile(jvm_profiles_file, clone_target.name, "manual", clone_profile["arguments"], clone_profile.get("description", ""))
+   print(f"{GREEN}{clone_target.name}: файлов {clone_stats['files']} ({clone_stats['bytes'] / 1048576:.1f} МБ) за {clone_ms / 1000:.1f} с - reflink {clone_stats['reflinked']}, ссылок {clone_stats['linked']}, скопировано {clone_stats['copied']} ({clone_stats['copied_bytes'] / 1048576:.1f} МБ){COLOR_END}")
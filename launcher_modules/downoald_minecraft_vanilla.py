@@ -1,49 +1,85 @@
-if command == "скачать ваниль":
-  minecraft_vanilla_folder_download = r"C:\cobalt_launcher_nano_reliz\minecraft_vanilla"
-  all_versions = minecraft_launcher_lib.utils.get_version_list()
-
-  filtered_versions = []
-
-  print(f"{RED}Какую категорию версий показать?{COLOR_END}")
-  print(f"{RED}Доступные варианты: альфа, бета, снапшоты, релизы{COLOR_END}")
-  type_choice = str(input(f"{GREEN}Введите категорию: {COLOR_END}")).strip().lower()
-  
-  if type_choice == "альфа":
-   print(f"{PURPLE}СПИСОК АЛЬФА ВЕРСИЙ:{COLOR_END}")
-   for version in all_versions:
-    if version["type"] == "old_alpha":
-     filtered_versions.append(version["id"])
-
-  elif type_choice == "бета":
-   print(f"{PURPLE}СПИСОК БЕТА ВЕРСИЙ:{COLOR_END}")
-   for version in all_versions:
-    if version["type"] == "old_beta":
-     filtered_versions.append(version["id"])
-
-  elif type_choice == "снапшоты":
-   print(f"{PURPLE}СПИСОК СНАПШОТОВ:{COLOR_END}")
-   for version in all_versions:
-    if version["type"] == "snapshot":
-     filtered_versions.append(version["id"])
-
-  elif type_choice == "релизы":
-   print(f"{PURPLE}СПИСОК РЕЛИЗОВ:{COLOR_END}")
-   for version in all_versions:
-    if version["type"] == "release":
-     filtered_versions.append(version["id"])
-
-  if filtered_versions:
-    for number_version, version_id in enumerate(filtered_versions, start=1):
-     print(f"{GREEN}{number_version}) {version_id} {COLOR_END}")
-    
-    choice_versions_vanilla_minecraft = str(input(f"{GREEN}Введите номер версии для скачивания (или Enter для отмены):{COLOR_END}"))
-    
-    if choice_versions_vanilla_minecraft.isdigit():
-     index_versions = int(choice_versions_vanilla_minecraft) - 1
-        
-    if 0 <= index_versions < len(filtered_versions):
-     selected_version = filtered_versions[index_versions]
-     print(f"{GREEN}Начинается скачивание {selected_version}...{COLOR_END}")
-            
-     minecraft_launcher_lib.install.install_minecraft_version(selected_version, minecraft_vanilla_folder_download)
-     print(f"{PURPLE}Версия {selected_version} успешно скачана!{COLOR_END}")
\ No newline at end of file
+if command == "скачать ваниль":
+  import re
+  from launcher_versions import get_version_index, find_versions, page_versions, version_types, VERSIONS_PAGE_SIZE
+  from launcher_install import install_version, format_install_progress
+  from launcher_installed import get_installed_versions
+  minecraft_vanilla_folder_download = Path(root_folder) / "minecraft_vanilla"
+  selected_version = ""
+
+  try:
+   versions_index, versions_source = get_version_index(cache_folder)
+  except DownloadError as e:
+   versions_index = None
+   print(f"{RED}Не удалось получить список версий и сохранённой копии нет: {e}{COLOR_END}")
+
+  if versions_index:
+   if versions_source == "offline":
+    print(f"{YELLOW}Нет связи с сервером, показан сохранённый список версий{COLOR_END}")
+
+   print(f"{RED}Какую категорию версий показать?{COLOR_END}")
+   print(f"{RED}Доступные варианты: альфа, бета, снапшоты, релизы (или Enter для всех){COLOR_END}")
+   type_choice = str(input(f"{GREEN}Введите категорию: {COLOR_END}")).strip().lower()
+   search_versions = str(input(f"{GREEN}Поиск по номеру версии, например 1.20 (или Enter чтобы показать все): {COLOR_END}")).strip()
+   # период выхода: год, месяц или день, отдельно или диапазоном через ..
+   release_period = str(input(f"{GREEN}Когда вышла, например 2020, 2019..2021 или 2021-06.. (Enter - за всё время): {COLOR_END}")).strip()
+   release_since, release_until = [bound.strip() for bound in release_period.split("..", 1)] if ".." in release_period else (release_period, release_period)
+   if not all(re.fullmatch(r"(\d{4}(-\d{2}(-\d{2})?)?)?", bound) for bound in (release_since, release_until)):
+    print(f"{RED}Не понял период \"{release_period}\", показаны версии за всё время{COLOR_END}")
+    release_since, release_until = "", ""
+
+   filtered_versions = find_versions(versions_index, version_types.get(type_choice), search_versions, release_since, release_until)
+   versions_page = 1
+
+   while filtered_versions:
+    page_items, versions_page, versions_pages = page_versions(filtered_versions, versions_page)
+    print(f"{PURPLE}НАЙДЕНО ВЕРСИЙ: {len(filtered_versions)}, СТРАНИЦА {versions_page} ИЗ {versions_pages}{COLOR_END}")
+    for number_version, version in enumerate(page_items, start=(versions_page - 1) * VERSIONS_PAGE_SIZE + 1):
+     print(f"{GREEN}{number_version}) {version['id']} {COLOR_END}")
+
+    choice_versions_vanilla_minecraft = str(input(f"{GREEN}Номер версии для скачивания, > или < для листания, текст для поиска (или Enter для отмены): {COLOR_END}")).strip()
+
+    if choice_versions_vanilla_minecraft == ">":
+     versions_page += 1
+    elif choice_versions_vanilla_minecraft == "<":
+     versions_page -= 1
+    elif choice_versions_vanilla_minecraft.isdigit():
+     index_versions = int(choice_versions_vanilla_minecraft) - 1
+     if 0 <= index_versions < len(filtered_versions):
+      selected_version = filtered_versions[index_versions]["id"]
+      break
+     print(f"{RED}Нет версии с номером {choice_versions_vanilla_minecraft}, выберите от 1 до {len(filtered_versions)}{COLOR_END}")
+    elif choice_versions_vanilla_minecraft:
+     filtered_versions = find_versions(versions_index, version_types.get(type_choice), choice_versions_vanilla_minecraft, release_since, release_until)
+     versions_page = 1
+    else:
+     break
+
+   if not filtered_versions:
+    print(f"{RED}Версии не найдены{COLOR_END}")
+
+  if selected_version:
+   install_mode = str(input(f"{GREEN}Режим установки: 1) быстрый - параллельная загрузка 2) стандартный minecraft_launcher_lib (Enter - быстрый): {COLOR_END}")).strip()
+
+   # установка идёт фоновой задачей, параметры передаются аргументами, а не берутся из глобальных переменных
+   def install_vanilla_job(job, version_id, minecraft_folder, index, mode):
+    if mode == "2":
+     lib_progress = {"status": "", "value": 0, "max": 0}
+
+     def set_lib_progress(key, value):
+      lib_progress[key] = value
+      set_job_progress(job, f"{lib_progress['status']} {lib_progress['value']}/{lib_progress['max']}")
+
+     minecraft_launcher_lib.install.install_minecraft_version(version_id, minecraft_folder, callback={
+      "setStatus": lambda value: set_lib_progress("status", value),
+      "setProgress": lambda value: set_lib_progress("value", value),
+      "setMax": lambda value: set_lib_progress("max", value),
+     })
+     get_installed_versions(root_folder, cache_folder)
+     return f"Версия {version_id} успешно скачана!"
+
+    job_install_stats = install_version(version_id, minecraft_folder, index, store_folder=store_folder, cache_folder=cache_folder, progress=lambda stats: set_job_progress(job, format_install_progress(stats)))
+    get_installed_versions(root_folder, cache_folder)
+    return f"Версия {version_id} успешно скачана! Файлов скачано: {job_install_stats['done'] - job_install_stats['from_store']} из {job_install_stats['files']}, взято из хранилища: {job_install_stats['from_store']}, {job_install_stats['bytes'] / 1048576:.1f} МБ за {job_install_stats['seconds']:.1f} с"
+
+   submit_job(f"Установка {selected_version}", "install", install_vanilla_job, selected_version, minecraft_vanilla_folder_download, versions_index, install_mode)
+   print(f"{GREEN}Скачивание {selected_version} началось в фоне, ход установки - команда \"задачи\"{COLOR_END}")
@@ -1,37 +1,106 @@
-if command == "установить мод версию":
- github_modloader_minecraft_json_url = "https://raw.githubusercontent.com/m1r0tv0rets/Cobalt_Launcher_Nano/main/modloader_minecraft.json"
- modloader_minecraft_folder = Path(r"C:\cobalt_launcher_nano_reliz\modloader_minecraft")
- modloader_temp_zip_file = modloader_minecraft_folder / "temp_modloader.zip"
- 
- print(f"{SKY_BLUE}Получение списка модлоадеров с GitHub...{COLOR_END}")
- modloader_minecraft_list = json.loads(urllib.request.urlopen(github_modloader_minecraft_json_url).read())
- 
- for number, modloader_minecraft in enumerate(modloader_minecraft_list, start=1):
-  print(f"{number}. {modloader_minecraft['name']}")
-     
- choice_modloader_minecraft = str(input(f"{GREEN}Введите номер модлоадера для установки или нажмите Enter для отмены: {COLOR_END}"))
- 
- if choice_modloader_minecraft.isdigit(): 
-  choice_index_modloader_minecraft = int(choice_modloader_minecraft) - 1 
-     
-  if 0 <= choice_index_modloader_minecraft < len(modloader_minecraft_list):
-   selected_modloader_minecraft = modloader_minecraft_list[choice_index_modloader_minecraft]
-   downoald_url_modloader = selected_modloader_minecraft["download_url"]
-         
-   if downoald_url_modloader:
-    print(f"Скачивание модлоадера: {selected_modloader_minecraft['name']}...")
-    requests_browser_client = urllib.request.Request(downoald_url_modloader, headers={'User-Agent': 'Mozilla'})
-     
-    with urllib.request.urlopen(requests_browser_client) as response, open(modloader_temp_zip_file, 'wb') as out_file:
-     out_file.write(response.read())
-                 
-    print(f"{YELLOW}Распаковка файлов модлоадера...{COLOR_END}")
-     
-    target_version_folder = modloader_minecraft_folder / selected_modloader_minecraft['name']
-    os.makedirs(target_version_folder, exist_ok=True)
-     
-    with zipfile.ZipFile(modloader_temp_zip_file, 'r') as zip_ref:
-     zip_ref.extractall(target_version_folder)
-                 
-    modloader_temp_zip_file.unlink()
-    print(f"{GREEN}{selected_modloader_minecraft['name']} успешно установлен!{COLOR_END}")
\ No newline at end of file
+if command == "установить мод версию":
+ from launcher_versions import get_version_index
+ from launcher_install import format_install_progress
+ from launcher_store import deduplicate_trees
+ from launcher_installed import get_installed_versions, bundled_java, game_version_java
+ from launcher_extract import extract_archive
+ from launcher_modloaders import install_modloader, loader_versions, delta_loaders
+ modloader_minecraft_folder = Path(root_folder) / "modloader_minecraft"
+
+ print(f"""
+{GREEN}Какой модлоадер поставить?{COLOR_END}
+{GREEN}1) Fabric{COLOR_END}
+{GREEN}2) Quilt{COLOR_END}
+{GREEN}3) Forge{COLOR_END}
+{GREEN}4) NeoForge{COLOR_END}
+{GREEN}5) Готовую сборку из каталога (LiteLoader и другие){COLOR_END}
+""")
+ choice_modloader_source = str(input("Укажите номер: ")).strip()
+ delta_loader_choices = {"1": "fabric", "2": "quilt", "3": "forge", "4": "neoforge"}
+
+ # fabric, quilt, forge и neoforge ставятся поверх ванили: качаются только json модлоадера и его библиотеки
+ if choice_modloader_source in delta_loader_choices:
+  selected_loader = delta_loader_choices[choice_modloader_source]
+  installed_vanilla_ids = [installed_entry["id"] for installed_entry in get_installed_versions(root_folder, cache_folder) if installed_entry["kind"] == "vanilla"]
+  if installed_vanilla_ids:
+   print(f"{SKY_BLUE}Установленные версии игры (их файлы не будут скачиваться заново): {', '.join(installed_vanilla_ids)}{COLOR_END}")
+  loader_game_version = str(input(f"{GREEN}Версия игры, например 1.20.1: {COLOR_END}")).strip()
+
+  loader_versions_list = []
+  if loader_game_version:
+   try:
+    loader_versions_list = loader_versions(selected_loader, loader_game_version, cache_folder)
+   except (DownloadError, ValueError) as e:
+    print(f"{RED}Не удалось получить версии {delta_loaders[selected_loader]}: {e}{COLOR_END}")
+   else:
+    if not loader_versions_list:
+     print(f"{YELLOW}{delta_loaders[selected_loader]} для {loader_game_version} не найден{COLOR_END}")
+
+  if loader_versions_list:
+   for number_loader_version, (loader_version, loader_stable) in enumerate(loader_versions_list[:10], start=1):
+    print(f"{SKY_BLUE}{number_loader_version}) {loader_version}{'' if loader_stable else ' (нестабильная)'}{COLOR_END}")
+   choice_loader_version = str(input(f"{GREEN}Номер версии {delta_loaders[selected_loader]} или своя версия (Enter - последняя стабильная): {COLOR_END}")).strip()
+   if choice_loader_version.isdigit() and 0 < int(choice_loader_version) <= min(len(loader_versions_list), 10):
+    selected_loader_version = loader_versions_list[int(choice_loader_version) - 1][0]
+   elif choice_loader_version:
+    selected_loader_version = choice_loader_version
+   else:
+    selected_loader_version = next((loader_version for loader_version, loader_stable in loader_versions_list if loader_stable), loader_versions_list[0][0])
+
+   # процессорам forge нужна джава той же версии, что и игре
+   loader_java = bundled_java(game_version_java(loader_game_version))
+   loader_java_exe = {"8": java8_folder, "17": java17_folder, "21": java21_folder}[loader_java] / f"java_{loader_java}" / "bin" / ("java.exe" if os.name == "nt" else "java")
+
+   def install_delta_modloader_job(job, loader, game_version, loader_version, java_exe):
+    try:
+     versions_index, _ = get_version_index(cache_folder)
+    except DownloadError:
+     versions_index = None
+    install_stats = install_modloader(loader, game_version, loader_version, Path(root_folder) / "minecraft_vanilla", cache_folder, versions_index, java_exe, store_folder, progress=lambda stats: set_job_progress(job, stats.get("processor") and f"процессоры {stats['processor']}" or format_install_progress(stats)))
+    get_installed_versions(root_folder, cache_folder)
+    return f"{install_stats['id']} установлен! Скачано {install_stats['bytes'] / 1048576:.1f} МБ, файлов {install_stats['done'] - install_stats['from_store']} из {install_stats['files']}, из хранилища {install_stats['from_store']}"
+
+   submit_job(f"Установка {delta_loaders[selected_loader]} {selected_loader_version}", "install", install_delta_modloader_job, selected_loader, loader_game_version, selected_loader_version, loader_java_exe)
+   print(f"{GREEN}Установка {delta_loaders[selected_loader]} {selected_loader_version} для {loader_game_version} началась в фоне, ход установки - команда \"задачи\"{COLOR_END}")
+
+ elif choice_modloader_source == "5":
+  print(f"{SKY_BLUE}Получение списка модлоадеров с GitHub...{COLOR_END}")
+  modloader_minecraft_list = json.loads(read_launcher_catalog("modloader_minecraft.json"))
+
+  for number, modloader_minecraft in enumerate(modloader_minecraft_list, start=1):
+   print(f"{number}. {modloader_minecraft['name']}")
+
+  choice_modloader_minecraft = str(input(f"{GREEN}Введите номер модлоадера для установки или нажмите Enter для отмены: {COLOR_END}"))
+
+  if choice_modloader_minecraft.isdigit():
+   choice_index_modloader_minecraft = int(choice_modloader_minecraft) - 1
+
+   if 0 <= choice_index_modloader_minecraft < len(modloader_minecraft_list):
+    selected_modloader_minecraft = modloader_minecraft_list[choice_index_modloader_minecraft]
+    downoald_url_modloader = selected_modloader_minecraft["download_url"]
+
+    if downoald_url_modloader:
+     # скачивание, распаковка и объединение с хранилищем идут фоновой задачей
+     def install_modloader_job(job, modloader, download_url):
+      set_job_progress(job, "скачивание")
+      target_version_folder = modloader_minecraft_folder / modloader['name']
+      modloader_zip_file = modloader_minecraft_folder / f"temp_{modloader['name']}.zip"
+      # sha256 архива берётся из каталога, если он там указан
+      download_file(download_url, modloader_zip_file, modloader.get("sha256"), progress=lambda downloaded, total: set_job_progress(job, f"скачивание {downloaded / 1048576:.1f} МБ"))
+
+      # распаковка во временную папку, при переустановке совпадающие файлы не распаковываются заново
+      set_job_progress(job, "распаковка")
+      extract_started = time.perf_counter()
+      extract_stats = extract_archive(modloader_zip_file, target_version_folder, keep_extra=True, progress=lambda done, total: set_job_progress(job, f"распаковка {done}/{total}"))
+      modloader_zip_file.unlink()
+      record_metric("extract", modloader['name'], ms=round((time.perf_counter() - extract_started) * 1000, 1), bytes=extract_stats["bytes"], files=extract_stats["files"])
+
+      # библиотеки и ассеты из архива заменяются ссылками на общее хранилище
+      set_job_progress(job, "объединение с хранилищем")
+      job_store_stats = deduplicate_trees([target_version_folder], store_folder)
+      get_installed_versions(root_folder, cache_folder)
+      unverified_note = "" if modloader.get("sha256") else " Архив без проверки sha256: в каталоге нет его хеша"
+      return f"{modloader['name']} успешно установлен! Общих файлов с другими версиями: {job_store_stats['deduplicated']}, освобождено {job_store_stats['saved_bytes'] / 1048576:.1f} МБ.{unverified_note}"
+
+     submit_job(f"Установка {selected_modloader_minecraft['name']}", "install", install_modloader_job, selected_modloader_minecraft, downoald_url_modloader)
+     print(f"{GREEN}Установка {selected_modloader_minecraft['name']} началась в фоне, ход установки - команда \"задачи\"{COLOR_END}")
@@ -1,25 +1,27 @@
-if command == "скачать плагин":
-  github_plugins_json_url = "https://raw.githubusercontent.com/m1r0tv0rets/Cobalt_Launcher_Nano/main/plugins.json"
-  plugins_folder = Path(r"C:\cobalt_launcher_nano_reliz\plugins")
-  
-  print(f"{SKY_BLUE}Получение списка плагинов с GitHub...{COLOR_END}")
-  plugins_list = json.loads(urllib.request.urlopen(github_plugins_json_url).read())
-  
-  for number, plugin in enumerate(plugins_list, start=1):
-    print(f"{number}. {plugin['name']} — {plugin.get('description', 'Без описания')}")
-  
-  choice_plugins = str(input(f"{GREEN}Введите номер плагина для установки или нажмите Enter для отмены: {COLOR_END}"))
-  
-  if choice_plugins.isdigit():  
-   choice_index_plugin = int(choice_plugins) - 1  
-    
-   if 0 <= choice_index_plugin < len(plugins_list):
-    selected_plugin = plugins_list[choice_index_plugin]
-    url = selected_plugin["download_url"]
-        
-    if url:
-     print(f"Скачивание плагина: {selected_plugin['name']}...")
-     file_name = url.split("/")[-1]
-     urllib.request.urlretrieve(url, plugins_folder / file_name)
-     print(f"{GREEN}Плагин успешно установлен!{COLOR_END}")
-     os.execv(sys.executable, [sys.executable] + sys.argv)
\ No newline at end of file
+if command == "скачать плагин":
+  plugins_folder = Path(root_folder) / "plugins"
+  
+  print(f"{SKY_BLUE}Получение списка плагинов с GitHub...{COLOR_END}")
+  plugins_list = json.loads(read_launcher_catalog("plugins.json"))
+  
+  for number, plugin in enumerate(plugins_list, start=1):
+    print(f"{number}. {plugin['name']} — {plugin.get('description', 'Без описания')}")
+  
+  choice_plugins = str(input(f"{GREEN}Введите номер плагина для установки или нажмите Enter для отмены: {COLOR_END}"))
+  
+  if choice_plugins.isdigit():  
+   choice_index_plugin = int(choice_plugins) - 1  
+    
+   if 0 <= choice_index_plugin < len(plugins_list):
+    selected_plugin = plugins_list[choice_index_plugin]
+    url = selected_plugin["download_url"]
+        
+    if url:
+     # новый файл плагина подхватывается реестром команд перед следующей командой, перезапуск не нужен
+     def download_plugin_job(job, plugin_url, plugin_file):
+      download_file(plugin_url, plugin_file, progress=lambda downloaded, total: set_job_progress(job, f"{downloaded / 1024:.0f} КБ"))
+      return "Плагин успешно установлен!"
+
+     file_name = url.split("/")[-1]
+     submit_job(f"Плагин {selected_plugin['name']}", "download", download_plugin_job, url, plugins_folder / file_name)
+     print(f"Скачивание плагина: {selected_plugin['name']} началось в фоне...")
\ No newline at end of file
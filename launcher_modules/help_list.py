@@ -1,43 +1,55 @@
-if command == "помощь":
- print(f"""
-{SKY_BLUE}ДОСТУПНЫЕ КОМАНДЫ:{COLOR_END}
-
-{PURPLE}НАСТРОЙКА АККАУНТОВ:{COLOR_END}
-{GREEN}офф акк{COLOR_END} - Управление оффлайн аккаунтами
-{GREEN}елу акк{COLOR_END} - Управление ely.by аккаунтами {RED}(В РАЗРАБОТКЕ){COLOR_END}
-
-{PURPLE}ПРОСМОТР И УСТАНОВКА:{COLOR_END}
-{GREEN}скачать ваниль{COLOR_END} - Показать и установить версии майнкрафт
-{GREEN}установить мод версию{COLOR_END} - Скачать модлоадеры (Fabric, Forge, LiteLoader)
-
-{PURPLE}УСТАНОВКА И ЗАПУСК:{COLOR_END}
-{GREEN}запуск ванили{COLOR_END} - Запустить ванильный Minecraft
-{GREEN}запуск мод{COLOR_END} - Запустить модифицированный майнкрафт (Fabric, Forge и т.д.)
-
-{PURPLE}РАБОТА С ФАЙЛАМИ:{COLOR_END}
-{GREEN}корень{COLOR_END} - Открыть корневую папку лаунчера
-{GREEN}моды{COLOR_END} - Открыть папку модов активного инстанса
-{GREEN}ресурспак{COLOR_END} - Открыть папку ресурспаков активного инстанса
-{GREEN}шейдеры{COLOR_END} - Открыть папку шейдеров активного инстанса
-{GREEN}миры{COLOR_END} - Открыть папку миров активного инстанса
-{GREEN}скрины{COLOR_END} - Открыть папку скриншотов активного инстанса
-{GREEN}конфиги{COLOR_END} - Открыть папку конфигов активного инстанса
-{GREEN}схемы{COLOR_END} - Открыть папку схем Litematica активного инстанса
-{GREEN}бэкап{COLOR_END} - Создать резервную копию (миры, ресурспаки, конфиги, моды, конфиг лаунчера)
-{GREEN}конфиги лаунчера{COLOR_END} - Скопировать папку конфигов лаунчера на рабочий стол 
-{GREEN}удалить лаунчер{COLOR_END} - Полностью удалить папку лаунчера
-
-{PURPLE}МОДЫ:{COLOR_END}
-{GREEN}установить мод{COLOR_END} - Установка модов {RED}(В РАЗРАБОТКЕ){COLOR_END}
-{GREEN}альт мод{COLOR_END} - Искать моды на ru-minecraft.ru
-
-{PURPLE}ИНФОРМАЦИЯ И ЗАМЕТКИ:{COLOR_END}
-{GREEN}инфо{COLOR_END} - Полезная информация
-{GREEN}новости{COLOR_END} - Новости майнкрафт
-{GREEN}создать заметки{COLOR_END} - Добавить новую заметку
-{GREEN}заметки{COLOR_END} - Показать все заметки
-
-{PURPLE}ПОЛЬЗОВАТЕЛЬСКИЕ РЕШЕНИЯ:{COLOR_END}
-{GREEN}скачать плагин{COLOR_END} - Скачать плагин для лаунчера
-{GREEN}удалить плагин{COLOR_END} - Удалить плагин лаунчера
-""")
+if command == "помощь":
+ print(f"""
+{SKY_BLUE}ДОСТУПНЫЕ КОМАНДЫ:{COLOR_END}
+
+{PURPLE}НАСТРОЙКА АККАУНТОВ:{COLOR_END}
+{GREEN}офф акк{COLOR_END} - Управление оффлайн аккаунтами
+{GREEN}елу акк{COLOR_END} - Управление ely.by аккаунтами {RED}(В РАЗРАБОТКЕ){COLOR_END}
+
+{PURPLE}ПРОСМОТР И УСТАНОВКА:{COLOR_END}
+{GREEN}скачать ваниль{COLOR_END} - Показать и установить версии майнкрафт
+{GREEN}установить мод версию{COLOR_END} - Скачать модлоадеры: Fabric, Quilt, Forge и NeoForge ставятся поверх ванили без лишних файлов, LiteLoader и другие из каталога
+
+{PURPLE}УСТАНОВКА И ЗАПУСК:{COLOR_END}
+{GREEN}запуск ванили{COLOR_END} - Запустить ванильный Minecraft
+{GREEN}запуск мод{COLOR_END} - Запустить модифицированный майнкрафт (Fabric, Forge и т.д.), перед запуском проверяются моды инстанса
+{GREEN}перезапуск{COLOR_END} - Запустить последнюю запущенную версию с теми же настройками без вопросов
+{GREEN}процессы{COLOR_END} - Запущенные клиенты: память, процессор, логи, остановка и лимиты
+{GREEN}jvm{COLOR_END} - Профиль аргументов джавы активного инстанса: авто подбор или свои аргументы
+
+{PURPLE}РАБОТА С ФАЙЛАМИ:{COLOR_END}
+{GREEN}корень{COLOR_END} - Открыть корневую папку лаунчера
+{GREEN}моды{COLOR_END} - Открыть папку модов активного инстанса
+{GREEN}ресурспак{COLOR_END} - Открыть папку ресурспаков активного инстанса
+{GREEN}шейдеры{COLOR_END} - Открыть папку шейдеров активного инстанса
+{GREEN}миры{COLOR_END} - Открыть папку миров активного инстанса
+{GREEN}скрины{COLOR_END} - Открыть папку скриншотов активного инстанса
+{GREEN}конфиги{COLOR_END} - Открыть папку конфигов активного инстанса
+{GREEN}схемы{COLOR_END} - Открыть папку схем Litematica активного инстанса
+{GREEN}бэкап{COLOR_END} - Снимки инстанса и конфигов лаунчера: создать, восстановить, удалить старые
+{GREEN}сжать миры{COLOR_END} - Сжать миры инстанса и удалить чанки, где игроки почти не были
+{GREEN}клон{COLOR_END} - Клонировать инстанс без лишнего места на диске, шаблоны инстансов
+{GREEN}проверка{COLOR_END} - Проверить версии и джаву, докачать битые и пропавшие файлы
+{GREEN}конфиги лаунчера{COLOR_END} - Скопировать папку конфигов лаунчера на рабочий стол 
+{GREEN}хранилище{COLOR_END} - Объединить одинаковые библиотеки и ассеты, очистить и проверить хранилище
+{GREEN}удалить лаунчер{COLOR_END} - Полностью удалить папку лаунчера
+
+{PURPLE}МОДЫ:{COLOR_END}
+{GREEN}установить мод{COLOR_END} - Установка модов {RED}(В РАЗРАБОТКЕ){COLOR_END}
+{GREEN}альт мод{COLOR_END} - Искать моды на ru-minecraft.ru
+
+{PURPLE}ИНФОРМАЦИЯ И ЗАМЕТКИ:{COLOR_END}
+{GREEN}инфо{COLOR_END} - Полезная информация
+{GREEN}новости{COLOR_END} - Новости майнкрафт
+{GREEN}создать заметки{COLOR_END} - Добавить новую заметку
+{GREEN}заметки{COLOR_END} - Показать все заметки
+
+{PURPLE}ПОЛЬЗОВАТЕЛЬСКИЕ РЕШЕНИЯ:{COLOR_END}
+{GREEN}скачать плагин{COLOR_END} - Скачать плагин для лаунчера
+{GREEN}удалить плагин{COLOR_END} - Удалить плагин лаунчера
+{GREEN}задачи{COLOR_END} - Фоновые задачи (установка версий, джавы, плагинов): ход выполнения и отмена
+{GREEN}реестр{COLOR_END} - Показать загруженные модули, их команды и время загрузки
+{GREEN}статистика{COLOR_END} - Время команд, скорость загрузок, распаковки и запуска игры
+{GREEN}обновить{COLOR_END} - Обновить модули лаунчера и плагины без перезапуска, откат обновления
+{GREEN}кеш сети{COLOR_END} - Раздать скачанные версии и джаву другим компьютерам в локальной сети или качать через них
+""")
@@ -1,9 +1,9 @@
-if command == "инфо":
-  print(f"""
-{SKY_BLUE}Последние новости Minecraft:{COLOR_END}
-{SKY_BLUE}- https://t.me/nerkinboat{COLOR_END}
-{SKY_BLUE}- https://www.youtube.com/@Nerkin/{COLOR_END}
-{SKY_BLUE}- Сервера майнкрафт:{COLOR_END}
-{SKY_BLUE}- https://t.me/playdacha Айпи: playdacha.ru{COLOR_END}
-{SKY_BLUE}- Ванильный сервер майнкрафт. Есть приваты и команда /home. Маленькое и дружелюбное комьюнити.{COLOR_END}
+if command == "инфо":
+  print(f"""
+{SKY_BLUE}Последние новости Minecraft:{COLOR_END}
+{SKY_BLUE}- https://t.me/nerkinboat{COLOR_END}
+{SKY_BLUE}- https://www.youtube.com/@Nerkin/{COLOR_END}
+{SKY_BLUE}- Сервера майнкрафт:{COLOR_END}
+{SKY_BLUE}- https://t.me/playdacha Айпи: playdacha.ru{COLOR_END}
+{SKY_BLUE}- Ванильный сервер майнкрафт. Есть приваты и команда /home. Маленькое и дружелюбное комьюнити.{COLOR_END}
 """)
\ No newline at end of file
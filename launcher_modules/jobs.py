@@ -0,0 +1,24 @@
+if command == "задачи":
+ launcher_jobs = list_jobs()
+
+ if not launcher_jobs:
+  print(f"{YELLOW}Фоновых задач нет{COLOR_END}")
+ else:
+  for number_job, launcher_job in enumerate(launcher_jobs, start=1):
+   job_line = f"{number_job}) {launcher_job['name']} - {launcher_job['status']}, {job_elapsed(launcher_job):.1f} с"
+   if launcher_job["status"] == "выполняется" and launcher_job["progress"]:
+    job_line += f" - {launcher_job['progress']}"
+   elif launcher_job["status"] == "ошибка":
+    job_line += f" - {launcher_job['error']}"
+   print(f"{GREEN if launcher_job['finished'] else YELLOW}{job_line}{COLOR_END}")
+
+  choice_job = str(input(f"{GREEN}Введите номер задачи для отмены или нажмите Enter чтобы вернуться: {COLOR_END}")).strip()
+
+  if choice_job.isdigit():
+   index_job = int(choice_job) - 1
+
+   if 0 <= index_job < len(launcher_jobs) and not launcher_jobs[index_job]["finished"]:
+    cancel_job(launcher_jobs[index_job])
+    print(f"{YELLOW}Задача {launcher_jobs[index_job]['name']} будет отменена{COLOR_END}")
+   else:
+    print(f"{RED}Нет такой активной задачи{COLOR_END}")
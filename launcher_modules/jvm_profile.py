@@ -0,0 +1,26 @@
+if command == "jvm":
+ from launcher_jvm import load_jvm_profiles, save_jvm_profile, delete_jvm_profile, system_memory
+ jvm_profile = load_jvm_profiles(jvm_profiles_file).get(instance_name)
+
+ if jvm_profile:
+  print(f"{SKY_BLUE}Профиль JVM инстанса {instance_name} ({'свой' if jvm_profile['mode'] == 'manual' else 'авто'}): {jvm_profile.get('description', '')}{COLOR_END}")
+  print(f"{GREEN}{' '.join(jvm_profile['arguments'])}{COLOR_END}")
+ else:
+  print(f"{YELLOW}У инстанса {instance_name} ещё нет профиля JVM, при запуске с пустым ОЗУ он будет подобран автоматически{COLOR_END}")
+
+ jvm_memory = system_memory()
+ if jvm_memory:
+  print(f"{SKY_BLUE}ОЗУ: {jvm_memory[0] / 1073741824:.1f} ГБ, свободно {jvm_memory[1] / 1073741824:.1f} ГБ, ядер: {os.cpu_count()}{COLOR_END}")
+
+ choice_jvm = str(input(f"{GREEN}'авто' - вернуть автоматический подбор, 'свой' - задать свои аргументы, Enter - вернуться: {COLOR_END}")).strip().lower()
+
+ if choice_jvm == "авто":
+  delete_jvm_profile(jvm_profiles_file, instance_name)
+  print(f"{GREEN}При следующем запуске аргументы будут подобраны заново{COLOR_END}")
+
+ elif choice_jvm == "свой":
+  print(f"{YELLOW}Пример: -Xmx6G -Xms6G -XX:+UseG1GC{COLOR_END}")
+  jvm_arguments_input = str(input(f"{RED}Введите аргументы: {COLOR_END}")).strip()
+  if jvm_arguments_input:
+   save_jvm_profile(jvm_profiles_file, instance_name, "manual", jvm_arguments_input.split(), "свой профиль")
+   print(f"{GREEN}Профиль сохранён, он будет использоваться при запуске с пустым ОЗУ{COLOR_END}")
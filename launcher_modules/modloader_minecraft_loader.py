@@ -1,87 +1,115 @@
-if command == "запуск мод":
- offline_accounts_input = ""
- choise_number_username = ""
- collector_java_exe = ""
- user_arguments_input = ""
-
- user_input_mode = str(input(f"{YELLOW}Введите свой никнейм или выберите из созданных (введите созданные): {COLOR_END}")).strip()
-
- if user_input_mode == "созданные":
-  offline_accounts_path_folder = r"C:\cobalt_launcher_nano_reliz\config_files\accounts.txt"
-  with open(offline_accounts_path_folder, "r", encoding="utf-8") as f:
-   accounts_list = [line.strip() for line in f.readlines() if line.strip()]
-
-  for number_list_accounts, file_accounts in enumerate(accounts_list, start=1):
-   print(f"{BLUE}{number_list_accounts}) {file_accounts} {COLOR_END}")
-
-  username_choice = int(input(f"{YELLOW}Введите номер аккаунта: {COLOR_END}"))
-  choise_number_username = accounts_list[username_choice - 1]
-  print(f"{GREEN}Выбран аккаунт под номером {username_choice}! Ваш никнейм: {choise_number_username} {COLOR_END}")
- else:
-  offline_accounts_input = user_input_mode
-
- modloader_versions_folder = Path(r"C:\cobalt_launcher_nano_reliz\modloader_minecraft")
- if modloader_versions_folder.exists():
-  for versions_dir in modloader_versions_folder.rglob("versions"):
-   if versions_dir.is_dir():
-    for version_path in versions_dir.iterdir():
-     if version_path.is_dir():
-      print(f"{GREEN}{version_path.name}{COLOR_END}")
-
- version_minecraft = str(input(f"{YELLOW}Введите название версии которую вы хотите запустить: {COLOR_END}")).strip()
- ram_size = str(input(f"{YELLOW}Сколько хотите выделить ОЗУ игре(минимум 4 гб): {COLOR_END}")).strip()
- version_java = str(input(f"{YELLOW}Какую версию джавы вы хотите использовать? 8(До 1.16.5), 17(До 1.21.4), 21(До последних) (или свою джаву) (или свои аргументы): {COLOR_END}")).strip()
-
- if version_java == "8":
-  collector_java_exe = r"C:\cobalt_launcher_nano_reliz\java\java_8\java_8\bin\java.exe"
- elif version_java == "17":
-  collector_java_exe = r"C:\cobalt_launcher_nano_reliz\java\java_17\java_17\bin\java.exe"
- elif version_java == "21":
-  collector_java_exe = r"C:\cobalt_launcher_nano_reliz\java\java_21\java_21\bin\java.exe"
- elif version_java == "свою джаву":
-  print(f"{PURPLE}Пример пути: C:\\cobalt_launcher_nano_reliz\\java\\java_17\\bin\\java.exe{COLOR_END}")
-  collector_java_exe = str(input(f"{GREEN}Введите путь до джавы: {COLOR_END}")).strip()
- elif version_java == "свои аргументы":
-  print(f"{YELLOW}Отсюда можно взять аргументы https://rubukkit.org{COLOR_END}")
-  print(f"{YELLOW}Пример: -Xmx4G -Xms4G{COLOR_END}")
-  user_arguments_input = str(input(f"{RED}Введите аргументы: {COLOR_END}")).strip()
-
- if not collector_java_exe:
-  collector_java_exe = r"C:\cobalt_launcher_nano_reliz\java\java_17\bin\java.exe"
-
- version = f"{version_minecraft}"
- if 'instance_name' not in locals() or not instance_name:
-  instance_name = "default"
- instances_game_directory = rf"C:\cobalt_launcher_nano_reliz\instances\{instance_name}"
- username = offline_accounts_input or choise_number_username
-
- minecraft_modloader_folder = ""
- if modloader_versions_folder.exists():
-  for p in modloader_versions_folder.rglob("*.json"):
-   if p.stem == version:
-    minecraft_modloader_folder = str(p.parent.parent.parent)
-    break
-
- if not minecraft_modloader_folder:
-  minecraft_modloader_folder = rf"C:\cobalt_launcher_nano_reliz\modloader_minecraft\{version_minecraft}"
-
- if user_arguments_input:
-  final_java_arguments = user_arguments_input.split()
- else:
-  final_java_arguments = [f"-Xmx{ram_size}G", f"-Xms4G"]
-
- options = {
-  "username": username,
-  "uuid": "",
-  "token": "",
-  "executablePath": collector_java_exe,
-  "jvmArguments": final_java_arguments,
-  "enableLoggingConfig": False,
-  "gameDirectory": instances_game_directory
- }
-
- launch_command = minecraft_launcher_lib.command.get_minecraft_command(version, minecraft_modloader_folder, options)
-
- cmd_command = ["cmd.exe", "/K"] + launch_command
- subprocess.Popen(cmd_command, creationflags=subprocess.CREATE_NEW_CONSOLE)
- print(f"{GREEN}Minecraft {version} скоро запустится!{COLOR_END}")
+if command == "запуск мод":
+ from launcher_launch import get_launch_command, start_minecraft
+ from launcher_installed import get_installed_versions, find_installed_version, bundled_java
+ from launcher_mods import scan_mods_folder, check_mods
+ from launcher_jvm import instance_jvm_arguments, save_jvm_profile
+ offline_accounts_input = ""
+ choise_number_username = ""
+ collector_java_exe = ""
+ user_arguments_input = ""
+
+ user_input_mode = str(input(f"{YELLOW}Введите свой никнейм или выберите из созданных (введите созданные): {COLOR_END}")).strip()
+
+ if user_input_mode == "созданные":
+  offline_accounts_path_folder = Path(root_folder) / "config_files" / "accounts.txt"
+  with open(offline_accounts_path_folder, "r", encoding="utf-8") as f:
+   accounts_list = [line.strip() for line in f.readlines() if line.strip()]
+
+  for number_list_accounts, file_accounts in enumerate(accounts_list, start=1):
+   print(f"{BLUE}{number_list_accounts}) {file_accounts} {COLOR_END}")
+
+  username_choice = int(input(f"{YELLOW}Введите номер аккаунта: {COLOR_END}"))
+  choise_number_username = accounts_list[username_choice - 1]
+  print(f"{GREEN}Выбран аккаунт под номером {username_choice}! Ваш никнейм: {choise_number_username} {COLOR_END}")
+ else:
+  offline_accounts_input = user_input_mode
+
+ installed_modloader_versions = [installed_entry for installed_entry in get_installed_versions(root_folder, cache_folder) if installed_entry["kind"] == "modloader"]
+ for installed_entry in installed_modloader_versions:
+  print(f"{GREEN}{installed_entry['id']}{COLOR_END} {SKY_BLUE}({installed_entry['loader']}, игра {installed_entry['game_version']}, джава {installed_entry['java']}){COLOR_END}")
+
+ version_minecraft = str(input(f"{YELLOW}Введите название версии которую вы хотите запустить: {COLOR_END}")).strip()
+ installed_entry = find_installed_version(installed_modloader_versions, version_minecraft)
+ ram_size = str(input(f"{YELLOW}Сколько хотите выделить ОЗУ игре(минимум 4 гб) (Enter - подобрать автоматически): {COLOR_END}")).strip()
+ version_java = str(input(f"{YELLOW}Какую версию джавы вы хотите использовать? 8(До 1.16.5), 17(До 1.21.4), 21(До последних) (или свою джаву) (или свои аргументы) (Enter - подходящая для версии): {COLOR_END}")).strip()
+
+ if not version_java and installed_entry:
+  version_java = bundled_java(installed_entry["java"])
+
+ if version_java == "8":
+  collector_java_exe = java8_folder / "java_8" / "bin" / "java.exe"
+ elif version_java == "17":
+  collector_java_exe = java17_folder / "java_17" / "bin" / "java.exe"
+ elif version_java == "21":
+  collector_java_exe = java21_folder / "java_21" / "bin" / "java.exe"
+ elif version_java == "свою джаву":
+  print(f"{PURPLE}Пример пути: {java17_folder / 'java_17' / 'bin' / 'java.exe'}{COLOR_END}")
+  collector_java_exe = str(input(f"{GREEN}Введите путь до джавы: {COLOR_END}")).strip()
+ elif version_java == "свои аргументы":
+  print(f"{YELLOW}Отсюда можно взять аргументы https://rubukkit.org{COLOR_END}")
+  print(f"{YELLOW}Пример: -Xmx4G -Xms4G{COLOR_END}")
+  user_arguments_input = str(input(f"{RED}Введите аргументы: {COLOR_END}")).strip()
+
+ if not collector_java_exe:
+  collector_java_exe = java17_folder / "bin" / "java.exe"
+
+ version = f"{version_minecraft}"
+ if 'instance_name' not in locals() or not instance_name:
+  instance_name = "default"
+ instances_game_directory = instances_folder / instance_name
+ username = offline_accounts_input or choise_number_username
+
+ minecraft_modloader_folder = installed_entry["minecraft_folder"] if installed_entry else ""
+
+ if not minecraft_modloader_folder:
+  minecraft_modloader_folder = Path(root_folder) / "modloader_minecraft" / version_minecraft
+
+ # моды инстанса проверяются до запуска, а не после падения игры
+ launch_confirmed = True
+ instance_mods = []
+ if installed_entry:
+  instance_mods, _ = scan_mods_folder(instances_game_directory / "mods", cache_folder)
+  mods_problems = check_mods(instance_mods, installed_entry["loader"], installed_entry["game_version"])
+  if mods_problems:
+   print(f"{RED}Проблемы с модами ({len(mods_problems)}):{COLOR_END}")
+   for mods_problem in mods_problems:
+    print(f"{YELLOW}{mods_problem}{COLOR_END}")
+   launch_confirmed = str(input(f"{RED}Игра скорее всего не запустится. Всё равно запустить? (да/нет): {COLOR_END}")).strip().lower() == "да"
+  elif instance_mods:
+   print(f"{SKY_BLUE}Моды проверены: {len(instance_mods)} файлов, конфликтов нет{COLOR_END}")
+
+ if user_arguments_input:
+  final_java_arguments = user_arguments_input.split()
+  if str(input(f"{YELLOW}Сохранить эти аргументы профилем инстанса {instance_name}? (да/нет): {COLOR_END}")).strip().lower() == "да":
+   save_jvm_profile(jvm_profiles_file, instance_name, "manual", final_java_arguments, "свой профиль")
+ elif ram_size:
+  final_java_arguments = [f"-Xmx{ram_size}G", f"-Xms4G"]
+ else:
+  # ручной профиль инстанса или подбор по памяти, ядрам и версии джавы (команда "jvm" - посмотреть и изменить)
+  final_java_arguments, jvm_description, jvm_mode = instance_jvm_arguments(jvm_profiles_file, instance_name, collector_java_exe, int(version_java) if version_java.isdigit() else None, modded=True, mod_count=len(instance_mods))
+  print(f"{SKY_BLUE}JVM {'(свой профиль)' if jvm_mode == 'manual' else '(авто)'}: {jvm_description}{COLOR_END}")
+
+ options = {
+  "username": username,
+  "uuid": "",
+  "token": "",
+  "executablePath": str(collector_java_exe),
+  "jvmArguments": final_java_arguments,
+  "enableLoggingConfig": False,
+  "gameDirectory": str(instances_game_directory)
+ }
+
+ if launch_confirmed:
+  launch_command, launch_from_cache = get_launch_command(version, minecraft_modloader_folder, options, cache_folder, f"{version} ({instance_name})")
+  if launch_from_cache:
+   print(f"{SKY_BLUE}Команда запуска взята из кеша{COLOR_END}")
+
+  if active_jobs("java"):
+   print(f"{RED}Джава ещё скачивается в фоне, если игра не запустится - дождитесь окончания (команда \"задачи\"){COLOR_END}")
+  try:
+   game_session = start_minecraft(launch_command)
+  except ClientLimitReached as e:
+   print(f"{RED}Не запущено: {e}. Закройте клиент или измените лимиты в команде \"процессы\"{COLOR_END}")
+  else:
+   print(f"{GREEN}Minecraft {version} скоро запустится!{COLOR_END}")
+   print(f"{SKY_BLUE}Лог игры: {game_session['log_file']}{COLOR_END}")
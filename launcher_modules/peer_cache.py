@@ -0,0 +1,57 @@
+if command == "кеш сети":
+ from launcher_peer import stop_peer_server, peer_server, save_peer_settings, lan_address, peer_cache_size, clear_peer_cache
+ if peer_server["server"]:
+  peer_stats = peer_server["stats"]
+  print(f"{GREEN}Кеш-сервер работает: http://{lan_address()}:{peer_server['port']}{COLOR_END}")
+  print(f"{SKY_BLUE}Запросов {peer_stats['requests']} от {len(peer_stats['clients'])} компьютеров: из хранилища {peer_stats['store']}, из кеша {peer_stats['cache']}, скачано для сети {peer_stats['fetched']}, перенаправлено {peer_stats['redirected']}, отдано {peer_stats['bytes'] / 1048576:.1f} МБ{COLOR_END}")
+ else:
+  print(f"{YELLOW}Кеш-сервер выключен{COLOR_END}")
+ if peer_cache["url"]:
+  print(f"{SKY_BLUE}Загрузки идут через кеш {peer_cache['url']}: получено файлов {peer_cache['served']}, ошибок {peer_cache['failed']}{COLOR_END}")
+ else:
+  print(f"{YELLOW}Кеш другого компьютера не задан, загрузки идут из интернета{COLOR_END}")
+
+ print(f"""
+{GREEN}Что хотите сделать?{COLOR_END}
+{GREEN}1) {'Остановить' if peer_server['server'] else 'Запустить'} кеш-сервер на этом компьютере{COLOR_END}
+{GREEN}2) Качать через кеш другого компьютера{COLOR_END}
+{GREEN}3) Качать напрямую из интернета{COLOR_END}
+{GREEN}4) Очистить кеш сервера{COLOR_END}
+""")
+ choice_peer_cache = str(input("Укажите номер: ")).strip()
+ peer_settings = load_peer_settings(peer_settings_file)
+
+ if choice_peer_cache == "1":
+  if peer_server["server"]:
+   stop_peer_server()
+   print(f"{GREEN}Кеш-сервер остановлен{COLOR_END}")
+  else:
+   peer_port = str(input(f"{GREEN}Порт (Enter - {peer_settings['port']}): {COLOR_END}")).strip()
+   peer_port = int(peer_port) if peer_port.isdigit() else peer_settings["port"]
+   try:
+    peer_address = start_launcher_peer_server(peer_port)
+   except OSError as e:
+    print(f"{RED}Не удалось занять порт {peer_port}: {e}{COLOR_END}")
+   else:
+    save_peer_settings(peer_settings_file, peer_settings["url"], peer_port)
+    # сервер живёт, пока открыт лаунчер; без интерфейса - KERNEL.exe --serve-cache
+    print(f"{GREEN}Кеш-сервер запущен, на других компьютерах укажите адрес {peer_address}{COLOR_END}")
+
+ elif choice_peer_cache == "2":
+  peer_address = str(input(f"{GREEN}Адрес кеша, например http://192.168.1.10:8770: {COLOR_END}")).strip()
+  if peer_address and "://" not in peer_address:
+   peer_address = f"http://{peer_address}"
+  if peer_address:
+   save_peer_settings(peer_settings_file, peer_address, peer_settings["port"])
+   configure_peer_cache(peer_address)
+   print(f"{GREEN}Загрузки пойдут через {peer_address}, если он недоступен - из интернета{COLOR_END}")
+
+ elif choice_peer_cache == "3":
+  save_peer_settings(peer_settings_file, "", peer_settings["port"])
+  configure_peer_cache("")
+  print(f"{GREEN}Загрузки идут напрямую из интернета{COLOR_END}")
+
+ elif choice_peer_cache == "4":
+  peer_files, peer_bytes = peer_cache_size(cache_folder)
+  clear_peer_cache(cache_folder)
+  print(f"{GREEN}Удалено файлов {peer_files}, освобождено {peer_bytes / 1048576:.1f} МБ (файлы хранилища остаются){COLOR_END}")
@@ -0,0 +1,55 @@
+if command == "процессы":
+ game_sessions = list_sessions()
+ max_clients_text = process_settings["max_clients"] or "нет"
+ max_memory_text = f"{process_settings['max_memory_gb']} ГБ" if process_settings["max_memory_gb"] else "нет"
+ print(f"{SKY_BLUE}Лимит клиентов: {max_clients_text}, лимит памяти (сумма -Xmx): {max_memory_text}{COLOR_END}")
+
+ if not game_sessions:
+  print(f"{YELLOW}За этот запуск лаунчера игра не запускалась{COLOR_END}")
+ else:
+  running_memory = 0
+  for number_session, game_session in enumerate(game_sessions, start=1):
+   session_line = f"{number_session}) {game_session['label']}, pid {game_session['pid']} - "
+   if game_session["finished"] is None:
+    session_line += f"работает {format_uptime(session_uptime(game_session))}"
+    game_usage = session_usage(game_session)
+    if game_usage:
+     running_memory += game_usage[0]
+     session_line += f", ОЗУ {game_usage[0] / 1073741824:.2f} ГБ, ЦП {game_usage[1]:.0f}%"
+    print(f"{GREEN}{session_line}{COLOR_END}")
+   elif game_session["crashed"]:
+    print(f"{RED}{session_line}упал (код {game_session['exit_code']}) через {format_uptime(session_uptime(game_session))}{COLOR_END}")
+   else:
+    print(f"{YELLOW}{session_line}закрыт через {format_uptime(session_uptime(game_session))}{COLOR_END}")
+
+  if running_memory:
+   print(f"{SKY_BLUE}Всего ОЗУ у запущенных клиентов: {running_memory / 1073741824:.2f} ГБ{COLOR_END}")
+
+ choice_process = str(input(f"{GREEN}Номер процесса - остановить, 'лог номер' - конец лога, 'лимиты' - изменить лимиты, Enter - вернуться: {COLOR_END}")).strip()
+
+ if choice_process.isdigit():
+  index_session = int(choice_process) - 1
+  if 0 <= index_session < len(game_sessions) and stop_game(game_sessions[index_session]):
+   print(f"{YELLOW}Minecraft {game_sessions[index_session]['label']} будет остановлен{COLOR_END}")
+  else:
+   print(f"{RED}Нет такого запущенного процесса{COLOR_END}")
+
+ elif choice_process.startswith("лог"):
+  log_number = choice_process[3:].strip()
+  if log_number.isdigit() and 0 < int(log_number) <= len(game_sessions):
+   game_session = game_sessions[int(log_number) - 1]
+   print(f"{SKY_BLUE}{game_session['log_file']}{COLOR_END}")
+   for log_line in session_log_tail(game_session):
+    print(log_line)
+  else:
+   print(f"{RED}Нет такого процесса{COLOR_END}")
+
+ elif choice_process == "лимиты":
+  try:
+   new_max_clients = int(input(f"{YELLOW}Сколько клиентов можно запускать одновременно (0 - без лимита): {COLOR_END}").strip() or 0)
+   new_max_memory = float(input(f"{YELLOW}Сколько ГБ (-Xmx) всего можно отдать клиентам (0 - без лимита): {COLOR_END}").strip().replace(",", ".") or 0)
+  except ValueError:
+   print(f"{RED}Нужно ввести число{COLOR_END}")
+  else:
+   set_process_limits(max(new_max_clients, 0), max(new_max_memory, 0))
+   print(f"{GREEN}Лимиты сохранены{COLOR_END}")
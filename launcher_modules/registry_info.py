@@ -0,0 +1,12 @@
+if command == "реестр":
+ print(f"{SKY_BLUE}Модулей загружено: {registry_stats['modules']}, команд: {registry_stats['commands']}, компиляций с запуска: {registry_stats['compiled']}{COLOR_END}")
+ print(f"{SKY_BLUE}Проверка модулей: {registry_stats['load_ms']:.2f} мс, поиск команды: {registry_stats['dispatch_ms'] * 1000:.1f} мкс{COLOR_END}")
+ if registry_stats["last_command"]:
+  print(f"{SKY_BLUE}Предыдущая команда '{registry_stats['last_command']}' выполнялась {registry_stats['command_ms']:.1f} мс{COLOR_END}")
+
+ for module_command, command_modules_list in sorted(command_dispatch.items()):
+  modules_names = ", ".join(module["name"] for module in command_modules_list)
+  print(f"{GREEN}{module_command}{COLOR_END} - {modules_names}")
+
+ if fallback_modules:
+  print(f"{YELLOW}Выполняются на каждую команду: {', '.join(module['name'] for module in fallback_modules)}{COLOR_END}")
@@ -0,0 +1,16 @@
+if command == "перезапуск":
+ from launcher_launch import get_last_launch_command, start_minecraft
+ relaunch_command, relaunch_label, relaunch_from_cache = get_last_launch_command(cache_folder)
+
+ if not relaunch_command:
+  print(f"{RED}Ещё ничего не запускалось, используйте 'запуск ванили' или 'запуск мод'{COLOR_END}")
+ else:
+  if not relaunch_from_cache:
+   print(f"{YELLOW}Файлы версии изменились, команда запуска собрана заново{COLOR_END}")
+  try:
+   game_session = start_minecraft(relaunch_command)
+  except ClientLimitReached as e:
+   print(f"{RED}Не запущено: {e}. Закройте клиент или измените лимиты в команде \"процессы\"{COLOR_END}")
+  else:
+   print(f"{GREEN}Minecraft {relaunch_label} скоро запустится!{COLOR_END}")
+   print(f"{SKY_BLUE}Лог игры: {game_session['log_file']}{COLOR_END}")
@@ -0,0 +1,43 @@
+if command == "статистика":
+ if not metrics_enabled():
+  print(f"{YELLOW}Метрики выключены (COBALT_METRICS=0), показаны только ранее записанные{COLOR_END}")
+
+ metrics_records = read_metrics()
+ metrics_kinds = [
+  ("command", "КОМАНДЫ"),
+  ("startup", "ЗАПУСК ЛАУНЧЕРА"),
+  ("launch_plan", "СБОРКА КОМАНДЫ ЗАПУСКА ИГРЫ"),
+  ("launch", "ОТ ВЫБОРА ВЕРСИИ ДО СТАРТА ПРОЦЕССА"),
+  ("session", "ИГРОВЫЕ СЕССИИ"),
+  ("install", "УСТАНОВКА ВЕРСИЙ"),
+  ("download", "ЗАГРУЗКИ"),
+  ("catalog", "КАТАЛОГИ"),
+  ("extract", "РАСПАКОВКА"),
+  ("world", "ОБСЛУЖИВАНИЕ МИРОВ"),
+  ("clone", "КЛОНИРОВАНИЕ ИНСТАНСОВ"),
+  ("verify", "ПРОВЕРКА ФАЙЛОВ"),
+  ("update", "ОБНОВЛЕНИЕ МОДУЛЕЙ"),
+ ]
+
+ if not metrics_records:
+  print(f"{YELLOW}Замеров пока нет{COLOR_END}")
+ else:
+  print(f"{SKY_BLUE}Замеров: {len(metrics_records)}, время в мс: медиана / 90% / 99%{COLOR_END}")
+
+  for metrics_kind, metrics_title in metrics_kinds:
+   kind_summary = summarize_metrics(metrics_records, metrics_kind)
+   if not kind_summary:
+    continue
+   print(f"{PURPLE}{metrics_title}:{COLOR_END}")
+
+   for (_, metric_name), metric_summary in sorted(kind_summary.items(), key=lambda item: -item[1]["count"]):
+    metric_line = f"{metric_name} - {metric_summary['count']} раз, {metric_summary['p50']:.1f} / {metric_summary['p90']:.1f} / {metric_summary['p99']:.1f}"
+    if metric_summary["bytes"]:
+     metric_line += f", {metric_summary['bytes'] / 1048576:.1f} МБ"
+     if metric_summary["seconds"]:
+      metric_line += f", {metric_summary['bytes'] / 1048576 / metric_summary['seconds']:.1f} МБ/с"
+    print(f"{GREEN}{metric_line}{COLOR_END}")
+
+  if str(input(f"{YELLOW}Очистить статистику? (да/нет): {COLOR_END}")).strip().lower() == "да":
+   clear_metrics()
+   print(f"{GREEN}Статистика очищена{COLOR_END}")
@@ -0,0 +1,33 @@
+if command == "хранилище":
+ from launcher_store import deduplicate_trees, collect_garbage, verify_store
+ print(f"""
+{GREEN}Общее хранилище библиотек и ассетов:{COLOR_END}
+{GREEN}1) Объединить одинаковые файлы ванили и модлоадеров{COLOR_END}
+{GREEN}2) Удалить неиспользуемые файлы из хранилища{COLOR_END}
+{GREEN}3) Проверить целостность хранилища{COLOR_END}
+""")
+ choice_store = str(input("Укажите номер: ")).strip()
+
+ store_tree_folders = [Path(root_folder) / "minecraft_vanilla"]
+ modloader_store_folder = Path(root_folder) / "modloader_minecraft"
+ if modloader_store_folder.is_dir():
+  store_tree_folders += [folder for folder in modloader_store_folder.iterdir() if folder.is_dir()]
+
+ if choice_store == "1":
+  print(f"{YELLOW}Поиск одинаковых файлов...{COLOR_END}")
+  store_stats = deduplicate_trees(store_tree_folders, store_folder)
+  print(f"{GREEN}Проверено файлов: {store_stats['files']}, пересчитано хешей: {store_stats['hashed']}, объединено: {store_stats['deduplicated']}, освобождено {store_stats['saved_bytes'] / 1048576:.1f} МБ{COLOR_END}")
+
+ elif choice_store == "2":
+  store_stats = collect_garbage(store_tree_folders, store_folder)
+  print(f"{GREEN}Объектов в хранилище: {store_stats['objects']}, удалено: {store_stats['removed']}, освобождено {store_stats['freed_bytes'] / 1048576:.1f} МБ{COLOR_END}")
+
+ elif choice_store == "3":
+  print(f"{YELLOW}Проверка хранилища...{COLOR_END}")
+  store_objects_count, broken_objects = verify_store(store_folder)
+  print(f"{GREEN}Проверено объектов: {store_objects_count}{COLOR_END}")
+  for broken_object in broken_objects:
+   print(f"{RED}Повреждён: {broken_object.name}{COLOR_END}")
+   broken_object.unlink()
+  if broken_objects:
+   print(f"{RED}Повреждённые объекты удалены из хранилища, переустановите версии, которые их использовали{COLOR_END}")
@@ -0,0 +1,45 @@
+if command == "обновить":
+ from launcher_update import plan_update, apply_update, rollback_update, installed_update_version, UpdateError
+ print(f"""
+{GREEN}Что хотите сделать?{COLOR_END}
+{GREEN}1) Обновить модули лаунчера и плагины{COLOR_END}
+{GREEN}2) Откатить последнее обновление{COLOR_END}
+""")
+ choice_update = str(input("Укажите номер: ")).strip()
+
+ if choice_update == "1":
+  print(f"{SKY_BLUE}Проверка обновлений...{COLOR_END}")
+  try:
+   update_plan = plan_update(fetch_update_manifest(), root_folder)
+  except (UpdateError, DownloadError, ValueError) as e:
+   update_plan = None
+   print(f"{RED}Не удалось получить список обновлений: {e}{COLOR_END}")
+
+  if update_plan and not update_plan["changed"] and not update_plan["removed"]:
+   print(f"{GREEN}Всё актуально (версия {update_plan['version'] or installed_update_version(root_folder) or '?'}), файлов {update_plan['unchanged']}{COLOR_END}")
+  elif update_plan:
+   print(f"{GREEN}Версия {installed_update_version(root_folder) or '?'} -> {update_plan['version'] or '?'}{COLOR_END}")
+   for update_file, update_entry in update_plan["changed"]:
+    print(f"{SKY_BLUE} {update_file.as_posix()} ({update_entry.get('size', 0) / 1024:.1f} КБ){COLOR_END}")
+   for update_file in update_plan["removed"]:
+    print(f"{YELLOW} {update_file.as_posix()} будет удалён{COLOR_END}")
+   print(f"{GREEN}Изменится файлов: {len(update_plan['changed'])}, удалится: {len(update_plan['removed'])}, без изменений: {update_plan['unchanged']}{COLOR_END}")
+
+   if str(input(f"{GREEN}Обновить? да/нет: {COLOR_END}")).strip() == "да":
+    try:
+     update_stats = apply_update(update_plan, root_folder)
+    except UpdateError as e:
+     print(f"{RED}{e}{COLOR_END}")
+    else:
+     # изменённые модули перечитываются сразу, перезапуск лаунчера не нужен
+     compiled_before = registry_stats["compiled"]
+     refresh_command_registry()
+     print(f"{GREEN}Обновлено файлов {update_stats['downloaded']} ({update_stats['bytes'] / 1024:.1f} КБ) за {update_stats['seconds']:.1f} с, удалено {update_stats['removed']}, перезагружено модулей {registry_stats['compiled'] - compiled_before}{COLOR_END}")
+
+ elif choice_update == "2":
+  update_journal = rollback_update(root_folder)
+  if update_journal is None:
+   print(f"{YELLOW}Откатывать нечего{COLOR_END}")
+  else:
+   refresh_command_registry()
+   print(f"{GREEN}Обновление {update_journal['version'] or '?'} откачено, версия {update_journal['previous_version'] or 'до обновлений'}{COLOR_END}")
@@ -0,0 +1,60 @@
+if command == "проверка":
+ from launcher_installed import get_installed_versions
+ from launcher_verify import verify_version, verify_runtime
+ print(f"""
+{GREEN}Что проверить?{COLOR_END}
+{GREEN}1) Установленные версии и модлоадеры (битые и пропавшие файлы будут скачаны заново){COLOR_END}
+{GREEN}2) Джаву (повреждённая будет скачана и распакована заново){COLOR_END}
+""")
+ choice_verify = str(input("Укажите номер: ")).strip()
+
+ if choice_verify == "1":
+  verify_candidates = get_installed_versions(root_folder, cache_folder)
+  for number_version, installed_entry in enumerate(verify_candidates, start=1):
+   print(f"{SKY_BLUE}{number_version}) {installed_entry['id']} ({installed_entry['bundle']}){COLOR_END}")
+
+  choice_version = str(input(f"{GREEN}Номер версии, 'все' - все версии, Enter - отмена: {COLOR_END}")).strip()
+  if choice_version == "все":
+   verify_entries_list = verify_candidates
+  elif choice_version.isdigit() and 0 < int(choice_version) <= len(verify_candidates):
+   verify_entries_list = [verify_candidates[int(choice_version) - 1]]
+  else:
+   verify_entries_list = []
+
+  # проверка идёт фоновой задачей, уже проверенные и неизменившиеся файлы не хешируются заново
+  def verify_versions_job(job, installed_entries):
+   verify_lines = []
+   for installed_entry in installed_entries:
+    set_job_progress(job, installed_entry["id"])
+    verify_result = verify_version(installed_entry["id"], installed_entry["minecraft_folder"], cache_folder, repair=True, store_folder=store_folder, progress=lambda done, total: set_job_progress(job, f"{installed_entry['id']} {done}/{total}"))
+    verify_line = f"{installed_entry['id']}: файлов {verify_result['files']}, перепроверено {verify_result['hashed']}, восстановлено {verify_result['repaired']}"
+    if verify_result["unrepairable"]:
+     verify_line += f", не восстановить {len(verify_result['unrepairable'])} - переустановите модлоадер"
+    verify_lines.append(verify_line)
+   return "; ".join(verify_lines)
+
+  if verify_entries_list:
+   submit_job("Проверка версий", "install", verify_versions_job, verify_entries_list)
+   print(f"{GREEN}Проверка началась в фоне, итог - команда \"задачи\"{COLOR_END}")
+
+ elif choice_verify == "2":
+  broken_java_runtimes = []
+  for runtime in java_runtimes:
+   if not runtime["folder"].is_dir():
+    print(f"{YELLOW}{runtime['name']}: не установлена{COLOR_END}")
+    continue
+   java_result = verify_runtime(runtime["folder"], cache_folder)
+   if java_result is None:
+    print(f"{YELLOW}{runtime['name']}: нет списка файлов (установлена старой версией лаунчера), проверить нельзя{COLOR_END}")
+    if str(input(f"{GREEN}Переустановить {runtime['name']}? да/нет: {COLOR_END}")).strip() == "да":
+     broken_java_runtimes.append(runtime)
+   elif java_result["missing"] or java_result["broken"]:
+    print(f"{RED}{runtime['name']}: пропало файлов {len(java_result['missing'])}, повреждено {len(java_result['broken'])}{COLOR_END}")
+    broken_java_runtimes.append(runtime)
+   else:
+    print(f"{GREEN}{runtime['name']}: в порядке, файлов {java_result['files']}, перепроверено {java_result['hashed']} за {java_result['seconds']:.1f} с{COLOR_END}")
+
+  # целые файлы при распаковке не перезаписываются, заменяются только повреждённые
+  if broken_java_runtimes:
+   submit_job("Восстановление джавы", "java", install_java_job, broken_java_runtimes)
+   print(f"{GREEN}Восстановление {', '.join(runtime['name'] for runtime in broken_java_runtimes)} началось в фоне, ход - команда \"задачи\"{COLOR_END}")
@@ -0,0 +1,47 @@
+if command == "сжать миры":
+ from launcher_worlds import optimize_world, folder_size, TICKS_PER_SECOND
+ saves_folder = Path(root_folder) / "instances" / instance_name / "saves"
+ instance_worlds = sorted(world_folder for world_folder in saves_folder.iterdir() if (world_folder / "level.dat").exists()) if saves_folder.is_dir() else []
+
+ if not instance_worlds:
+  print(f"{YELLOW}В инстансе {instance_name} нет миров{COLOR_END}")
+ elif any(game_session["instance"] == instance_name for game_session in running_sessions()):
+  # игра держит регионы открытыми и дописывает их, сжимать их сейчас нельзя
+  print(f"{RED}Инстанс {instance_name} сейчас запущен, закройте игру перед обслуживанием миров{COLOR_END}")
+ else:
+  for number_world, world_folder in enumerate(instance_worlds, start=1):
+   print(f"{GREEN}{number_world}) {world_folder.name} - {folder_size(world_folder) / 1048576:.1f} МБ{COLOR_END}")
+
+  choice_world = str(input(f"{GREEN}Номер мира для обслуживания, 'все' - все миры, Enter - вернуться: {COLOR_END}")).strip()
+  if choice_world == "все":
+   selected_worlds = instance_worlds
+  elif choice_world.isdigit() and 0 < int(choice_world) <= len(instance_worlds):
+   selected_worlds = [instance_worlds[int(choice_world) - 1]]
+  else:
+   selected_worlds = []
+
+  if selected_worlds:
+   print(f"{SKY_BLUE}Регионы всегда сжимаются: свободные и лишние секторы убираются, заголовки пересобираются{COLOR_END}")
+   choice_inhabited = str(input(f"{YELLOW}Удалить чанки, где игроки были меньше N секунд (игра создаст их заново). N или Enter - не удалять: {COLOR_END}")).strip()
+   min_inhabited_ticks = int(choice_inhabited) * TICKS_PER_SECOND if choice_inhabited.isdigit() else 0
+
+   # сначала пробный проход без изменений
+   world_reports = []
+   for world_folder in selected_worlds:
+    world_report = optimize_world(world_folder, min_inhabited_ticks, dry_run=True)
+    world_reports.append((world_folder, world_report))
+    print(f"{GREEN}{world_folder.name}: регионов {world_report['regions']} (изменится {world_report['changed']}), чанков {world_report['chunks']}, будет удалено {world_report['dropped']}, битых {world_report['broken']}{COLOR_END}")
+    print(f"{GREEN} {world_report['bytes_before'] / 1048576:.1f} МБ -> {world_report['bytes_after'] / 1048576:.1f} МБ{COLOR_END}")
+    for world_error in world_report["errors"]:
+     print(f"{RED} {world_error}{COLOR_END}")
+
+   if any(world_report["changed"] for _, world_report in world_reports):
+    print(f"{YELLOW}Перед изменением стоит сделать снимок инстанса командой \"бэкап\"{COLOR_END}")
+    if str(input(f"{RED}Применить? да/нет: {COLOR_END}")).strip().lower() == "да":
+     for world_folder, _ in world_reports:
+      world_report = optimize_world(world_folder, min_inhabited_ticks, dry_run=False)
+      print(f"{GREEN}{world_folder.name}: удалено чанков {world_report['dropped']}, освобождено {(world_report['bytes_before'] - world_report['bytes_after']) / 1048576:.1f} МБ{COLOR_END}")
+      for world_error in world_report["errors"]:
+       print(f"{RED} {world_error}{COLOR_END}")
+   else:
+    print(f"{GREEN}Миры уже сжаты, менять нечего{COLOR_END}")